@@ -0,0 +1,204 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Run the benchmarks and compare them with a baseline.
+
+Usage::
+
+    python benchmarks/run.py                 # compare with baseline.json
+    python benchmarks/run.py --save          # record a new baseline
+    python benchmarks/run.py -k frames       # extra arguments go to pytest
+
+Benchmarks are compared by their median time. Numbers a benchmark records
+in ``extra_info``, such as ``p99_ms`` or ``bytes_per_request``, are compared
+too; lower is better for all of them. The run fails if any of them is more
+than ``--threshold`` worse than in the baseline.
+
+Timings only compare well between runs on the same machine, so record a
+baseline on the machine that checks for regressions, e.g. before a change
+or on the previous release.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+
+import pytest
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+
+
+def run(pytest_args):
+    """Run the benchmarks with pytest.
+
+    :returns:
+        The pytest exit code and the summary of the benchmarks that
+        completed, or None if none did.
+    """
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        code = pytest.main([
+            BENCHMARKS_DIR,
+            '-q',
+            '-p', 'no:cacheprovider',
+            '--benchmark-warmup=on',
+            '--benchmark-disable-gc',
+            '--benchmark-json=' + path,
+        ] + pytest_args)
+        if not os.path.getsize(path):
+            return code, None
+        with open(path) as f:
+            return code, summarize(json.load(f))
+    finally:
+        os.remove(path)
+
+
+def summarize(results):
+    """Keep what is compared from pytest-benchmark's JSON output."""
+    machine = results.get('machine_info', {})
+    return {
+        'machine': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'system': platform.system(),
+            'cpu': (machine.get('cpu') or {}).get('brand_raw') or
+            platform.processor(),
+        },
+        'commit': (results.get('commit_info') or {}).get('id'),
+        'benchmarks': dict(
+            (
+                benchmark['fullname'],
+                {
+                    'median': benchmark['stats']['median'],
+                    'extra_info': benchmark.get('extra_info') or {},
+                },
+            )
+            for benchmark in results['benchmarks']
+        ),
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print how ``current`` compares with ``baseline``.
+
+    :returns:
+        Names of the benchmarks that regressed.
+    """
+    regressions = []
+    for name in sorted(current['benchmarks']):
+        now = current['benchmarks'][name]
+        before = baseline['benchmarks'].get(name)
+        if before is None:
+            print('%-70s new' % name)
+            continue
+
+        values = [('median', before['median'], now['median'])]
+        for key in sorted(now['extra_info']):
+            value = now['extra_info'][key]
+            if key in before['extra_info'] and isinstance(
+                value, (int, float)
+            ):
+                values.append((key, before['extra_info'][key], value))
+
+        regressed = False
+        changes = []
+        for key, old, new in values:
+            change = (new - old) / old if old else 0.0
+            if change > threshold:
+                regressed = True
+            changes.append('%s %+.1f%%' % (key, change * 100))
+        if regressed:
+            regressions.append(name)
+        print('%-70s %s%s' % (
+            name, ', '.join(changes), '  REGRESSED' if regressed else '',
+        ))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.split('\n\n')[0],
+        epilog='Other arguments are passed on to pytest.',
+    )
+    parser.add_argument(
+        '--baseline', default=DEFAULT_BASELINE,
+        help='Baseline JSON file (default: %(default)s).',
+    )
+    parser.add_argument(
+        '--save', action='store_true',
+        help='Save the results to the baseline instead of comparing.',
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=0.25,
+        help='Largest slowdown that is not a regression, as a fraction '
+        '(default: %(default)s).',
+    )
+    args, pytest_args = parser.parse_known_args(argv)
+
+    code, current = run(pytest_args)
+    if current is None:
+        return code or 1
+    if code:
+        print('Some benchmarks failed and are left out of the results.')
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.save:
+        if baseline is not None:
+            # Keep benchmarks that were not selected in this run.
+            baseline['benchmarks'].update(current['benchmarks'])
+            current['benchmarks'] = baseline['benchmarks']
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print('Saved %d benchmarks to %s' % (
+            len(current['benchmarks']), args.baseline,
+        ))
+        return code
+
+    if baseline is None:
+        print('No baseline at %s; run with --save first.' % args.baseline)
+        return 1
+
+    if baseline['machine'] != current['machine']:
+        print('Warning: the baseline was recorded on %s.' % (
+            baseline['machine'],
+        ))
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print('\n%d benchmarks regressed by more than %d%%.' % (
+            len(regressions), args.threshold * 100,
+        ))
+        return 1
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import
+
+import pytest
+
+from tchannel import frame
+from tchannel import messages
+from tchannel.io import BytesIO
+from tchannel.messages import ChecksumType
+from tchannel.messages.call_request_continue import (
+    CallRequestContinueMessage
+)
+from tchannel.messages.call_response_continue import (
+    CallResponseContinueMessage
+)
+from tchannel.messages.common import Tracing
+from tchannel.messages.common import compute_checksum
+from tchannel.tornado.message_factory import MessageFactory
+
+TRACING = Tracing(span_id=1, parent_id=2, trace_id=3, traceflags=1)
+
+HEADERS = {'as': 'json', 'cn': 'benchmark-client', 're': 'c'}
+
+ARGS = [b'endpoint', b'{"header": "value"}', b'{"body": "%s"}' % (b'x' * 200)]
+
+
+def make_messages():
+    return {
+        'call_req': messages.CallRequestMessage(
+            service='benchmark-server', tracing=TRACING, headers=HEADERS,
+            checksum=(ChecksumType.crc32, 0), args=ARGS, id=1,
+        ),
+        'call_req_continue': CallRequestContinueMessage(
+            checksum=(ChecksumType.crc32, 0), args=ARGS, id=1,
+        ),
+        'call_res': messages.CallResponseMessage(
+            tracing=TRACING, headers={'as': 'json'},
+            checksum=(ChecksumType.crc32, 0), args=ARGS, id=1,
+        ),
+        'call_res_continue': CallResponseContinueMessage(
+            checksum=(ChecksumType.crc32, 0), args=ARGS, id=1,
+        ),
+        'cancel': messages.CancelMessage(tracing=TRACING, why='timeout', id=1),
+        'claim': messages.ClaimMessage(tracing=TRACING, id=1),
+        'error': messages.ErrorMessage(
+            code=messages.ErrorCode.bad_request, tracing=TRACING,
+            description='Endpoint is not defined', id=1,
+        ),
+        'init_req': messages.InitRequestMessage(
+            headers={'host_port': '127.0.0.1:4040', 'process_name': 'bench'},
+            id=1,
+        ),
+        'init_res': messages.InitResponseMessage(
+            headers={'host_port': '127.0.0.1:4041', 'process_name': 'bench'},
+            id=1,
+        ),
+        'ping_req': messages.PingRequestMessage(id=1),
+        'ping_res': messages.PingResponseMessage(id=1),
+    }
+
+
+def encode(message):
+    payload = messages.RW[message.message_type].write(
+        message, BytesIO()
+    ).getvalue()
+    f = frame.Frame(
+        header=frame.FrameHeader(
+            message_type=message.message_type, message_id=message.id,
+        ),
+        payload=payload,
+    )
+    return frame.frame_rw.write(f, BytesIO()).getvalue()
+
+
+def decode(data):
+    f = frame.frame_rw.read(BytesIO(data))
+    message = messages.RW[f.header.message_type].read(BytesIO(f.payload))
+    message.id = f.header.message_id
+    return message
+
+
+@pytest.mark.parametrize('message_type', sorted(make_messages()))
+def test_encode(benchmark, message_type):
+    message = make_messages()[message_type]
+
+    benchmark(encode, message)
+
+
+@pytest.mark.parametrize('message_type', sorted(make_messages()))
+def test_decode(benchmark, message_type):
+    data = encode(make_messages()[message_type])
+
+    benchmark(decode, data)
+
+
+@pytest.mark.parametrize('size', [1024, 64 * 1024, 10 * 1024 * 1024],
+                         ids=['1KB', '64KB', '10MB'])
+def test_fragment(benchmark, size):
+    body = b'x' * size
+
+    def setup():
+        message = messages.CallRequestMessage(
+            service='benchmark-server', tracing=TRACING, headers=HEADERS,
+            checksum=(ChecksumType.crc32, 0),
+            args=[b'endpoint', b'', body], id=1,
+        )
+        return (MessageFactory(), message), {}
+
+    def fragment(factory, message):
+        return [encode(m) for m in factory.fragment(message)]
+
+    benchmark.extra_info['frames'] = len(fragment(*setup()[0]))
+    benchmark.pedantic(
+        fragment, setup=setup, rounds=10 if size > 1024 * 1024 else 200,
+    )
+
+
+@pytest.mark.parametrize('checksum_type', ['none', 'crc32', 'crc32c'])
+def test_checksum(benchmark, checksum_type):
+    args = [b'endpoint', b'', b'x' * (64 * 1024)]
+
+    benchmark(compute_checksum, getattr(ChecksumType, checksum_type), args)
@@ -0,0 +1,68 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import pytest
+
+from tchannel.serializer.json import JsonSerializer
+from tchannel.serializer.json import _codecs
+
+
+def make_payload():
+    """A response body shaped like a typical service listing."""
+    return {
+        'total': 200,
+        'next': 'c2Vjb25kIHBhZ2U=',
+        'results': [
+            {
+                'id': i,
+                'uuid': '7f1a0c2e-%04d-4b1e-9a4d-2a6b4f8e1c3d' % i,
+                'name': u'item-%d \u2603' % i,
+                'active': i % 3 != 0,
+                'score': i * 1.5,
+                'tags': ['alpha', 'beta', 'gamma'][:i % 4],
+                'owner': {
+                    'id': i * 7,
+                    'email': 'owner%d@example.com' % i,
+                    'roles': ['admin'] if i % 10 == 0 else ['user'],
+                },
+                'history': [
+                    {'ts': 1500000000 + j, 'event': 'update', 'delta': None}
+                    for j in range(3)
+                ],
+            }
+            for i in range(200)
+        ],
+    }
+
+
+@pytest.mark.parametrize('codec', list(_codecs))
+def test_serialize_body(benchmark, codec):
+    serializer = JsonSerializer(codec)
+    payload = make_payload()
+
+    benchmark(serializer.serialize_body, payload)
+
+
+@pytest.mark.parametrize('codec', list(_codecs))
+def test_deserialize_body(benchmark, codec):
+    serializer = JsonSerializer(codec)
+    payload = JsonSerializer('json').serialize_body(make_payload())
+
+    benchmark(serializer.deserialize_body, payload)
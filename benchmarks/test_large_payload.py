@@ -0,0 +1,77 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import
+
+import multiprocessing
+import tracemalloc
+
+import pytest
+from tornado import ioloop
+
+from tchannel import TChannel
+
+
+def serve(hostports):
+    server = TChannel('benchmark-server')
+    server.listen()
+
+    @server.raw.register('echo')
+    def echo(request):
+        return b'ok'
+
+    hostports.put(server.hostport)
+    ioloop.IOLoop.current().start()
+
+
+@pytest.fixture
+def server_hostport():
+    # The server runs in its own process so that peak memory only accounts
+    # for the client.
+    hostports = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(hostports,))
+    process.start()
+    try:
+        yield hostports.get(timeout=10)
+    finally:
+        process.terminate()
+        process.join()
+
+
+@pytest.mark.parametrize('retry_limit', [0, 4])
+def test_large_payload(benchmark, server_hostport, retry_limit):
+    loop = ioloop.IOLoop.current()
+    client = TChannel('benchmark-client', known_peers=[server_hostport])
+    body = b'x' * (8 * 1024 * 1024)
+
+    def call():
+        return loop.run_sync(lambda: client.raw(
+            'benchmark-server', 'echo', body=body, retry_limit=retry_limit,
+        ))
+
+    # Establish initial connection
+    call()
+
+    tracemalloc.start()
+    call()
+    benchmark.extra_info['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    benchmark(call)
@@ -0,0 +1,128 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import
+
+import tracemalloc
+
+import pytest
+from tornado import gen, ioloop
+from tornado.concurrent import Future
+
+from tchannel import TChannel
+from tchannel import loadgen
+
+
+@pytest.fixture
+def server():
+    server = TChannel('benchmark-server')
+    server.listen()
+
+    @server.raw.register('echo')
+    def echo(request):
+        return request.body
+
+    yield server
+    server.close()
+
+
+@pytest.mark.parametrize('rate', [100, 300])
+def test_open_loop_latency(benchmark, server, rate):
+    """Latency of calls sent at a fixed rate, whether or not earlier calls
+    have finished.
+
+    Latency is measured from when each call was due to be sent, so time
+    spent waiting for a busy IOLoop to send it counts.
+    """
+    loop = ioloop.IOLoop.current()
+    client = TChannel('benchmark-client')
+
+    def send():
+        return client.raw(
+            'benchmark-server', 'echo', body=b'x' * 100,
+            hostport=server.hostport,
+        )
+
+    def run():
+        return loop.run_sync(lambda: loadgen.generate(send, rate, 1.0))
+
+    # Establish initial connection
+    loop.run_sync(send)
+
+    latency = benchmark.pedantic(run, rounds=1, iterations=1).latency
+    benchmark.extra_info['p50_ms'] = latency.percentile(50) * 1000
+    benchmark.extra_info['p99_ms'] = latency.percentile(99) * 1000
+    benchmark.extra_info['max_ms'] = latency.max / 1000.0
+
+
+def test_memory_per_inflight_request(benchmark):
+    loop = ioloop.IOLoop.current()
+    inflight = 500
+
+    server = TChannel('benchmark-server')
+    server.listen()
+    client = TChannel('benchmark-client')
+    state = {'received': 0, 'all_received': Future(), 'release': Future()}
+    state['release'].set_result(None)
+
+    @server.raw.register('hold')
+    @gen.coroutine
+    def hold(request):
+        state['received'] += 1
+        if state['received'] == inflight:
+            state['all_received'].set_result(None)
+        yield state['release']
+        raise gen.Return(b'ok')
+
+    def call():
+        return client.raw(
+            'benchmark-server', 'hold', body=b'x' * 100,
+            hostport=server.hostport,
+        )
+
+    def run():
+        state.update(
+            received=0, all_received=Future(), release=Future(),
+        )
+
+        @gen.coroutine
+        def fill():
+            before = tracemalloc.get_traced_memory()[0]
+            calls = [call() for _ in range(inflight)]
+            yield state['all_received']
+            during = tracemalloc.get_traced_memory()[0]
+            state['release'].set_result(None)
+            yield calls
+            raise gen.Return((during - before) // inflight)
+
+        return loop.run_sync(fill)
+
+    # Establish initial connection
+    loop.run_sync(call)
+
+    tracemalloc.start()
+    try:
+        per_request = benchmark.pedantic(run, rounds=3, iterations=1)
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info['bytes_per_request'] = per_request
+
+    server.close()
+    client.close()
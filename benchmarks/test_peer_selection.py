@@ -73,9 +73,9 @@ class PeerGroup(_PeerGroup):
 
 
 def hostport():
-    host = b'.'.join(bytes(random.randint(0, 255)) for i in range(4))
+    host = '.'.join(str(random.randint(0, 255)) for i in range(4))
     port = random.randint(1000, 30000)
-    return b'%s:%d' % (host, port)
+    return '%s:%d' % (host, port)
 
 
 def peer(tchannel, hostport):
@@ -0,0 +1,57 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import
+
+from tornado import gen, ioloop
+
+from tchannel._queue import Queue
+
+ITEMS = 1000
+
+
+def test_put_then_get_nowait(benchmark):
+    loop = ioloop.IOLoop.current()
+
+    @gen.coroutine
+    def run():
+        queue = Queue()
+        for i in range(ITEMS):
+            queue.put(i)
+        # Puts complete on the next IOLoop iteration.
+        yield gen.moment
+        for _ in range(ITEMS):
+            queue.get_nowait()
+
+    benchmark(loop.run_sync, run)
+
+
+def test_get_then_put(benchmark):
+    loop = ioloop.IOLoop.current()
+
+    @gen.coroutine
+    def run():
+        queue = Queue()
+        gets = [queue.get() for _ in range(ITEMS)]
+        for i in range(ITEMS):
+            queue.put(i)
+        yield gets
+
+    benchmark(loop.run_sync, run)
@@ -0,0 +1,114 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import
+
+import pytest
+
+from tchannel import thrift
+from tchannel.serializer.json import JsonSerializer
+from tchannel.serializer.raw import RawSerializer
+from tchannel.serializer.thrift import ThriftRWSerializer
+from tchannel.serializer.thrift import ThriftSerializer
+from tests.data.generated.ThriftTest.ThriftTest import (
+    testInsanity_result,
+)
+from tests.data.generated.ThriftTest.ttypes import Insanity, Xtruct
+
+ttypes = thrift.load('tests/data/idls/ThriftTest.thrift')
+
+HEADERS = {
+    'cn': 'benchmark-client',
+    'uber-trace-id': '6a2c1b5e8f3d4a7b:3e1f9c2d7a6b5e4f:0:1',
+    'request-id': '7f1a0c2e-0001-4b1e-9a4d-2a6b4f8e1c3d',
+}
+
+
+def apache_thrift_body():
+    return testInsanity_result(success={
+        i: {1: Insanity(
+            userMap={1: i, 2: i * 2},
+            xtructs=[Xtruct('item-%d' % j, 1, j, j * 1000) for j in range(5)],
+        )}
+        for i in range(20)
+    })
+
+
+def thriftrw_body():
+    return ttypes.ThriftTest.testInsanity._response_cls(success={
+        i: {ttypes.Numberz.ONE: ttypes.Insanity(
+            userMap={ttypes.Numberz.ONE: i, ttypes.Numberz.TWO: i * 2},
+            xtructs=[
+                ttypes.Xtruct('item-%d' % j, 1, j, j * 1000) for j in range(5)
+            ],
+        )}
+        for i in range(20)
+    })
+
+
+def make_serializers():
+    return {
+        'raw': (RawSerializer(), b'x' * 4096),
+        'json': (JsonSerializer(), {
+            'results': [{'id': i, 'name': 'item-%d' % i} for i in range(100)],
+        }),
+        'thrift': (
+            ThriftSerializer(testInsanity_result), apache_thrift_body(),
+        ),
+        'thriftrw': (
+            ThriftRWSerializer(
+                ttypes, ttypes.ThriftTest.testInsanity._response_cls
+            ),
+            thriftrw_body(),
+        ),
+    }
+
+
+SCHEMES = sorted(make_serializers())
+
+
+@pytest.mark.parametrize('scheme', SCHEMES)
+def test_serialize_body(benchmark, scheme):
+    serializer, body = make_serializers()[scheme]
+
+    benchmark(serializer.serialize_body, body)
+
+
+@pytest.mark.parametrize('scheme', SCHEMES)
+def test_deserialize_body(benchmark, scheme):
+    serializer, body = make_serializers()[scheme]
+    data = serializer.serialize_body(body)
+
+    benchmark(serializer.deserialize_body, data)
+
+
+@pytest.mark.parametrize('scheme', ['json', 'thrift'])
+def test_serialize_header(benchmark, scheme):
+    serializer = make_serializers()[scheme][0]
+
+    benchmark(serializer.serialize_header, HEADERS)
+
+
+@pytest.mark.parametrize('scheme', ['json', 'thrift'])
+def test_deserialize_header(benchmark, scheme):
+    serializer = make_serializers()[scheme][0]
+    data = serializer.serialize_header(HEADERS)
+
+    benchmark(serializer.deserialize_header, data)
@@ -0,0 +1,79 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tchannel.thrift.cache import CACHE_DIR_ENV
+from tchannel.thrift.cache import ModuleCache
+
+THRIFT_TEST = 'tests/data/idls/ThriftTest.thrift'
+
+
+@pytest.fixture(scope='module')
+def warm_cache_dir(tmpdir_factory):
+    cache_dir = str(tmpdir_factory.mktemp('thrift-cache'))
+    ModuleCache(cache_dir).load(THRIFT_TEST)
+    return cache_dir
+
+
+def test_load_uncached(benchmark):
+    # A new process loading the file for the first time.
+    benchmark(lambda: ModuleCache().load(THRIFT_TEST))
+
+
+def test_load_disk_cached(benchmark, warm_cache_dir):
+    # A new process loading a file that another process already parsed.
+    benchmark(lambda: ModuleCache(warm_cache_dir).load(THRIFT_TEST))
+
+
+def test_load_memory_cached(benchmark):
+    modules = ModuleCache()
+    modules.load(THRIFT_TEST)
+
+    benchmark(modules.load, THRIFT_TEST)
+
+
+@pytest.mark.parametrize('cached', [False, True], ids=['uncached', 'cached'])
+def test_startup(benchmark, warm_cache_dir, cached):
+    # Import tchannel and create a TChannel, which loads meta.thrift, in a
+    # fresh interpreter.
+    env = dict(os.environ)
+    env.pop(CACHE_DIR_ENV, None)
+    if cached:
+        env[CACHE_DIR_ENV] = warm_cache_dir
+        subprocess.check_call(
+            [sys.executable, '-c', 'import tchannel; tchannel.TChannel("b")'],
+            env=env,
+        )
+
+    benchmark.pedantic(
+        subprocess.check_call,
+        args=([
+            sys.executable, '-c',
+            'from tchannel import TChannel, thrift; TChannel("b"); '
+            'thrift.load(%r)' % THRIFT_TEST,
+        ],),
+        kwargs={'env': env},
+        rounds=10,
+    )
@@ -0,0 +1,65 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import
+
+import pytest
+from tornado import gen, ioloop
+
+from tchannel import TChannel
+
+#: Calls made per round, whatever the number of concurrent streams.
+CALLS = 100
+
+
+@pytest.mark.parametrize('streams', [1, 10, 100])
+@pytest.mark.parametrize('size', [100, 64 * 1024], ids=['100B', '64KB'])
+def test_loopback_throughput(benchmark, streams, size):
+    loop = ioloop.IOLoop.current()
+
+    server = TChannel('benchmark-server')
+    server.listen()
+    client = TChannel('benchmark-client')
+    body = b'x' * size
+
+    @server.raw.register('echo')
+    def echo(request):
+        return request.body
+
+    @gen.coroutine
+    def stream():
+        for _ in range(CALLS // streams):
+            yield client.raw(
+                'benchmark-server', 'echo', body=body,
+                hostport=server.hostport,
+            )
+
+    def run():
+        return loop.run_sync(lambda: [stream() for _ in range(streams)])
+
+    # Establish initial connection
+    run()
+
+    benchmark.extra_info['calls'] = CALLS
+    benchmark.extra_info['bytes'] = 2 * CALLS * size
+    benchmark(run)
+
+    server.close()
+    client.close()
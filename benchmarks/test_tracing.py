@@ -0,0 +1,76 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import
+
+import opentracing
+import pytest
+from jaeger_client import ConstSampler, Tracer
+from jaeger_client.reporter import NullReporter
+from tornado import ioloop, gen
+
+from tchannel import TChannel
+
+
+@pytest.yield_fixture(params=['noop', 'unsampled', 'sampled'])
+def tracer(request):
+    if request.param == 'noop':
+        tracer = opentracing.Tracer()
+    else:
+        tracer = Tracer(
+            service_name='benchmark',
+            sampler=ConstSampler(request.param == 'sampled'),
+            reporter=NullReporter(),
+        )
+    opentracing.set_global_tracer(tracer)
+    try:
+        yield tracer
+    finally:
+        opentracing._reset_global_tracer()
+
+
+def test_traced_roundtrip(benchmark, tracer):
+    loop = ioloop.IOLoop.current()
+
+    server = TChannel('benchmark-server', tracer=tracer)
+    server.listen()
+    client = TChannel('benchmark-client', tracer=tracer)
+
+    @server.json.register('ping')
+    def ping(request):
+        return request.body
+
+    def roundtrip():
+        @gen.coroutine
+        def doit():
+            # 100 requests to a server with the same tracer.
+            yield [
+                client.json(
+                    'benchmark-server', 'ping', {}, hostport=server.hostport,
+                )
+                for _ in range(100)
+            ]
+
+        return loop.run_sync(doit)
+
+    # Establish initial connection
+    roundtrip()
+
+    benchmark(roundtrip)
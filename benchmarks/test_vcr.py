@@ -0,0 +1,69 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import
+
+import pytest
+
+from tchannel.testing.vcr import proxy
+from tchannel.testing.vcr.cassette import Cassette
+
+INTERACTIONS = 2000
+
+
+def make_request(i):
+    return proxy.Request(
+        serviceName='service',
+        endpoint='endpoint%d' % (i % 10),
+        headers=b'{}',
+        body=('{"id": %d}' % i).encode('utf-8'),
+        argScheme=proxy.ArgScheme.JSON,
+    )
+
+
+@pytest.fixture(params=['yaml', 'vcr'])
+def cassette_path(tmpdir, request):
+    path = str(tmpdir.join('cassette.' + request.param))
+    with Cassette(path) as cassette:
+        for i in range(INTERACTIONS):
+            cassette.record(
+                make_request(i), proxy.Response(code=0, body=b'{"ok": true}'),
+            )
+    return path
+
+
+def test_load(benchmark, cassette_path):
+    def load():
+        Cassette._cache = {}
+        Cassette(cassette_path)
+
+    benchmark(load)
+
+
+def test_replay_all(benchmark, cassette_path):
+    Cassette(cassette_path)
+    requests = [make_request(i) for i in reversed(range(INTERACTIONS))]
+
+    def replay():
+        cassette = Cassette(cassette_path)
+        for r in requests:
+            cassette.replay(r)
+
+    benchmark(replay)
@@ -47,7 +47,7 @@ class Node(object):
 class Queue(object):
     """An unbounded, thread-safe asynchronous queue."""
 
-    __slots__ = ('_get', '_put', '_lock')
+    __slots__ = ('_get', '_put', '_lock', '_size')
 
     # How this works:
     #
@@ -93,6 +93,9 @@ class Queue(object):
     def __init__(self):
         self._lock = threading.Lock()
 
+        # Number of values put but not yet taken by a get.
+        self._size = 0
+
         # Space for the next Node.
         hole = Future()
 
@@ -104,6 +107,10 @@ class Queue(object):
         self._put = Future()
         self._put.set_result(hole)
 
+    def __len__(self):
+        """Number of values in the queue that no ``get`` has taken yet."""
+        return self._size
+
     def put(self, value):
         """Puts an item into the queue.
 
@@ -118,6 +125,7 @@ class Queue(object):
 
         with self._lock:
             self._put, put = new_put, self._put
+            self._size += 1
 
         answer = Future()
 
@@ -154,6 +162,8 @@ class Queue(object):
         value = node.value
         new_hole, node.next = node.next, None
         new_get.set_result(new_hole)
+        with self._lock:
+            self._size -= 1
         return value
 
     def get(self):
@@ -177,6 +187,8 @@ class Queue(object):
             value = node.value
             new_hole, node.next = node.next, None
             new_get.set_result(new_hole)
+            with self._lock:
+                self._size -= 1
             answer.set_result(value)
 
         def _on_get(future):
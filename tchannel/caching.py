@@ -0,0 +1,351 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import functools
+import hashlib
+import json
+import struct
+import sys
+import time
+from collections import OrderedDict
+from collections import namedtuple
+from datetime import timedelta
+
+import six
+from tornado import gen
+from tornado.concurrent import Future
+from tornado.concurrent import chain_future
+from thriftrw.protocol import BinaryProtocol
+
+from .schemes import JSON
+from .tracing import TRACING_KEY_PREFIX
+
+__all__ = ['ResponseCache', 'memoize']
+
+#: Seconds for which cached responses are used by default.
+DEFAULT_TTL = 60
+
+#: Default maximum number of cached responses.
+DEFAULT_MAX_ENTRIES = 1024
+
+#: Default maximum total size of cached responses, in bytes.
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+_uint32 = struct.Struct('>I')
+
+_TRACING_KEY_PREFIX = TRACING_KEY_PREFIX.encode('utf-8')
+
+_Entry = namedtuple('_Entry', 'value size expiry')
+
+# A call for a value that isn't cached yet, and how long its caller waits.
+_Pending = namedtuple('_Pending', 'future timeout')
+
+_thrift_protocol = BinaryProtocol()
+
+
+def _to_bytes(s):
+    if isinstance(s, six.text_type):
+        return s.encode('utf-8')
+    return s
+
+
+class ResponseCache(object):
+    """Caches the responses of idempotent calls in memory.
+
+    Responses are used for ``ttl`` seconds after they were received. When
+    the cache holds more than ``max_entries`` responses or ``max_bytes``
+    bytes, the least recently used responses are evicted. Concurrent calls
+    for a response that isn't cached yet share a single request.
+
+    Pass a cache to ``TChannel.call`` or one of the arg schemes to use it,
+
+    .. code-block:: python
+
+        cache = ResponseCache(ttl=10)
+
+        response = yield tchannel.thrift(
+            KeyValue.getValue('foo'), cache=cache
+        )
+
+    Only successful responses are cached. Errors are passed on to every
+    caller waiting for the request but are not remembered. Use the
+    ``on_cache_hit`` and ``on_cache_miss`` event hooks or the ``hits`` and
+    ``misses`` attributes to monitor the cache.
+    """
+
+    __slots__ = (
+        'ttl', 'max_entries', 'max_bytes', 'hits', 'misses', 'nbytes',
+        '_entries', '_pending',
+    )
+
+    def __init__(
+        self,
+        ttl=DEFAULT_TTL,
+        max_entries=DEFAULT_MAX_ENTRIES,
+        max_bytes=DEFAULT_MAX_BYTES,
+    ):
+        """
+        :param float ttl:
+            Number of seconds for which a response is used.
+        :param int max_entries:
+            Maximum number of cached responses.
+        :param int max_bytes:
+            Maximum total size of cached responses. ``None`` for no limit.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        #: Number of calls answered without sending a request.
+        self.hits = 0
+
+        #: Number of calls that sent a request.
+        self.misses = 0
+
+        #: Total size of cached responses.
+        self.nbytes = 0
+
+        self._entries = OrderedDict()
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(service, endpoint, headers, body):
+        """Builds the key for a call.
+
+        :param headers:
+            Serialized headers, or a dictionary of application headers.
+            Tracing headers in dictionaries are ignored because they differ
+            between otherwise identical calls.
+        :param body:
+            Serialized body.
+        """
+        if isinstance(headers, dict):
+            headers = b''.join(
+                _uint32.pack(len(k)) + k + _uint32.pack(len(v)) + v
+                for k, v in sorted(
+                    (_to_bytes(k), _to_bytes(v)) for k, v in headers.items()
+                )
+                if not k.startswith(_TRACING_KEY_PREFIX)
+            )
+
+        digest = hashlib.sha1()
+        for part in (service, endpoint, headers, body):
+            part = _to_bytes(part or b'')
+            digest.update(_uint32.pack(len(part)))
+            digest.update(part)
+        return digest.digest()
+
+    def get(self, key):
+        """Returns the value cached under ``key``, or None."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        if entry.expiry <= time.time():
+            self.nbytes -= entry.size
+            return None
+
+        # Most recently used entries are kept at the end.
+        self._entries[key] = entry
+        return entry.value
+
+    def put(self, key, value, size=0):
+        """Caches ``value`` under ``key``.
+
+        :param int size:
+            Size of ``value`` in bytes.
+        """
+        self.invalidate(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        self._entries[key] = _Entry(value, size, time.time() + self.ttl)
+        self.nbytes += size
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self.nbytes > self.max_bytes
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self.nbytes -= entry.size
+
+    def invalidate(self, key):
+        """Forgets the value cached under ``key``."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry.size
+
+    def clear(self):
+        """Forgets all cached values."""
+        self._entries.clear()
+        self.nbytes = 0
+
+    def fetch(self, key, call, sizeof=None, timeout=None):
+        """Returns the value for ``key``, calling ``call`` if necessary.
+
+        :param call:
+            Function that returns a Future for the value. It is not called
+            if the value is cached or another fetch for ``key`` is already
+            waiting for it.
+        :param sizeof:
+            Function returning the size of a value in bytes, or None if the
+            value must not be cached. Values are assumed to be empty by
+            default.
+        :param timeout:
+            Seconds for which the caller waits for the value. A fetch that
+            shares the call of another fetch stops waiting for it after its
+            own ``timeout`` with a ``tornado.gen.TimeoutError``, and a fetch
+            that may wait longer than the other fetch makes its own call.
+            ``None`` waits as long as the call takes.
+        :returns:
+            A Future that resolves to the value.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            answer = Future()
+            answer.set_result(value)
+            return answer
+
+        answer = Future()
+        pending = self._pending.get(key)
+        if pending is not None and not _outlasts(timeout, pending.timeout):
+            self.hits += 1
+            if timeout is None:
+                chain_future(pending.future, answer)
+                return answer
+            return gen.with_timeout(
+                timedelta(seconds=timeout),
+                pending.future,
+                quiet_exceptions=Exception,
+            )
+
+        self.misses += 1
+        try:
+            future = gen.maybe_future(call())
+        except Exception:
+            answer.set_exc_info(sys.exc_info())
+            return answer
+        pending = self._pending[key] = _Pending(future, timeout)
+
+        def on_done(future):
+            if self._pending.get(key) is pending:
+                del self._pending[key]
+            if future.exception():
+                return
+            value = future.result()
+            size = sizeof(value) if sizeof is not None else 0
+            if size is not None:
+                self.put(key, value, size)
+
+        future.add_done_callback(on_done)
+        chain_future(future, answer)
+        return answer
+
+
+def _outlasts(timeout, other):
+    """Whether a caller with ``timeout`` may wait longer than ``other``."""
+    return other is not None and (timeout is None or timeout > other)
+
+
+def _body_key(request):
+    """Serialize the body of a request to the same bytes for equal bodies."""
+    body = request.body
+    if getattr(request.transport, 'scheme', None) == JSON:
+        return json.dumps(body, sort_keys=True, separators=(',', ':'))
+
+    type_spec = getattr(type(body), 'type_spec', None)
+    if type_spec is not None:
+        return _thrift_protocol.serialize_value(type_spec.to_wire(body))
+
+    if body is None or isinstance(body, (bytes, six.text_type)):
+        return body
+
+    raise TypeError(
+        'Cannot build a cache key from a %s body. Pass a key function to '
+        'memoize.' % type(body).__name__
+    )
+
+
+def memoize(
+    ttl=DEFAULT_TTL,
+    max_entries=DEFAULT_MAX_ENTRIES,
+    cache=None,
+    key=None,
+):
+    """Serves repeated requests to a handler from memory.
+
+    Requests with the same endpoint, application headers and body get the
+    response returned for the first of them until it expires. Use this for
+    expensive handlers that are pure functions of their request.
+
+    Bodies are compared by their serialized form: raw bodies as they are,
+    Thrift structs in the binary protocol, and JSON bodies as JSON with
+    sorted keys. Handlers whose requests have other bodies must pass ``key``.
+
+    .. code-block:: python
+
+        @tchannel.thrift.register(KeyValue)
+        @memoize(ttl=30)
+        def getValue(request):
+            return expensive_lookup(request.body.key)
+
+    Only responses returned by the handler are remembered; exceptions are
+    raised to every request that was waiting for them. Responses are shared
+    between requests, so handlers must not modify them afterwards.
+
+    :param float ttl:
+        Number of seconds for which a response is used.
+    :param int max_entries:
+        Maximum number of remembered responses.
+    :param ResponseCache cache:
+        Cache to use instead of a new one, for example to share it between
+        handlers.
+    :param key:
+        Function that takes the request and returns bytes or text that is
+        equal for requests that get the same response, used instead of
+        their headers and body.
+    """
+    if cache is None:
+        cache = ResponseCache(ttl=ttl, max_entries=max_entries, max_bytes=None)
+
+    def decorator(handler):
+
+        @functools.wraps(handler)
+        def memoized(request):
+            if key is not None:
+                headers, body = None, key(request)
+            else:
+                headers, body = request.headers, _body_key(request)
+            return cache.fetch(
+                ResponseCache.key(
+                    request.service, request.endpoint, headers, body,
+                ),
+                lambda: handler(request),
+            )
+
+        memoized.cache = cache
+        return memoized
+
+    return decorator
@@ -0,0 +1,91 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+from tornado import gen
+
+__all__ = ['CancellationToken']
+
+
+class CancellationToken(object):
+    """Tells a request handler that its caller has given up on the request.
+
+    Every incoming request is given a token. The token is triggered when the
+    caller cancels the request (usually because it timed out on the caller's
+    side) or when the connection to the caller is lost. Long-running handlers
+    may check ``cancelled`` or wait on ``wait()`` to stop working on requests
+    whose responses will be thrown away.
+
+    .. code-block:: python
+
+        @tchannel.json.register
+        @gen.coroutine
+        def expensive(request):
+            for chunk in chunks:
+                if request.cancel_token.cancelled:
+                    return
+                yield process(chunk)
+    """
+
+    __slots__ = ('reason', '_future')
+
+    def __init__(self):
+        #: Why the request was cancelled, as reported by the caller.
+        self.reason = None
+        self._future = gen.Future()
+
+    @property
+    def cancelled(self):
+        """Whether the request was cancelled."""
+        return self._future.done()
+
+    def cancel(self, reason=None):
+        """Trigger this token.
+
+        :param reason:
+            Human-readable description of why the request was cancelled.
+        :returns:
+            True if the token was triggered by this call, False if it had
+            already been triggered.
+        """
+        if self._future.done():
+            return False
+        self.reason = reason
+        self._future.set_result(reason)
+        return True
+
+    def wait(self):
+        """Wait for the request to be cancelled.
+
+        :returns:
+            A future that resolves to the cancellation reason once the request
+            is cancelled.
+        """
+        return self._future
+
+    def add_callback(self, callback):
+        """Call ``callback(reason)`` when the request is cancelled.
+
+        If the token was already triggered, the callback is called right away.
+        """
+        self._future.add_done_callback(lambda f: callback(f.result()))
@@ -0,0 +1,442 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Record the frames of live connections and replay them against a server.
+
+A :py:class:`Capture` passed to :py:class:`tchannel.TChannel` writes every
+frame sent and received on its connections to a file, along with when it
+was seen. :py:func:`replay` sends the frames a server received to another
+server with the same timing, concurrency and fragmentation, or faster or
+slower, and measures how long it takes to answer each call:
+
+.. code-block:: python
+
+    capture = Capture('traffic.tcap')
+    tchannel = TChannel('my-service', capture=capture)
+    ...
+    capture.close()
+
+    result = yield replay('traffic.tcap', 'localhost:4040', speed=2)
+    loadgen.print_report(result)
+
+The same can be done from the command line with::
+
+    python -m tchannel.capture traffic.tcap localhost:4040 --speed 2
+
+A capture file starts with ``TCAP`` and a version byte, followed by records
+of ``time:8 connection:4 kind:1``, where ``time`` is in microseconds since
+the capture started. Records of frames are followed by the frame as it was
+on the wire, records of opened connections by their ``hostport~2``, and
+records of closed connections by nothing.
+"""
+
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import argparse
+import struct
+from collections import namedtuple
+from datetime import timedelta
+
+import six
+from tornado import gen
+from tornado.concurrent import Future
+from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError
+from tornado.tcpclient import TCPClient
+
+from . import loadgen
+from .errors import TChannelError
+from .messages.common import FlagsType
+from .messages.types import Types
+from .metrics import now
+from .tornado.connection import OUTGOING
+
+__all__ = ['Capture', 'Record', 'read', 'replay']
+
+MAGIC = b'TCAP'
+VERSION = 1
+
+#: Kinds of records.
+RECEIVED = 0
+SENT = 1
+INCOMING = 2
+OUTGOING_CONNECTION = 3
+CLOSED = 4
+
+_HEADER = struct.Struct('>4sB')
+_RECORD = struct.Struct('>QIB')
+_SIZE = struct.Struct('>H')
+# Type and ID of a frame whose size has been read.
+_FRAME_HEADER = struct.Struct('>BxI')
+_FRAME_HEADER_SIZE = 14
+
+#: A record of a capture file. ``time`` is in seconds since the capture
+#: started, and ``data`` holds the frame for ``RECEIVED`` and ``SENT``
+#: records and the hostport for ``INCOMING`` and ``OUTGOING_CONNECTION``
+#: ones.
+Record = namedtuple('Record', 'time connection kind data')
+
+
+class Capture(object):
+    """Records the frames of connections to a file.
+
+    Frames are written as they are read off or written to the wire, from
+    the IOLoop thread, so the file should be on a local disk. Only
+    connections opened while the capture is set on a TChannel are recorded.
+
+    :param file:
+        Path of the file to write, or a binary file object.
+    """
+
+    def __init__(self, file):
+        self._owns_file = isinstance(file, six.string_types)
+        if self._owns_file:
+            file = open(file, 'wb')
+        self._file = file
+        self._start = now()
+        self._connections = 0
+
+        #: Whether :py:meth:`close` has been called.
+        self.closed = False
+
+        file.write(_HEADER.pack(MAGIC, VERSION))
+
+    def _record(self, connection_id, kind, data):
+        if self.closed:
+            return
+        self._file.write(_RECORD.pack(
+            int((now() - self._start) * 1000000), connection_id, kind,
+        ) + data)
+
+    def connection_opened(self, connection):
+        """Record a new connection.
+
+        :returns:
+            The number identifying the connection in this capture.
+        """
+        self._connections += 1
+        hostport = ('%s:%s' % (
+            connection.remote_host, connection.remote_host_port,
+        )).encode('utf-8')
+        self._record(
+            self._connections,
+            OUTGOING_CONNECTION if connection.direction is OUTGOING
+            else INCOMING,
+            _SIZE.pack(len(hostport)) + hostport,
+        )
+        return self._connections
+
+    def frame_received(self, connection_id, frame):
+        self._record(connection_id, RECEIVED, frame)
+
+    def frame_sent(self, connection_id, frame):
+        self._record(connection_id, SENT, frame)
+
+    def connection_closed(self, connection_id):
+        self._record(connection_id, CLOSED, b'')
+
+    def close(self):
+        """Stop recording and flush the file. Files opened by the capture
+        are closed."""
+        if self.closed:
+            return
+        self.closed = True
+        self._file.flush()
+        if self._owns_file:
+            self._file.close()
+
+
+def read(file):
+    """Iterate over the :py:class:`Record` objects of a capture file.
+
+    A truncated record at the end of the file, as left by a process that
+    died while capturing, ends the iteration.
+
+    :param file:
+        Path of the file to read, or a binary file object.
+    :raises ValueError:
+        If the file isn't a capture file.
+    """
+    owns_file = isinstance(file, six.string_types)
+    if owns_file:
+        file = open(file, 'rb')
+    try:
+        header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size or header[:4] != MAGIC:
+            raise ValueError('not a capture file')
+        version = _HEADER.unpack(header)[1]
+        if version != VERSION:
+            raise ValueError('unsupported capture version %d' % version)
+
+        while True:
+            prefix = file.read(_RECORD.size)
+            if len(prefix) < _RECORD.size:
+                return
+            micros, connection_id, kind = _RECORD.unpack(prefix)
+            data = b''
+            if kind != CLOSED:
+                size_bytes = file.read(_SIZE.size)
+                if len(size_bytes) < _SIZE.size:
+                    return
+                (size,) = _SIZE.unpack(size_bytes)
+                if kind in (RECEIVED, SENT):
+                    # Frame sizes include the size itself.
+                    size -= _SIZE.size
+                data = file.read(size)
+                if len(data) < size:
+                    return
+                if kind in (RECEIVED, SENT):
+                    data = size_bytes + data
+                else:
+                    data = data.decode('utf-8')
+            yield Record(micros / 1000000.0, connection_id, kind, data)
+    finally:
+        if owns_file:
+            file.close()
+
+
+def _ignore_error(future):
+    # Failed writes show up as the stream being closed.
+    future.exception()
+
+
+class _Replay(object):
+    """Replays the frames of one captured connection."""
+
+    def __init__(self, kind, connect_future, result):
+        self.kind = kind
+        self.result = result
+        self.stream = None
+        self.closing = False
+        self.done = Future()
+
+        # Message IDs of calls waiting for a response, mapped to when they
+        # were due.
+        self.pending = {}
+        # Calls whose response carried an application error.
+        self.app_errors = set()
+        # Frames due before the connection was established.
+        self.backlog = []
+
+        IOLoop.current().add_future(connect_future, self._connected)
+
+    def _fail(self, message_id, name):
+        self.pending.pop(message_id, None)
+        self.app_errors.discard(message_id)
+        errors = self.result.errors
+        errors[name] = errors.get(name, 0) + 1
+
+    def fail_pending(self, name):
+        for message_id in list(self.pending):
+            self._fail(message_id, name)
+
+    def _connected(self, future):
+        if future.exception():
+            self.fail_pending(type(future.exception()).__name__)
+            self.done.set_result(None)
+            return
+        self.stream = future.result()
+        for frame in self.backlog:
+            self._write(frame)
+        self.backlog = None
+        self._read()
+        self._maybe_close()
+
+    def _write(self, frame):
+        try:
+            self.stream.write(frame).add_done_callback(_ignore_error)
+        except StreamClosedError:
+            pass
+
+    def send(self, due, frame):
+        message_type, message_id = _FRAME_HEADER.unpack_from(frame, _SIZE.size)
+        if message_type == Types.CALL_REQ:
+            self.result.sent += 1
+            self.pending[message_id] = due
+
+        if self.done.done():
+            self.fail_pending('NetworkError')
+        elif self.stream is None:
+            self.backlog.append(frame)
+        else:
+            self._write(frame)
+
+    def close(self):
+        """Close the connection once every call on it has been answered."""
+        self.closing = True
+        self._maybe_close()
+
+    def _maybe_close(self):
+        if self.closing and not self.pending and self.stream is not None:
+            self.stream.close()
+
+    @gen.coroutine
+    def _read(self):
+        try:
+            while True:
+                size_bytes = yield self.stream.read_bytes(_SIZE.size)
+                (size,) = _SIZE.unpack(size_bytes)
+                body = yield self.stream.read_bytes(size - _SIZE.size)
+                self._answer(body)
+        except StreamClosedError:
+            pass
+        finally:
+            self.fail_pending('NetworkError')
+            self.done.set_result(None)
+
+    def _answer(self, body):
+        message_type, message_id = _FRAME_HEADER.unpack_from(body)
+        if message_id not in self.pending:
+            return
+        payload = bytearray(body[_FRAME_HEADER_SIZE:_FRAME_HEADER_SIZE + 2])
+
+        if message_type in (Types.CALL_RES, Types.CALL_RES_CONTINUE):
+            # Only the first frame of a response carries its code.
+            if message_type == Types.CALL_RES and payload[1]:
+                self.app_errors.add(message_id)
+            if payload[0] & FlagsType.fragment:
+                return
+            if message_id in self.app_errors:
+                self._fail(message_id, 'ApplicationError')
+            else:
+                due = self.pending.pop(message_id)
+                self.result.latency.record(IOLoop.current().time() - due)
+        elif message_type == Types.ERROR:
+            try:
+                error = TChannelError.from_code(payload[0])
+            except KeyError:
+                name = 'UnexpectedError'
+            else:
+                name = type(error).__name__
+            self._fail(message_id, name)
+        else:
+            return
+        self._maybe_close()
+
+
+@gen.coroutine
+def replay(file, hostport, speed=1.0, timeout=5.0):
+    """Send the calls recorded in a capture file to a server.
+
+    Every captured connection is replayed on a connection of its own, with
+    each frame sent as long after the start of the capture as it was
+    originally seen, divided by ``speed``. The frames sent are those the
+    capturing TChannel received on incoming connections and sent on
+    outgoing ones, including the handshake; responses are read but only
+    used to time calls.
+
+    :param file:
+        Path of the capture file, or a binary file object.
+    :param str hostport:
+        Server to send the calls to.
+    :param float speed:
+        How many times faster than recorded to send frames.
+    :param float timeout:
+        Seconds to wait for the responses of outstanding calls once every
+        frame has been sent. Calls still unanswered count as
+        ``TimeoutError``.
+    :returns:
+        A :py:class:`tchannel.loadgen.LoadResult` with the latency of
+        answered calls, measured from when their first frame was due.
+        Calls answered with an error frame are counted by the name of the
+        matching :py:class:`tchannel.errors.TChannelError`, those answered
+        with an application error as ``ApplicationError``, and those whose
+        connection closed as ``NetworkError``.
+    """
+    if speed <= 0:
+        raise ValueError('speed must be positive')
+
+    io_loop = IOLoop.current()
+    host, port = hostport.rsplit(':', 1)
+    client = TCPClient()
+    result = loadgen.LoadResult()
+    connections = {}
+
+    start = io_loop.time()
+    first = None
+    for record in read(file):
+        if first is None:
+            first = record.time
+        due = start + (record.time - first) / speed
+        delay = due - io_loop.time()
+        if delay > 0:
+            yield gen.sleep(delay)
+
+        if record.kind in (INCOMING, OUTGOING_CONNECTION):
+            connections[record.connection] = _Replay(
+                RECEIVED if record.kind == INCOMING else SENT,
+                client.connect(host, int(port)),
+                result,
+            )
+            continue
+
+        connection = connections.get(record.connection)
+        if connection is None:
+            continue
+        if record.kind == connection.kind:
+            connection.send(due, record.data)
+        elif record.kind == CLOSED:
+            connection.close()
+
+    for connection in connections.values():
+        connection.close()
+    try:
+        yield gen.with_timeout(
+            timedelta(seconds=timeout),
+            [connection.done for connection in connections.values()],
+        )
+    except gen.TimeoutError:
+        for connection in connections.values():
+            connection.fail_pending('TimeoutError')
+            if connection.stream is not None:
+                connection.stream.close()
+
+    result.elapsed = io_loop.time() - start
+    raise gen.Return(result)
+
+
+def main(argv=None):  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description='Replay the calls in a capture file against a server.',
+    )
+    parser.add_argument('file', help='Capture file to replay.')
+    parser.add_argument('hostport', help='Server to send the calls to.')
+    parser.add_argument(
+        '--speed', type=float, default=1.0,
+        help='How many times faster than recorded to send calls.',
+    )
+    parser.add_argument(
+        '--timeout', type=float, default=5.0,
+        help='Seconds to wait for responses once every call has been sent.',
+    )
+    args = parser.parse_args(argv)
+    if args.speed <= 0:
+        parser.error('--speed must be positive')
+
+    result = IOLoop.current().run_sync(lambda: replay(
+        args.file, args.hostport, speed=args.speed, timeout=args.timeout,
+    ))
+    loadgen.print_report(result)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -25,6 +25,8 @@ import collections
 import functools
 import logging
 import tornado
+import tornado.concurrent
+import tornado.gen
 
 from .enum import enum
 
@@ -46,6 +48,8 @@ EventType = enum(
     after_receive_error=0x41,
     after_send_error=0x42,
     on_exception=0x50,
+    on_cache_hit=0x60,
+    on_cache_miss=0x61,
 )
 
 
@@ -125,6 +129,20 @@ class EventHook(object):
         """
         pass
 
+    def on_cache_hit(self, service, endpoint):
+        """Called when a call is answered from a ``ResponseCache``."""
+        pass
+
+    def on_cache_miss(self, service, endpoint):
+        """Called when a call with a ``ResponseCache`` sends a request."""
+        pass
+
+
+# Returned by EventEmitter.fire when no hook is still running, so firing an
+# event without hooks allocates nothing and doesn't wait for the IOLoop.
+_DONE = tornado.concurrent.Future()
+_DONE.set_result(None)
+
 
 class EventEmitter(object):
     def __init__(self):
@@ -150,9 +168,48 @@ class EventEmitter(object):
                 event_value = getattr(EventType, event_type)
                 self.register_hook(func, event_value)
 
-    @tornado.gen.coroutine
     def fire(self, event, *args, **kwargs):
-        for hook in self.hooks[event]:
+        """Call the hooks registered for the given event.
+
+        Hooks are called in the order they were registered. If a hook returns
+        a future, the remaining hooks are called once it resolves.
+
+        :returns:
+            A future that resolves once all hooks have been called. It's
+            already resolved if none of the hooks returned a pending future.
+        """
+        hooks = self.hooks.get(event)
+        if not hooks:
+            return _DONE
+
+        for i, hook in enumerate(hooks):
+            try:
+                possible_future = hook(*args, **kwargs)
+            except Exception:
+                log.error("error calling hook", exc_info=sys.exc_info())
+                continue
+
+            if not tornado.concurrent.is_future(possible_future):
+                continue
+            if not possible_future.done():
+                return self._fire_rest(
+                    possible_future, hooks[i + 1:], args, kwargs
+                )
+            if possible_future.exception() is not None:
+                log.error(
+                    "error calling hook", exc_info=possible_future.exc_info()
+                )
+
+        return _DONE
+
+    @tornado.gen.coroutine
+    def _fire_rest(self, pending, hooks, args, kwargs):
+        try:
+            yield pending
+        except Exception:
+            log.error("error calling hook", exc_info=sys.exc_info())
+
+        for hook in hooks:
             try:
                 possible_future = hook(*args, **kwargs)
                 if tornado.concurrent.is_future(possible_future):
@@ -0,0 +1,193 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Open-loop load generation, as done by ``tcurl.py --rate``.
+
+Calls are sent at a fixed rate whether or not earlier calls have finished,
+like real traffic. A closed-loop client, which waits for a response before
+sending the next call, sends less when the server slows down and so hides
+the slowdown; this is known as coordinated omission. Here the latency of
+each call is measured from when it was due to be sent, so time spent waiting
+for an IOLoop or a concurrency slot counts.
+
+.. code-block:: python
+
+    result = yield loadgen.generate(
+        lambda: tchannel.json('service', 'endpoint', body={}),
+        rate=1000,
+        duration=10,
+    )
+    loadgen.print_report(result)
+"""
+
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import sys
+from collections import deque
+
+from tornado import gen
+from tornado.concurrent import Future
+from tornado.ioloop import IOLoop
+
+from .metrics import Histogram
+
+__all__ = ['LoadResult', 'generate', 'print_report']
+
+#: Percentiles shown by :py:func:`print_report`.
+PERCENTILES = (50, 75, 90, 99, 99.9, 99.99, 100)
+
+
+class LoadResult(object):
+    """Outcome of the calls sent by :py:func:`generate`.
+
+    :ivar latency:
+        :py:class:`tchannel.metrics.Histogram` of the latency of successful
+        calls, measured from when they were due to be sent.
+    :ivar sent:
+        Number of calls sent.
+    :ivar errors:
+        Number of failed calls by exception name.
+    :ivar queued:
+        Number of calls that waited for a concurrency slot.
+    :ivar elapsed:
+        Seconds from the first call being due to the last one finishing.
+    """
+
+    def __init__(self):
+        self.latency = Histogram('latency')
+        self.sent = 0
+        self.errors = {}
+        self.queued = 0
+        self.elapsed = 0.0
+
+    @property
+    def failed(self):
+        return sum(self.errors.values())
+
+    @property
+    def succeeded(self):
+        return self.sent - self.failed
+
+    def merge(self, other):
+        """Add the calls of another :py:class:`LoadResult`, such as one from
+        another process sending at the same time."""
+        self.latency.merge(other.latency)
+        self.sent += other.sent
+        for name, count in other.errors.items():
+            self.errors[name] = self.errors.get(name, 0) + count
+        self.queued += other.queued
+        self.elapsed = max(self.elapsed, other.elapsed)
+
+
+@gen.coroutine
+def generate(send, rate, duration, concurrency=None):
+    """Call ``send`` ``rate`` times a second for ``duration`` seconds.
+
+    :param send:
+        Function that sends a call and returns a future for its response.
+    :param float rate:
+        Calls per second.
+    :param float duration:
+        Seconds to send calls for.
+    :param int concurrency:
+        Most calls in flight at once. Calls that are due while this many
+        are in flight wait for one of them to finish. Unlimited by default.
+    :returns:
+        A :py:class:`LoadResult` once every call has finished.
+    """
+    io_loop = IOLoop.current()
+    result = LoadResult()
+    total = int(rate * duration)
+    interval = 1.0 / rate
+    backlog = deque()
+    done = Future()
+    state = {'inflight': 0, 'remaining': total}
+
+    def finish(due, future):
+        if future.exception() is None:
+            result.latency.record(io_loop.time() - due)
+        else:
+            name = type(future.exception()).__name__
+            result.errors[name] = result.errors.get(name, 0) + 1
+        state['inflight'] -= 1
+        if backlog:
+            fire(backlog.popleft())
+        state['remaining'] -= 1
+        if not state['remaining']:
+            done.set_result(None)
+
+    def fire(due):
+        state['inflight'] += 1
+        result.sent += 1
+        try:
+            future = send()
+        except Exception:
+            future = Future()
+            future.set_exc_info(sys.exc_info())
+        io_loop.add_future(future, lambda f: finish(due, f))
+
+    start = io_loop.time()
+    sent = 0
+    while sent < total:
+        now = io_loop.time()
+        while sent < total and start + sent * interval <= now:
+            due = start + sent * interval
+            if concurrency and state['inflight'] >= concurrency:
+                backlog.append(due)
+                result.queued += 1
+            else:
+                fire(due)
+            sent += 1
+        if sent < total:
+            yield gen.sleep(start + sent * interval - io_loop.time())
+
+    if total:
+        yield done
+    result.elapsed = io_loop.time() - start
+    raise gen.Return(result)
+
+
+def print_report(result, file=None):
+    """Print the throughput and latency distribution of a
+    :py:class:`LoadResult`."""
+    file = file or sys.stdout
+    elapsed = result.elapsed or 1.0
+    print(
+        '%d calls in %.2fs: %d succeeded (%.1f/s), %d failed, %d waited for '
+        'a concurrency slot' % (
+            result.sent, result.elapsed, result.succeeded,
+            result.succeeded / elapsed, result.failed, result.queued,
+        ),
+        file=file,
+    )
+    if result.latency.count:
+        print('Latency, corrected for coordinated omission:', file=file)
+        print('  %8s  %.3fms' % ('mean', result.latency.mean * 1000),
+              file=file)
+        for q in PERCENTILES:
+            print('  %7s%%  %.3fms' % (
+                '%g' % q, result.latency.percentile(q) * 1000,
+            ), file=file)
+    if result.errors:
+        print('Errors:', file=file)
+        for name, count in sorted(result.errors.items()):
+            print('  %s: %d' % (name, count), file=file)
@@ -20,6 +20,8 @@
 
 from __future__ import absolute_import
 
+import six
+
 from . import common
 from .base import BaseMessage
 from .common import FlagsType
@@ -76,6 +78,11 @@ class CallContinueMessage(BaseMessage):
                 if arg is not None:
                     arg_length = len(arg)
                     if space_left < arg_length:
+                        if six.PY3 and isinstance(arg, bytes):
+                            # Slicing bytes copies them. The rest of a large
+                            # arg is sliced again for every frame, so share
+                            # the buffer instead.
+                            arg = memoryview(arg)
                         fragment_msg.args.append(arg[space_left:])
                         new_args.append(arg[:space_left])
                         space_left = 0
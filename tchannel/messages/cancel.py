@@ -24,9 +24,13 @@ from . import common
 from .. import rw
 from ..glossary import DEFAULT_TIMEOUT
 from .base import BaseMessage
+from .types import Types
 
 
 class CancelMessage(BaseMessage):
+    """Ask the receiver to stop processing a request."""
+    message_type = Types.CANCEL
+
     __slots__ = BaseMessage.__slots__ + (
         'ttl',
         'tracing',
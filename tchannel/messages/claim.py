@@ -24,9 +24,13 @@ from . import common
 from .. import rw
 from ..glossary import DEFAULT_TIMEOUT
 from .base import BaseMessage
+from .types import Types
 
 
 class ClaimMessage(BaseMessage):
+    """Tell the receiver that a speculative request has been claimed."""
+    message_type = Types.CLAIM
+
     __slots__ = BaseMessage.__slots__ + (
         'ttl',
         'tracing',
@@ -0,0 +1,495 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""In-process metrics for calls made and served by a TChannel.
+
+.. code-block:: python
+
+    from tchannel import TChannel
+    from tchannel.metrics import MetricsRegistry
+    from tchannel.statsd import StatsdSink
+
+    metrics = MetricsRegistry(sinks=[StatsdSink(statsd)])
+    tchannel = TChannel('my-service', metrics=metrics)
+    metrics.start()
+
+    # p99 latency of calls to another service's endpoint
+    metrics.outbound('my-service', 'other', 'endpoint').latency.percentile(99)
+"""
+
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import logging
+import time
+
+import six
+from tornado.ioloop import PeriodicCallback
+
+log = logging.getLogger('tchannel')
+
+__all__ = [
+    'CallMetrics', 'Counter', 'Gauge', 'Histogram', 'MetricsRegistry',
+    'MetricsSink', 'Timings',
+]
+
+#: Monotonic clock in seconds where available.
+now = getattr(time, 'monotonic', time.time)
+
+#: Histograms keep this many bits of precision: values are recorded with a
+#: relative error of at most ``1 / 2 ** (SUB_BUCKET_BITS - 1)``.
+SUB_BUCKET_BITS = 6
+
+#: Largest value a histogram tells apart, in microseconds (about 4 hours).
+#: Larger values are counted in the last bucket.
+MAX_MICROSECONDS = 1 << 34
+
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_HALF_SUB_BUCKETS = _SUB_BUCKETS // 2
+
+
+def _bucket_index(micros):
+    if micros < _SUB_BUCKETS:
+        return micros
+    shift = micros.bit_length() - SUB_BUCKET_BITS
+    return shift * _HALF_SUB_BUCKETS + (micros >> shift)
+
+
+def _bucket_upper_bound(index):
+    if index < _SUB_BUCKETS:
+        return index + 1
+    shift = index // _HALF_SUB_BUCKETS - 1
+    return (index - shift * _HALF_SUB_BUCKETS + 1) << shift
+
+
+_NUM_BUCKETS = _bucket_index(MAX_MICROSECONDS - 1) + 1
+
+
+def _text(value):
+    if six.PY3 and isinstance(value, bytes):
+        return value.decode('utf8', 'replace')
+    return value
+
+
+class Counter(object):
+    """Number of times something happened since the last flush."""
+
+    __slots__ = ('name', 'tags', 'value')
+
+    def __init__(self, name, tags=()):
+        self.name = name
+        self.tags = tags
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+    def reset(self):
+        self.value = 0
+
+
+class Gauge(object):
+    """Last known value of something, such as the length of a queue.
+
+    Gauges keep their value across flushes.
+    """
+
+    __slots__ = ('name', 'tags', 'value')
+
+    def __init__(self, name, tags=()):
+        self.name = name
+        self.tags = tags
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+
+
+class Histogram(object):
+    """Distribution of durations since the last flush.
+
+    Durations are counted in log-linear buckets, like an HDR histogram, so
+    recording is a constant-time list update and percentiles are accurate to
+    within a few percent.
+    """
+
+    __slots__ = ('name', 'tags', 'counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, name, tags=()):
+        self.name = name
+        self.tags = tags
+        self.counts = [0] * _NUM_BUCKETS
+        self.reset()
+
+    def record(self, seconds):
+        """Record a duration.
+
+        :param float seconds:
+            Duration in seconds.
+        """
+        micros = int(seconds * 1000000 + 0.5)
+        if micros < 0:
+            micros = 0
+        elif micros >= MAX_MICROSECONDS:
+            micros = MAX_MICROSECONDS - 1
+        self.counts[_bucket_index(micros)] += 1
+        self.count += 1
+        self.sum += micros
+        if micros < self.min:
+            self.min = micros
+        if micros > self.max:
+            self.max = micros
+
+    def merge(self, other):
+        """Add the durations recorded by another histogram."""
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q):
+        """Get the duration that ``q`` percent of the recorded ones are under.
+
+        :param float q:
+            Percentile between 0 and 100.
+        :returns:
+            The duration in seconds, or None if nothing was recorded.
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(round(self.count * q / 100.0)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                micros = min(_bucket_upper_bound(index) - 1, self.max)
+                return max(micros, self.min) / 1000000.0
+        return self.max / 1000000.0
+
+    @property
+    def mean(self):
+        """Mean duration in seconds, or None if nothing was recorded."""
+        if not self.count:
+            return None
+        return self.sum / self.count / 1000000.0
+
+    def reset(self):
+        self.counts[:] = [0] * _NUM_BUCKETS
+        self.count = 0
+        self.sum = 0
+        self.min = MAX_MICROSECONDS
+        self.max = 0
+
+
+class CallMetrics(object):
+    """Metrics for calls between a caller and an endpoint of a service.
+
+    :ivar calls: Calls made or received.
+    :ivar successes: Calls that succeeded.
+    :ivar app_errors: Calls that returned an application error.
+    :ivar system_errors: Calls that failed with a TChannel error.
+    :ivar latency: Duration of calls, including retries.
+    :ivar attempt_latency:
+        Duration of each attempt of outgoing calls. Empty for incoming calls.
+    :ivar serialization_latency:
+        Time spent serializing the headers and body of outgoing JSON and
+        Thrift calls. Empty for incoming calls.
+    :ivar phases:
+        Histograms of the time calls took to reach each phase from the
+        previous one, by phase name. See :py:class:`Timings`.
+    """
+
+    __slots__ = (
+        'calls', 'successes', 'app_errors', 'system_errors', 'latency',
+        'attempt_latency', 'serialization_latency', 'phases',
+        '_registry', '_prefix', '_tags',
+    )
+
+    def __init__(self, registry, direction, tags):
+        prefix = direction + '.calls.'
+        self._registry = registry
+        self._prefix = prefix
+        self._tags = tags
+        self.phases = {}
+        self.calls = registry.counter(
+            prefix + ('sent' if direction == 'outbound' else 'recvd'), tags
+        )
+        self.successes = registry.counter(prefix + 'success', tags)
+        self.app_errors = registry.counter(prefix + 'app-errors', tags)
+        self.system_errors = registry.counter(prefix + 'system-errors', tags)
+        self.latency = registry.histogram(prefix + 'latency', tags)
+        self.attempt_latency = registry.histogram(
+            prefix + 'per-attempt.latency', tags
+        )
+        self.serialization_latency = registry.histogram(
+            prefix + 'serialization.latency', tags
+        )
+
+    def phase(self, name):
+        """Get the histogram of the time calls took to reach phase
+        ``name``."""
+        histogram = self.phases.get(name)
+        if histogram is None:
+            histogram = self.phases[name] = self._registry.histogram(
+                self._prefix + 'phases.' + name, self._tags
+            )
+        return histogram
+
+
+class Timings(object):
+    """Times at which a call reached each phase of its life.
+
+    Calls are timed when their TChannel is created with ``timings=True``.
+    Outgoing calls go through these phases, in order:
+
+    ``serialized``
+        JSON or Thrift headers and body were serialized.
+    ``connected``
+        A peer was chosen and a connection to it is ready.
+    ``written``
+        The request was written to the connection, after waiting for the
+        frames ahead of it.
+    ``received``
+        The response arrived.
+    ``decoded``
+        JSON or Thrift headers and body were deserialized.
+
+    ``written`` and ``received`` repeat for every retry. Incoming calls go
+    through ``routed``, ``read`` (the handler's arguments were read),
+    ``handled`` and ``responded``.
+
+    :ivar started:
+        When the call started, in seconds of :py:func:`now`.
+    :ivar marks:
+        ``(phase, time)`` pairs in the order they were reached.
+    :ivar metrics:
+        :py:class:`CallMetrics` whose phase histograms record the time
+        taken by each phase, if any.
+    """
+
+    __slots__ = ('started', 'marks', 'metrics')
+
+    def __init__(self, metrics=None):
+        self.started = now()
+        self.marks = []
+        self.metrics = metrics
+
+    def mark(self, phase):
+        """Record that the call reached ``phase``."""
+        timestamp = now()
+        if self.metrics is not None:
+            previous = self.marks[-1][1] if self.marks else self.started
+            self.metrics.phase(phase).record(timestamp - previous)
+        self.marks.append((phase, timestamp))
+
+    def durations(self):
+        """Get the time taken by each phase.
+
+        :returns:
+            ``(phase, seconds)`` pairs, where ``seconds`` is the time since
+            the previous phase or the start of the call.
+        """
+        durations = []
+        previous = self.started
+        for phase, timestamp in self.marks:
+            durations.append((phase, timestamp - previous))
+            previous = timestamp
+        return durations
+
+    def __repr__(self):
+        return '<Timings %s>' % ', '.join(
+            '%s=%.3fms' % (phase, seconds * 1000)
+            for phase, seconds in self.durations()
+        )
+
+
+class MetricsRegistry(object):
+    """Collects counters and latency histograms and flushes them to sinks.
+
+    Metrics are created the first time they're used and kept afterwards, so
+    recording a value never builds names or keys. Gauges that are expensive
+    to keep up to date can be set by collectors, which run before every
+    flush; see :py:meth:`add_collector`.
+
+    :param sinks:
+        :py:class:`MetricsSink` objects that receive the metrics whenever the
+        registry is flushed.
+    :param float interval:
+        Seconds between flushes once :py:meth:`start` is called.
+    """
+
+    def __init__(self, sinks=None, interval=10.0):
+        self.sinks = list(sinks or [])
+        self.interval = interval
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._calls = {}
+        self._collectors = []
+        self._flusher = None
+
+        #: Time frames spent in connection write queues. Not per endpoint.
+        self.queue_wait = self.histogram('connection.queue-wait')
+
+    def counter(self, name, tags=()):
+        """Get the counter with the given name and tags.
+
+        :param str name:
+            Name of the counter.
+        :param tuple tags:
+            ``(caller, service, endpoint)`` the counter is for, if any.
+        """
+        key = (name, tags)
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters[key] = Counter(name, tags)
+        return counter
+
+    def histogram(self, name, tags=()):
+        """Get the histogram with the given name and tags.
+
+        See :py:meth:`counter`.
+        """
+        key = (name, tags)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(name, tags)
+        return histogram
+
+    def gauge(self, name, tags=()):
+        """Get the gauge with the given name and tags.
+
+        See :py:meth:`counter`.
+        """
+        key = (name, tags)
+        gauge = self._gauges.get(key)
+        if gauge is None:
+            gauge = self._gauges[key] = Gauge(name, tags)
+        return gauge
+
+    def add_collector(self, collector):
+        """Call ``collector`` with this registry before every flush.
+
+        :param collector:
+            Function that takes the registry and updates metrics in it,
+            usually gauges.
+        """
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector):
+        """Stop calling a collector added with :py:meth:`add_collector`."""
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def outbound(self, caller, service, endpoint):
+        """Get the :py:class:`CallMetrics` of calls made to an endpoint."""
+        return self._call_metrics('outbound', caller, service, endpoint)
+
+    def inbound(self, caller, service, endpoint):
+        """Get the :py:class:`CallMetrics` of calls received by an
+        endpoint."""
+        return self._call_metrics('inbound', caller, service, endpoint)
+
+    def _call_metrics(self, direction, caller, service, endpoint):
+        key = (direction, caller, service, endpoint)
+        metrics = self._calls.get(key)
+        if metrics is None:
+            # Endpoints arrive as bytes or text depending on the caller; both
+            # share the same metrics.
+            tags = (_text(caller), _text(service), _text(endpoint))
+            metrics = self._calls.get((direction,) + tags)
+            if metrics is None:
+                metrics = CallMetrics(self, direction, tags)
+                self._calls[(direction,) + tags] = metrics
+            self._calls[key] = metrics
+        return metrics
+
+    @property
+    def counters(self):
+        return list(self._counters.values())
+
+    @property
+    def histograms(self):
+        return list(self._histograms.values())
+
+    @property
+    def gauges(self):
+        return list(self._gauges.values())
+
+    def collect(self):
+        """Run the collectors."""
+        for collector in list(self._collectors):
+            try:
+                collector(self)
+            except Exception:
+                log.exception('Metrics collector %r failed.', collector)
+
+    def flush(self):
+        """Send metrics recorded since the last flush to the sinks and
+        reset them.
+
+        Gauges are sent with their current value and are not reset.
+        """
+        self.collect()
+        counters = [c for c in self._counters.values() if c.value]
+        histograms = [h for h in self._histograms.values() if h.count]
+        gauges = [g for g in self._gauges.values() if g.value is not None]
+        for sink in self.sinks:
+            try:
+                sink.report(counters, histograms, gauges)
+            except Exception:
+                log.exception('Failed to report metrics to %r.', sink)
+        for metric in counters + histograms:
+            metric.reset()
+
+    def start(self):
+        """Flush metrics every ``interval`` seconds on the current IOLoop."""
+        if self._flusher is None:
+            self._flusher = PeriodicCallback(
+                self.flush, self.interval * 1000
+            )
+            self._flusher.start()
+
+    def stop(self):
+        """Stop flushing metrics periodically."""
+        if self._flusher is not None:
+            self._flusher.stop()
+            self._flusher = None
+
+
+class MetricsSink(object):
+    """Receives metrics when a :py:class:`MetricsRegistry` is flushed."""
+
+    def report(self, counters, histograms, gauges):
+        """Report metrics recorded since the last flush.
+
+        :param counters:
+            :py:class:`Counter` objects that changed.
+        :param histograms:
+            :py:class:`Histogram` objects with recorded durations.
+        :param gauges:
+            :py:class:`Gauge` objects that have a value.
+        """
+        raise NotImplementedError()
@@ -0,0 +1,241 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Profile a live server from the inside.
+
+:py:func:`profile` samples the stacks of the IOLoop thread for a while and
+times calls to every endpoint while it does. A TChannel created with
+``debug_endpoints=True`` runs it when the ``tchannel::profile`` JSON
+endpoint is called:
+
+.. code-block:: python
+
+    response = yield tchannel.json(
+        'my-service', 'tchannel::profile', body={'seconds': 10},
+        hostport='10.0.0.1:4040', timeout=15,
+    )
+    with open('stacks.txt', 'w') as f:
+        f.write(response.body['stacks'])
+
+``stacks.txt`` can be turned into a flamegraph with ``flamegraph.pl`` or
+loaded in speedscope.
+"""
+
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import cProfile
+import pstats
+import sys
+import threading
+
+import six
+from tornado import gen
+
+from .metrics import Histogram
+
+__all__ = ['HandlerTimes', 'StackSampler', 'profile']
+
+#: Longest profile the ``tchannel::profile`` endpoint runs, in seconds.
+MAX_SECONDS = 60
+
+#: Profiling modes understood by :py:func:`profile`.
+MODES = ('collapsed', 'pstats')
+
+#: Name under which :py:class:`HandlerTimes` records calls handled by the
+#: fallback handler.
+FALLBACK_ENDPOINT = '<fallback>'
+
+
+class StackSampler(object):
+    """Samples the stack of a thread from a background thread.
+
+    Sampling only reads frames, so the sampled thread runs at full speed
+    apart from sharing the GIL with the sampler every ``interval``.
+
+    :param float interval:
+        Seconds between samples.
+    :param thread_id:
+        Thread to sample. Defaults to the thread that calls
+        :py:meth:`start`.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+
+        #: Number of times each stack was seen, keyed by tuples of code
+        #: objects from the outermost frame in.
+        self.stacks = {}
+
+        #: Number of samples taken.
+        self.samples = 0
+
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.current_thread().ident
+        self._thread = threading.Thread(
+            target=self._run, name='tchannel-stack-sampler'
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        stacks = self.stacks
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            stack = tuple(reversed(stack))
+            stacks[stack] = stacks.get(stack, 0) + 1
+            self.samples += 1
+            del frame, stack
+
+    def collapsed(self):
+        """Get the stacks in the collapsed format of ``flamegraph.pl``.
+
+        :returns:
+            One ``frame;frame;... count`` line per distinct stack, most
+            frequent first.
+        """
+        lines = []
+        for stack, count in sorted(
+            self.stacks.items(), key=lambda item: -item[1]
+        ):
+            lines.append('%s %d' % (
+                ';'.join(
+                    '%s (%s:%d)' % (
+                        code.co_name, code.co_filename, code.co_firstlineno
+                    )
+                    for code in stack
+                ),
+                count,
+            ))
+        return '\n'.join(lines)
+
+
+class HandlerTimes(object):
+    """Time taken to handle calls, by endpoint.
+
+    A :py:class:`tchannel.tornado.dispatch.RequestDispatcher` records into
+    its ``handler_times`` while one is set.
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+
+    def record(self, endpoint, seconds):
+        histogram = self.endpoints.get(endpoint)
+        if histogram is None:
+            histogram = self.endpoints[endpoint] = Histogram(endpoint)
+        histogram.record(seconds)
+
+    def summary(self):
+        """Get a dict from endpoint name to the number of calls handled and
+        the total, mean, p50, p99 and maximum time taken in seconds.
+
+        Calls handled by the fallback handler are under
+        :py:data:`FALLBACK_ENDPOINT`.
+        """
+        summary = {}
+        for endpoint, histogram in six.iteritems(self.endpoints):
+            summary[endpoint] = {
+                'calls': histogram.count,
+                'total': histogram.sum / 1000000.0,
+                'mean': histogram.mean,
+                'p50': histogram.percentile(50),
+                'p99': histogram.percentile(99),
+                'max': histogram.max / 1000000.0,
+            }
+        return summary
+
+
+@gen.coroutine
+def profile(dispatcher, seconds, mode='collapsed', interval=0.005,
+            limit=50):
+    """Profile the current IOLoop thread for ``seconds``.
+
+    The IOLoop keeps serving calls while the profile runs.
+
+    :param dispatcher:
+        :py:class:`tchannel.tornado.dispatch.RequestDispatcher` whose calls
+        are timed.
+    :param float seconds:
+        How long to profile for.
+    :param str mode:
+        ``'collapsed'`` to sample stacks every ``interval`` seconds, or
+        ``'pstats'`` to trace every function call with ``cProfile``, which
+        is more precise but slows the server down.
+    :param int limit:
+        Number of functions listed in ``'pstats'`` mode.
+    :returns:
+        A dict with the ``seconds`` and ``mode`` of the profile, the
+        :py:meth:`HandlerTimes.summary` under ``endpoints``, and either the
+        :py:meth:`StackSampler.collapsed` stacks under ``stacks`` with the
+        number of ``samples``, or the ``pstats`` report sorted by cumulative
+        time under ``stats``.
+    """
+    if mode not in MODES:
+        raise ValueError('Unknown profiling mode %r' % mode)
+    if dispatcher.handler_times is not None:
+        raise ValueError('A profile is already running')
+
+    handler_times = dispatcher.handler_times = HandlerTimes()
+    result = {'seconds': seconds, 'mode': mode}
+    try:
+        if mode == 'collapsed':
+            sampler = StackSampler(interval=interval)
+            sampler.start()
+            try:
+                yield gen.sleep(seconds)
+            finally:
+                sampler.stop()
+            result['samples'] = sampler.samples
+            result['stacks'] = sampler.collapsed()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield gen.sleep(seconds)
+            finally:
+                profiler.disable()
+            stream = six.StringIO()
+            stats = pstats.Stats(profiler, stream=stream)
+            stats.sort_stats('cumulative').print_stats(limit)
+            result['stats'] = stream.getvalue()
+    finally:
+        dispatcher.handler_times = None
+
+    result['endpoints'] = handler_times.summary()
+    raise gen.Return(result)
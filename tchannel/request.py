@@ -58,6 +58,11 @@ class Request(object):
     :ivar timeout:
         Amount of time (in seconds) within which this request is expected to
         finish.
+
+    :ivar cancel_token:
+        A :py:class:`tchannel.cancellation.CancellationToken` that is
+        triggered if the caller abandons this request. This is only set for
+        requests received by handlers.
     """
 
     # TODO move over other props from tchannel.tornado.request
@@ -69,6 +74,7 @@ class Request(object):
         'transport',
         'endpoint',
         'timeout',
+        'cancel_token',
     )
 
     def __init__(
@@ -79,6 +85,7 @@ class Request(object):
         endpoint=None,
         service=None,
         timeout=None,
+        cancel_token=None,
     ):
         self.body = body
         self.headers = headers
@@ -86,6 +93,7 @@ class Request(object):
         self.endpoint = endpoint
         self.service = service
         self.timeout = timeout
+        self.cancel_token = cancel_token
 
 
 class TransportHeaders(object):
@@ -45,6 +45,10 @@ class Response(object):
     :ivar transport:
         Protocol-level transport headers. These are used for routing over
         Hyperbahn.
+
+    :ivar timings:
+        :py:class:`tchannel.metrics.Timings` of the call that received this
+        response if its TChannel was created with ``timings=True``, or None.
     """
 
     # TODO implement __repr__
@@ -54,15 +58,18 @@ class Response(object):
         'status',
         'headers',
         'transport',
+        'timings',
     )
 
-    def __init__(self, body=None, headers=None, transport=None, status=None):
+    def __init__(self, body=None, headers=None, transport=None, status=None,
+                 timings=None):
         if status is None:
             status = OK
         self.body = body
         self.status = status
         self.headers = headers
         self.transport = transport
+        self.timings = timings
 
 
 class TransportHeaders(object):
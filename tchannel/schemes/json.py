@@ -27,8 +27,9 @@ from opentracing_instrumentation.interceptors import ClientInterceptors
 from tornado import gen
 
 from . import JSON
+from ..caching import ResponseCache
 from ..event import EventType
-from ..serializer.json import JsonSerializer
+from ..metrics import now
 from ..tracing import ClientTracer, TChannelOpenTracingClientInterceptor
 
 
@@ -56,6 +57,9 @@ class JsonArgScheme(object):
         trace=None,
         routing_delegate=None,
         caller_name=None,
+        speculative=None,
+        cache=None,
+        coalesce=None,
     ):
         """Make JSON TChannel Request.
 
@@ -105,10 +109,27 @@ class JsonArgScheme(object):
         :param caller_name:
             Name of the service making the request. Defaults to the name
             provided when the TChannel was instantiated.
+        :param int speculative:
+            Send the request to this many peers at once and use the first
+            successful response. The first peer to start working on the
+            request tells the others to abandon it. Streaming requests and
+            requests with a ``hostport`` are never sent speculatively.
+        :param cache:
+            A :py:class:`tchannel.caching.ResponseCache` to answer this call
+            from. Only use this for idempotent endpoints. Tracing headers are
+            not part of the cache key.
+        :param bool coalesce:
+            Share the request of an identical call that is already in
+            flight. Defaults to the ``coalesce`` argument of the TChannel.
+            See :py:meth:`tchannel.TChannel.call`.
 
         :rtype: Response
         """
 
+        timings = self._tchannel._start_timings(
+            caller_name, service, endpoint
+        )
+
         span, headers = self.tracer.start_span(
             service=service, endpoint=endpoint, headers=headers,
             hostport=hostport, encoding='json'
@@ -127,15 +148,28 @@ class JsonArgScheme(object):
                                     service=service, encoding='json')
 
         # serialize
-        serializer = JsonSerializer()
-        headers = serializer.serialize_header(headers)
+        metrics = self._tchannel._dep_tchannel.metrics
+        if metrics is not None:
+            started = now()
+        serializer = self._tchannel._dep_tchannel._json_serializer
         body = serializer.serialize_body(body)
+        serialized_headers = serializer.serialize_header(headers)
+        if metrics is not None:
+            metrics.outbound(
+                caller_name or self._tchannel.name, service, endpoint,
+            ).serialization_latency.record(now() - started)
+        if timings is not None:
+            timings.mark('serialized')
+
+        cache_key = None
+        if cache is not None or self._tchannel._coalesces(coalesce):
+            cache_key = ResponseCache.key(service, endpoint, headers, body)
 
         response = yield self._tchannel.call(
             scheme=self.NAME,
             service=service,
             arg1=endpoint,
-            arg2=headers,
+            arg2=serialized_headers,
             arg3=body,
             timeout=timeout,
             retry_on=retry_on,
@@ -146,15 +180,22 @@ class JsonArgScheme(object):
             tracing_span=span,  # span is finished in PeerClientOperation.send
             routing_delegate=routing_delegate,
             caller_name=caller_name,
+            speculative=speculative,
+            cache=cache,
+            cache_key=cache_key,
+            coalesce=coalesce,
+            timings=timings,
         )
 
         # deserialize
         response.headers = serializer.deserialize_header(response.headers)
         response.body = serializer.deserialize_body(response.body)
 
+        if timings is not None:
+            timings.mark('decoded')
         raise gen.Return(response)
 
-    def register(self, endpoint, **kwargs):
+    def register(self, endpoint=None, **kwargs):
 
         if callable(endpoint):
             handler = endpoint
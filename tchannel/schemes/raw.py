@@ -51,6 +51,9 @@ class RawArgScheme(object):
         trace=None,
         routing_delegate=None,
         caller_name=None,
+        speculative=None,
+        cache=None,
+        coalesce=None,
     ):
         """Make a raw TChannel request.
 
@@ -103,6 +106,18 @@ class RawArgScheme(object):
         :param caller_name:
             Name of the service making the request. Defaults to the name
             provided when the TChannel was instantiated.
+        :param int speculative:
+            Send the request to this many peers at once and use the first
+            successful response. The first peer to start working on the
+            request tells the others to abandon it. Streaming requests and
+            requests with a ``hostport`` are never sent speculatively.
+        :param cache:
+            A :py:class:`tchannel.caching.ResponseCache` to answer this call
+            from. Only use this for idempotent endpoints.
+        :param bool coalesce:
+            Share the request of an identical call that is already in
+            flight. Defaults to the ``coalesce`` argument of the TChannel.
+            See :py:meth:`tchannel.TChannel.call`.
 
         :rtype: Response
         """
@@ -126,11 +141,14 @@ class RawArgScheme(object):
             trace=trace,
             routing_delegate=routing_delegate,
             caller_name=caller_name,
+            speculative=speculative,
+            cache=cache,
+            coalesce=coalesce,
         )
 
         raise gen.Return(response)
 
-    def register(self, endpoint, **kwargs):
+    def register(self, endpoint=None, **kwargs):
 
         # no args, eg - server.raw.register
         if callable(endpoint):
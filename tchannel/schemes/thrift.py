@@ -28,7 +28,9 @@ from tornado import gen
 
 from tchannel.tracing import (
     ClientTracer, TChannelOpenTracingClientInterceptor)
+from ..caching import ResponseCache
 from ..event import EventType
+from ..metrics import now
 from . import THRIFT
 
 
@@ -85,6 +87,10 @@ class ThriftArgScheme(object):
         hostport=None,
         routing_delegate=None,
         caller_name=None,
+        speculative=None,
+        lazy=False,
+        cache=None,
+        coalesce=None,
     ):
         """Make a Thrift TChannel request.
 
@@ -127,12 +133,36 @@ class ThriftArgScheme(object):
         :param caller_name:
             Name of the service making the request. Defaults to the name
             provided when the TChannel was instantiated.
+        :param int speculative:
+            Send the request to this many peers at once and use the first
+            successful response. The first peer to start working on the
+            request tells the others to abandon it. Streaming requests and
+            requests with a ``hostport`` are never sent speculatively.
+        :param bool lazy:
+            Decode the response body on demand. If the call returns a
+            struct, the response body is a
+            :py:class:`tchannel.serializer.thrift.LazyStruct` that decodes
+            each field the first time it is read. This saves time and memory
+            for large responses of which only a few fields are used.
+            Thrift exceptions are still decoded and raised right away.
+        :param cache:
+            A :py:class:`tchannel.caching.ResponseCache` to answer this call
+            from. Only use this for idempotent endpoints. Tracing headers are
+            not part of the cache key.
+        :param bool coalesce:
+            Share the request of an identical call that is already in
+            flight. Defaults to the ``coalesce`` argument of the TChannel.
+            See :py:meth:`tchannel.TChannel.call`.
 
         :rtype: Response
         """
         if not headers:
             headers = {}
 
+        timings = self._tchannel._start_timings(
+            caller_name, request.service, request.endpoint
+        )
+
         span, headers = self.tracer.start_span(
             service=request.service, endpoint=request.endpoint,
             headers=headers, hostport=hostport, encoding='thrift'
@@ -150,24 +180,40 @@ class ThriftArgScheme(object):
                 interceptor.process(span=span, headers=headers,
                                     service=request.service, encoding='thrift')
 
-        serializer = request.get_serializer()
         # serialize
+        metrics = self._tchannel._dep_tchannel.metrics
+        if metrics is not None:
+            started = now()
+        serializer = request.get_serializer()
+        body = serializer.serialize_body(request.call_args)
         try:
-            headers = serializer.serialize_header(headers=headers)
+            serialized_headers = serializer.serialize_header(headers=headers)
         except (AttributeError, TypeError):
             raise ValueError(
                 'headers must be a map[string]string (a shallow dict'
                 ' where keys and values are strings)'
             )
-
-        body = serializer.serialize_body(request.call_args)
+        if metrics is not None:
+            metrics.outbound(
+                caller_name or self._tchannel.name,
+                request.service,
+                request.endpoint,
+            ).serialization_latency.record(now() - started)
+        if timings is not None:
+            timings.mark('serialized')
+
+        cache_key = None
+        if cache is not None or self._tchannel._coalesces(coalesce):
+            cache_key = ResponseCache.key(
+                request.service, request.endpoint, headers, body
+            )
 
         # TODO There's only one yield. Drop in favor of future+callback.
         response = yield self._tchannel.call(
             scheme=self.NAME,
             service=request.service,
             arg1=request.endpoint,
-            arg2=headers,
+            arg2=serialized_headers,
             arg3=body,
             timeout=timeout,
             retry_on=retry_on,
@@ -178,16 +224,93 @@ class ThriftArgScheme(object):
             tracing_span=span,  # span is finished in PeerClientOperation.send
             routing_delegate=routing_delegate,
             caller_name=caller_name,
+            speculative=speculative,
+            cache=cache,
+            cache_key=cache_key,
+            coalesce=coalesce,
+            timings=timings,
         )
 
         response.headers = serializer.deserialize_header(
             headers=response.headers
         )
-        body = serializer.deserialize_body(body=response.body)
+        body = serializer.deserialize_body(body=response.body, lazy=lazy)
 
         response.body = request.read_body(body)
+        if timings is not None:
+            timings.mark('decoded')
         raise gen.Return(response)
 
+    def batch(
+        self,
+        window=None,
+        envelope=False,
+        timeout=None,
+        retry_on=None,
+        retry_limit=None,
+        hostport=None,
+        shard_key=None,
+        trace=None,
+        routing_delegate=None,
+        caller_name=None,
+    ):
+        """Make many Thrift calls together.
+
+        Calls added to the returned :py:class:`tchannel.thrift.batch.Batch`
+        are sent when it is flushed, with their frames pipelined into as few
+        writes as possible. Each call gets its own Future.
+
+        .. code-block:: python
+
+            with tchannel.thrift.batch(envelope=True) as batch:
+                futures = [batch(KeyValue.getValue(key)) for key in keys]
+            responses = yield futures
+
+        :param float window:
+            If set, calls are sent this many seconds after the first call
+            added to the batch instead of when the ``with`` block exits or
+            ``flush()`` is called.
+        :param bool envelope:
+            Combine calls to the same service and endpoint into a single
+            request. Only use this with servers that called
+            :py:meth:`register_batch_endpoint`.
+
+        The remaining arguments apply to every call in the batch and are the
+        same as those of ``__call__``.
+
+        :rtype: tchannel.thrift.batch.Batch
+        """
+        # dat circular import
+        from tchannel.thrift.batch import Batch
+
+        return Batch(
+            self,
+            window=window,
+            envelope=envelope,
+            timeout=timeout,
+            retry_on=retry_on,
+            retry_limit=retry_limit,
+            hostport=hostport,
+            shard_key=shard_key,
+            trace=trace,
+            routing_delegate=routing_delegate,
+            caller_name=caller_name,
+        )
+
+    def register_batch_endpoint(self):
+        """Accept batches of calls sent with ``batch(envelope=True)``.
+
+        The Thrift calls in a batch are handled concurrently by the
+        endpoints registered on this TChannel.
+        """
+        # dat circular import
+        from tchannel.thrift.batch import BATCH_ENDPOINT
+        from tchannel.thrift.batch import build_batch_handler
+
+        self._tchannel.raw.register(BATCH_ENDPOINT)(
+            build_batch_handler(self._tchannel._dep_tchannel._handler)
+        )
+
     def register(self, thrift_module, **kwargs):
         # dat circular import
         from tchannel.thrift import rw as thriftrw
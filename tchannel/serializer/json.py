@@ -21,14 +21,228 @@
 from __future__ import absolute_import
 
 import json
+import math
+import sys
+from collections import OrderedDict
 
 from tchannel.schemes import JSON
 import six
 
+__all__ = ['JsonCodec', 'JsonSerializer', 'get_codec', 'register_codec']
+
+
+class JsonCodec(object):
+    """Encodes and decodes JSON with a specific library.
+
+    :ivar name:
+        Name under which the codec is registered.
+    :ivar dumps:
+        Function that serializes an object into JSON bytes.
+    :ivar loads:
+        Function that deserializes JSON bytes into an object.
+    """
+
+    __slots__ = ('name', 'dumps', 'loads')
+
+    def __init__(self, name, dumps, loads):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self):
+        return '<JsonCodec %s>' % self.name
+
+
+# Registered codecs, by name.
+_codecs = OrderedDict()
+
+# Codecs used by default, in order of preference, if they are installed.
+PREFERRED_CODECS = ('orjson', 'ujson', 'rapidjson', 'json')
+
+
+def register_codec(codec):
+    """Register a JSON codec so that it can be selected by name.
+
+    :param JsonCodec codec:
+        Codec to register. Replaces any codec with the same name.
+    """
+    _codecs[codec.name] = codec
+
+
+def get_codec(codec=None):
+    """Get a JSON codec.
+
+    :param codec:
+        A :py:class:`JsonCodec`, the name of a registered codec, or None for
+        the fastest installed codec.
+    :raises ValueError:
+        If no codec with the given name has been registered.
+    """
+    if isinstance(codec, JsonCodec):
+        return codec
+
+    if codec is None:
+        for name in PREFERRED_CODECS:
+            if name in _codecs:
+                return _codecs[name]
+
+    try:
+        return _codecs[codec]
+    except KeyError:
+        raise ValueError(
+            'Unknown JSON codec %r. Registered codecs: %s'
+            % (codec, ', '.join(_codecs))
+        )
+
+
+def _stdlib_codec():
+    # Before Python 3.6, json.loads only accepts text.
+    decode = six.PY3 and sys.version_info < (3, 6)
+
+    def dumps(obj):
+        s = json.dumps(obj)
+        if isinstance(s, six.text_type):
+            s = s.encode('utf8')
+        return s
+
+    def loads(s):
+        if decode and isinstance(s, bytes):
+            s = s.decode('utf8')
+        return json.loads(s)
+
+    return JsonCodec('json', dumps, loads)
+
+
+_STDLIB_CODEC = _stdlib_codec()
+
+
+def _has_float(obj, predicate):
+    """Whether ``obj`` contains a float for which ``predicate`` is true."""
+    if isinstance(obj, float):
+        return predicate(obj)
+    if isinstance(obj, dict):
+        return any(
+            _has_float(k, predicate) or _has_float(v, predicate)
+            for k, v in six.iteritems(obj)
+        )
+    if isinstance(obj, (list, tuple)):
+        return any(_has_float(v, predicate) for v in obj)
+    return False
+
+
+def _is_non_finite(f):
+    return math.isinf(f) or math.isnan(f)
+
+
+def _is_long_integer(f):
+    # Integers outside the 64-bit range come back as floats. Integral floats
+    # as large as that in the document are parsed the same way by the
+    # stdlib, so falling back for them is harmless.
+    return f.is_integer() and abs(f) >= 2 ** 63
+
+
+def _fast_codec(name, dumps, loads, nulls_non_finite=False,
+                floats_long_integers=False):
+    """Build a codec that falls back to the stdlib for values the library
+    handles differently, so that the choice of codec doesn't change what a
+    call sends or receives.
+
+    Objects the library can't serialize, such as integers outside the 64-bit
+    range, and documents it can't parse, such as ones with ``NaN``, are
+    handled by the stdlib.
+
+    :param nulls_non_finite:
+        Whether the library serializes infinite and NaN floats as ``null``.
+    :param floats_long_integers:
+        Whether the library parses integers outside the 64-bit range as
+        floats.
+    """
+
+    def safe_dumps(obj):
+        try:
+            s = dumps(obj)
+        except (TypeError, OverflowError, ValueError):
+            return _STDLIB_CODEC.dumps(obj)
+        if nulls_non_finite and b'null' in s and (
+            _has_float(obj, _is_non_finite)
+        ):
+            return _STDLIB_CODEC.dumps(obj)
+        return s
+
+    def safe_loads(s):
+        try:
+            obj = loads(s)
+        except ValueError:
+            return _STDLIB_CODEC.loads(s)
+        if floats_long_integers and _has_float(obj, _is_long_integer):
+            return _STDLIB_CODEC.loads(s)
+        return obj
+
+    return JsonCodec(name, safe_dumps, safe_loads)
+
+
+def _orjson_codec():
+    import orjson
+
+    # Like the stdlib, accept dicts with non-string keys.
+    option = getattr(orjson, 'OPT_NON_STR_KEYS', 0)
+
+    def dumps(obj):
+        return orjson.dumps(obj, option=option)
+
+    return _fast_codec(
+        'orjson', dumps, orjson.loads,
+        nulls_non_finite=True,
+        floats_long_integers=True,
+    )
+
+
+def _ujson_codec():
+    import ujson
+
+    def dumps(obj):
+        return ujson.dumps(obj).encode('utf8')
+
+    return _fast_codec('ujson', dumps, ujson.loads)
+
+
+def _rapidjson_codec():
+    import rapidjson
+
+    # Like the stdlib, accept dicts with non-string keys.
+    kwargs = {}
+    if hasattr(rapidjson, 'MM_COERCE_KEYS_TO_STRINGS'):
+        kwargs['mapping_mode'] = rapidjson.MM_COERCE_KEYS_TO_STRINGS
+
+    def dumps(obj):
+        return rapidjson.dumps(obj, **kwargs).encode('utf8')
+
+    return _fast_codec('rapidjson', dumps, rapidjson.loads)
+
+
+register_codec(_STDLIB_CODEC)
+for _make_codec in (_orjson_codec, _ujson_codec, _rapidjson_codec):
+    try:
+        register_codec(_make_codec())
+    except ImportError:
+        pass
+
 
 class JsonSerializer(object):
+    """Serializes JSON arguments with a :py:class:`JsonCodec`.
+
+    Serializers are stateless and may be shared between requests.
+
+    :param codec:
+        Codec or name of the codec to use. Defaults to the fastest installed
+        codec.
+    """
+
     name = JSON
 
+    def __init__(self, codec=None):
+        self.codec = get_codec(codec)
+
     def serialize_header(self, headers):
         headers = headers or {}
 
@@ -40,23 +254,19 @@ class JsonSerializer(object):
                     'where keys and values are strings)'
                 )
 
-        return json.dumps(headers)
+        return self.codec.dumps(headers)
 
     def deserialize_header(self, headers):
         if not headers:
             return {}
-        if six.PY3 and isinstance(headers, bytes):
-            headers = headers.decode('utf8')
-        return json.loads(headers)
+        return self.codec.loads(headers)
 
     def deserialize_body(self, obj):
-        if six.PY3 and isinstance(obj, bytes):
-            obj = obj.decode('utf8')
         if not obj:
             return {}
-        return json.loads(obj)
+        return self.codec.loads(obj)
 
     def serialize_body(self, obj):
         if six.PY3 and isinstance(obj, bytes):
             obj = obj.decode('utf8')
-        return json.dumps(obj)
+        return self.codec.dumps(obj)
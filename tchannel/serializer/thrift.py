@@ -22,42 +22,333 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
+import struct
+from collections import OrderedDict
+
 import six
+from thriftrw.protocol import BinaryProtocol
+from thriftrw.spec import StructTypeSpec
 
 from tchannel.schemes import THRIFT
 
-from .. import io
-from .. import rw
+from ..errors import ReadError
 
+# Number of header blocks and keys remembered by a HeaderCodec.
+DEFAULT_CACHE_SIZE = 256
 
-class ThriftSerializer(object):
+# Larger header blocks are encoded and decoded every time.
+MAX_CACHED_BLOCK_SIZE = 1024
+
+_uint16 = struct.Struct('>H')
+_int16 = struct.Struct('>h')
+_int32 = struct.Struct('>i')
+
+# Thrift type codes used by the binary protocol.
+_STOP = 0
+_BINARY = 11
+_STRUCT = 12
+_MAP = 13
+_SET = 14
+_LIST = 15
+
+# Encoded size of fixed-width values, keyed by type code.
+_FIXED_WIDTHS = {
+    2: 1,   # bool
+    3: 1,   # byte
+    4: 8,   # double
+    6: 2,   # i16
+    8: 4,   # i32
+    10: 8,  # i64
+}
+
+_protocol = BinaryProtocol()
+
+
+def _to_bytes(s):
+    if isinstance(s, six.text_type):
+        return s.encode('utf-8')
+    return s
+
+
+class HeaderCodec(object):
+    """Encodes and decodes Thrift application headers.
+
+    Headers are laid out as ``nh:2 (k~2 v~2){nh}``. The length-prefixed form
+    of each key is computed once and reused. Recently seen header blocks are
+    kept in an LRU cache so that identical headers skip encoding and decoding
+    altogether.
+    """
+
+    __slots__ = ('max_size', '_prefixes', '_encoded', '_decoded')
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._prefixes = {}
+        self._encoded = OrderedDict()
+        self._decoded = OrderedDict()
+
+    def encode(self, headers):
+        """Encode a dictionary or a list of pairs of headers."""
+        if not headers:
+            return b'\x00\x00'
+
+        if isinstance(headers, dict):
+            items = tuple(headers.items())
+        else:
+            items = tuple(map(tuple, headers))
+
+        encoded = self._encoded.pop(items, None)
+        if encoded is not None:
+            self._encoded[items] = encoded
+            return encoded
+
+        parts = [_uint16.pack(len(items))]
+        for key, value in items:
+            parts.append(self._prefix(key))
+            value = _to_bytes(value)
+            parts.append(_uint16.pack(len(value)))
+            parts.append(value)
+        encoded = b''.join(parts)
+
+        if len(encoded) <= MAX_CACHED_BLOCK_SIZE:
+            self._remember(self._encoded, items, encoded)
+        return encoded
+
+    def decode(self, data):
+        """Decode a block of headers into a dictionary.
+
+        :raises ReadError:
+            If the block is truncated.
+        """
+        if not data:
+            return {}
+
+        if isinstance(data, six.text_type):
+            data = data.encode('utf8')
+        elif not isinstance(data, bytes):
+            data = bytes(data)
+
+        headers = self._decoded.pop(data, None)
+        if headers is not None:
+            self._decoded[data] = headers
+            # Callers are free to modify the result.
+            return dict(headers)
+
+        headers = {}
+        count, offset = self._read_length(data, 0)
+        for _ in range(count):
+            key, offset = self._read_string(data, offset)
+            value, offset = self._read_string(data, offset)
+            headers[key] = value
+
+        if len(data) <= MAX_CACHED_BLOCK_SIZE:
+            self._remember(self._decoded, data, dict(headers))
+        return headers
+
+    def _prefix(self, key):
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            encoded = _to_bytes(key)
+            prefix = _uint16.pack(len(encoded)) + encoded
+            if len(self._prefixes) < self.max_size:
+                self._prefixes[key] = prefix
+        return prefix
+
+    def _remember(self, cache, key, value):
+        cache[key] = value
+        if len(cache) > self.max_size:
+            cache.popitem(last=False)
+
+    @staticmethod
+    def _read_length(data, offset):
+        end = offset + 2
+        if end > len(data):
+            raise ReadError(
+                "Expected 2 bytes but got %d bytes." % (len(data) - offset)
+            )
+        return _uint16.unpack_from(data, offset)[0], end
+
+    @classmethod
+    def _read_string(cls, data, offset):
+        length, offset = cls._read_length(data, offset)
+        s = data[offset:offset + length]
+        if len(s) != length:
+            raise ReadError(
+                "Expected %d bytes but got %d bytes." % (length, len(s))
+            )
+        return s.decode('utf-8'), offset + length
+
+
+# Shared by all serializers so that they share the cache.
+_header_codec = HeaderCodec()
 
-    name = THRIFT
 
-    _headers_rw = rw.headers(
-        rw.number(2),
-        rw.len_prefixed_string(rw.number(2)),
-        rw.len_prefixed_string(rw.number(2)),
+def _skip(data, ttype, offset):
+    """Returns the offset just past the value of type ``ttype``."""
+    width = _FIXED_WIDTHS.get(ttype)
+    if width is not None:
+        return offset + width
+
+    if ttype == _BINARY:
+        return offset + 4 + _read_size(data, offset)
+
+    if ttype == _STRUCT:
+        while True:
+            field_type = six.indexbytes(data, offset)
+            if field_type == _STOP:
+                return offset + 1
+            offset = _skip(data, field_type, offset + 3)
+
+    if ttype == _MAP:
+        ktype = six.indexbytes(data, offset)
+        vtype = six.indexbytes(data, offset + 1)
+        size = _read_size(data, offset + 2)
+        offset += 6
+        if ktype in _FIXED_WIDTHS and vtype in _FIXED_WIDTHS:
+            width = _FIXED_WIDTHS[ktype] + _FIXED_WIDTHS[vtype]
+            return offset + size * width
+        for _ in six.moves.range(size):
+            offset = _skip(data, vtype, _skip(data, ktype, offset))
+        return offset
+
+    if ttype in (_SET, _LIST):
+        vtype = six.indexbytes(data, offset)
+        size = _read_size(data, offset + 1)
+        offset += 5
+        if vtype in _FIXED_WIDTHS:
+            return offset + size * _FIXED_WIDTHS[vtype]
+        for _ in six.moves.range(size):
+            offset = _skip(data, vtype, offset)
+        return offset
+
+    raise ReadError("Unknown Thrift type %d." % ttype)
+
+
+def _read_size(data, offset):
+    (size,) = _int32.unpack_from(data, offset)
+    if size < 0:
+        raise ReadError("Negative size %d." % size)
+    return size
+
+
+class LazyStruct(object):
+    """Read-only view of an encoded Thrift struct.
+
+    Nothing is decoded up front. Reading an attribute skips over the encoded
+    fields that precede it, recording where each one starts and ends, and
+    decodes only the requested field. The result is remembered. Fields that
+    are themselves structs are returned as ``LazyStruct`` views over the same
+    buffer, so nested data that is never touched is never decoded.
+
+    Missing required fields are reported when they are read rather than
+    when the response is received. Use :py:meth:`materialize` to decode
+    and validate the whole struct.
+    """
+
+    __slots__ = (
+        '_spec', '_data', '_start', '_end', '_offset', '_fields', '_values',
     )
 
+    def __init__(self, spec, data, start=0, end=None):
+        self._spec = spec
+        self._data = data
+        self._start = start
+        self._end = len(data) if end is None else end
+        # Where to continue looking for fields, or None once the end of
+        # the struct has been reached.
+        self._offset = start
+        self._fields = {}
+        self._values = {}
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+
+        for field in self._spec.fields:
+            if field.name == name:
+                break
+        else:
+            raise AttributeError(
+                "'%s' has no field '%s'" % (self._spec.name, name)
+            )
+
+        position = self._find(field.id)
+        if position is None or position[0] != field.spec.ttype_code:
+            # thriftrw ignores fields with an unexpected type too.
+            if field.required:
+                raise TypeError(
+                    "Field '%s' of '%s' is required but was not set."
+                    % (name, self._spec.name)
+                )
+            value = field.default_value
+        else:
+            value = self._decode(field.spec, *position)
+
+        self._values[name] = value
+        return value
+
+    def __repr__(self):
+        return 'LazyStruct(%s)' % self._spec.name
+
+    def materialize(self):
+        """Decode the whole struct.
+
+        :returns:
+            An instance of the class generated by thriftrw for this struct.
+        """
+        return self._decode(self._spec, _STRUCT, self._start, self._end,
+                            lazy=False)
+
+    def _decode(self, spec, ttype, start, end, lazy=True):
+        if lazy and type(spec) is StructTypeSpec:
+            return LazyStruct(spec, self._data, start, end)
+        value = _protocol.deserialize_value(ttype, self._data[start:end])
+        return spec.from_wire(value)
+
+    def _find(self, field_id):
+        # Fields are usually written in order, so only skip as far as the
+        # requested field. Fields after it are left untouched.
+        position = self._fields.get(field_id)
+        data, offset, end = self._data, self._offset, self._end
+        try:
+            while position is None and offset is not None:
+                ttype = six.indexbytes(data, offset)
+                if ttype == _STOP:
+                    offset = None
+                    break
+                (next_id,) = _int16.unpack_from(data, offset + 1)
+                start = offset + 3
+                offset = _skip(data, ttype, start)
+                if offset > end:
+                    raise IndexError()
+                self._fields[next_id] = (ttype, start, offset)
+                if next_id == field_id:
+                    position = self._fields[next_id]
+        except (IndexError, struct.error):
+            raise ReadError(
+                "Unexpected end of input while reading '%s'." % self._spec.name
+            )
+        self._offset = offset
+        return position
+
+
+class ThriftSerializer(object):
+
+    name = THRIFT
+
     def __init__(self, deserialize_type):
         self.deserialize_type = deserialize_type
 
     def serialize_header(self, headers):
-        headers = headers or {}
-        result = self._headers_rw.write(headers, io.BytesIO()).getvalue()
-        return result
+        return _header_codec.encode(headers)
 
     def deserialize_header(self, headers):
-        headers = headers or {}
-        if headers:
-            if six.PY3 and isinstance(headers, str):
-                headers = headers.encode('utf8')
-            headers = io.BytesIO(headers)
-            headers = self._headers_rw.read(headers)
-        result = dict(headers)
-
-        return result
+        return _header_codec.decode(headers)
 
     def serialize_body(self, call_args):
 
@@ -79,7 +370,8 @@ class ThriftSerializer(object):
 
         return result
 
-    def deserialize_body(self, body):
+    def deserialize_body(self, body, lazy=False):
+        # Structs generated by Apache Thrift are always decoded eagerly.
         from thrift.protocol import TBinaryProtocol
         from thrift.transport import TTransport
         trans = TTransport.TMemoryBuffer(body)
@@ -105,7 +397,9 @@ class ThriftRWSerializer(ThriftSerializer):
     def serialize_body(self, obj):
         return self.module.dumps(obj)
 
-    def deserialize_body(self, body):
+    def deserialize_body(self, body, lazy=False):
         if six.PY3 and isinstance(body, str):
             body = body.encode('utf8', errors='surrogateescape')
+        if lazy:
+            return LazyStruct(self.deserialize_type.type_spec, body)
         return self.module.loads(self.deserialize_type, body)
@@ -24,6 +24,7 @@ import re
 
 from .event import EventHook
 from .messages.error import ErrorMessage
+from .metrics import MetricsSink
 from .tornado.response import StatusCode
 
 WILDCHAR_REXP = re.compile(r'[{}/\\:\s.]+')
@@ -92,6 +93,53 @@ class StatsdHook(EventHook):
         self._statsd.count(key, 1)
 
 
+class StatsdSink(MetricsSink):
+    """Report metrics to StatsD.
+
+    Counters are sent as counts, gauges as gauges and histograms as timings
+    of their percentiles in milliseconds. Keys follow
+    :py:class:`tchannel.statsd.StatsdHook`, e.g.
+    ``tchannel.outbound.calls.latency.<caller>.<service>.<endpoint>`` with
+    ``.p99`` appended for timings.
+
+    :param statsd:
+        StatsD client with ``count``, ``gauge`` and ``timing`` methods.
+    :param prefix:
+        Prefix of all keys.
+    :param percentiles:
+        Percentiles of histograms to report.
+    """
+
+    _TAG_FIELDS = ('service', 'target-service', 'target-endpoint')
+
+    def __init__(self, statsd, prefix='tchannel', percentiles=(50, 95, 99)):
+        self._statsd = statsd
+        self._prefix = prefix
+        self._percentiles = percentiles
+        self._keys = {}
+
+    def _key(self, metric):
+        key = self._keys.get((metric.name, metric.tags))
+        if key is None:
+            parts = [self._prefix, metric.name]
+            for value, field in zip(metric.tags, self._TAG_FIELDS):
+                parts.append(clean(value, field))
+            key = self._keys[(metric.name, metric.tags)] = '.'.join(parts)
+        return key
+
+    def report(self, counters, histograms, gauges=()):
+        for counter in counters:
+            self._statsd.count(self._key(counter), counter.value)
+        for gauge in gauges:
+            self._statsd.gauge(self._key(gauge), gauge.value)
+        for histogram in histograms:
+            key = self._key(histogram)
+            for q in self._percentiles:
+                self._statsd.timing(
+                    '%s.p%s' % (key, q), histogram.percentile(q) * 1000
+                )
+
+
 def extract_metadata(request):
     service = request.headers.get('cn', None)
     target_service = request.service
@@ -0,0 +1,208 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Handlers that stream requests and responses instead of buffering them.
+
+Endpoints registered with ``streaming=True`` are called with a
+:py:class:`StreamingRequest` and a :py:class:`StreamingResponse`. The request
+headers and body are read chunk by chunk as they arrive, and the response is
+written incrementally. Writes resolve only once the peer has caught up, so a
+handler can proxy large payloads without holding them in memory.
+
+.. code-block:: python
+
+    @tchannel.raw.register(streaming=True)
+    @gen.coroutine
+    def echo(request, response):
+        chunk = yield request.body.read()
+        while chunk:
+            yield response.write_body(chunk)
+            chunk = yield request.body.read()
+
+Only the raw arg scheme supports streaming.
+
+Large files can be sent without reading them into memory by passing a
+:py:class:`FileStream` as the body of a raw request, and received straight to
+disk with :py:meth:`ArgReader.read_into` and a :py:class:`FileSink`.
+
+.. code-block:: python
+
+    yield tchannel.raw('artifacts', 'upload', body=FileStream(path))
+
+    @tchannel.raw.register(streaming=True)
+    @gen.coroutine
+    def upload(request, response):
+        yield request.body.read_into(FileSink(path))
+"""
+
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import six
+from tornado import gen
+
+from .messages import common
+from .tornado.stream import FileSink
+from .tornado.stream import FileStream
+from .tornado.stream import read_full
+
+__all__ = [
+    'ArgReader',
+    'FileSink',
+    'FileStream',
+    'StreamingRequest',
+    'StreamingResponse',
+]
+
+# Number of bytes a streaming response buffers before writes block.
+DEFAULT_BUFFER_SIZE = 4 * common.MAX_PAYLOAD_SIZE
+
+
+class ArgReader(object):
+    """Reads an argument of a streaming request chunk by chunk."""
+
+    __slots__ = ('_stream',)
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    @gen.coroutine
+    def read(self):
+        """Read the next chunk of the argument.
+
+        :returns:
+            A future containing the next chunk of bytes, or ``b''`` once the
+            whole argument has been read.
+        """
+        chunk = yield self._stream.read()
+        if isinstance(chunk, six.text_type):
+            chunk = chunk.encode('utf-8')
+        raise gen.Return(chunk)
+
+    def read_all(self):
+        """Read the rest of the argument into memory.
+
+        :returns:
+            A future containing the remaining bytes.
+        """
+        return read_full(self._stream)
+
+    @gen.coroutine
+    def read_into(self, sink):
+        """Write the rest of the argument to another stream.
+
+        The sink is closed once the whole argument has been written.
+
+        :param sink:
+            Stream to write to, e.g. a :py:class:`FileSink`.
+        :returns:
+            A future containing the number of bytes written.
+        """
+        size = 0
+        try:
+            chunk = yield self.read()
+            while chunk:
+                size += len(chunk)
+                yield sink.write(chunk)
+                chunk = yield self.read()
+        finally:
+            sink.close()
+        raise gen.Return(size)
+
+
+class StreamingRequest(object):
+    """A request to a streaming handler.
+
+    :ivar headers:
+        :py:class:`ArgReader` for the application headers.
+
+    :ivar body:
+        :py:class:`ArgReader` for the payload.
+
+    :ivar transport:
+        Protocol-level transport headers.
+
+    :ivar cancel_token:
+        :py:class:`tchannel.cancellation.CancellationToken` that is triggered
+        if the caller stops waiting for the response.
+    """
+
+    __slots__ = (
+        'headers',
+        'body',
+        'transport',
+        'endpoint',
+        'service',
+        'timeout',
+        'cancel_token',
+    )
+
+    def __init__(self, headers, body, transport=None, endpoint=None,
+                 service=None, timeout=None, cancel_token=None):
+        self.headers = headers
+        self.body = body
+        self.transport = transport
+        self.endpoint = endpoint
+        self.service = service
+        self.timeout = timeout
+        self.cancel_token = cancel_token
+
+
+class StreamingResponse(object):
+    """Writes the response of a streaming handler.
+
+    The headers must be written before the body. Once the body has been
+    started, the headers can no longer be changed. The response is finished
+    when the handler returns.
+    """
+
+    __slots__ = ('_response',)
+
+    def __init__(self, response):
+        self._response = response
+
+    @property
+    def status(self):
+        """Status of the response.
+
+        This must be set before anything is written.
+        """
+        return self._response.code
+
+    @status.setter
+    def status(self, status):
+        self._response.code = status
+
+    def write_header(self, chunk):
+        """Write a chunk of the application headers.
+
+        :returns:
+            A future that resolves when it's safe to write more.
+        """
+        return self._response.write_header(chunk)
+
+    def write_body(self, chunk):
+        """Write a chunk of the payload.
+
+        :returns:
+            A future that resolves when it's safe to write more.
+        """
+        return self._response.write_body(chunk)
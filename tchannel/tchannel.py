@@ -22,31 +22,65 @@ from __future__ import (
     absolute_import, division, print_function, unicode_literals
 )
 
+import functools
 import json
 import logging
 
+from collections import namedtuple
+from datetime import timedelta
 from threading import Lock
 
 from tornado import gen
 
+from . import profiling
 from . import schemes
 from . import transport
 from . import retry
+from . import telemetry
 from . import tracing
+from .caching import ResponseCache
 from .errors import AlreadyListeningError, ServiceNameIsRequiredError
+from .errors import BadRequestError
+from .errors import TChannelError, TimeoutError
+from .event import EventType
 from .glossary import DEFAULT_TIMEOUT
-from .health import health
-from .health import Meta
+from .metrics import Timings
 from .response import Response, TransportHeaders
+from .status import OK
 from .tornado import TChannel as DeprecatedTChannel
 from .tornado.dispatch import RequestDispatcher as DeprecatedDispatcher
+from .telemetry import LoopMonitor
 from .tracing import TracingContextProvider
 
 log = logging.getLogger('tchannel')
 
+
 __all__ = ['TChannel']
 
 
+def _cached_size(response):
+    # Responses for application errors aren't cached.
+    if response.status != OK:
+        return None
+    return len(response.body) + len(response.headers)
+
+
+def _copy_response(response, timings=None):
+    # Callers deserialize responses in place, so give each its own.
+    return Response(
+        body=response.body,
+        headers=response.headers,
+        transport=response.transport,
+        status=response.status,
+        timings=timings,
+    )
+
+
+#: A request in flight that identical calls with at most the same
+#: ``timeout`` may share.
+_Flight = namedtuple('_Flight', 'future timeout')
+
+
 class TChannel(object):
     """Manages connections and requests to other TChannel services.
 
@@ -85,7 +119,9 @@ class TChannel(object):
 
     def __init__(self, name, hostport=None, process_name=None,
                  known_peers=None, trace=True, reuse_port=False,
-                 context_provider=None, tracer=None):
+                 context_provider=None, tracer=None, json_codec=None,
+                 coalesce=False, metrics=None, timings=False,
+                 loop_monitor=False, debug_endpoints=False, capture=None):
         """
         **Note:** In general only one ``TChannel`` instance should be used at a
         time. Multiple ``TChannel`` instances are not advisable and could
@@ -100,6 +136,51 @@ class TChannel(object):
             An optional host/port to serve on, e.g., ``"127.0.0.1:5555``. If
             not provided an ephemeral port will be used. When advertising on
             Hyperbahn you callers do not need to know your port.
+
+        :param json_codec:
+            Name of the JSON codec to use for JSON requests and endpoints
+            (``"orjson"``, ``"ujson"``, ``"rapidjson"`` or ``"json"``), or a
+            :py:class:`tchannel.serializer.json.JsonCodec`. Defaults to the
+            fastest installed codec. Individual JSON endpoints may override
+            this with ``json_codec`` when they are registered.
+
+        :param bool coalesce:
+            Default for the ``coalesce`` argument of :py:meth:`call` and the
+            arg schemes.
+
+        :param metrics:
+            A :py:class:`tchannel.metrics.MetricsRegistry` that records
+            counters and latency histograms of calls made and served by this
+            TChannel. Call its ``start`` method to flush them periodically.
+            Totals over all connections, such as the number of frames
+            waiting to be written, are kept in ``connection.*`` gauges.
+
+        :param bool timings:
+            Record when each call reaches each phase, such as being written
+            to the connection or its response being decoded. Responses carry
+            them in ``timings``, and with ``metrics`` the time taken by each
+            phase is recorded in histograms. See
+            :py:class:`tchannel.metrics.Timings`.
+
+        :param loop_monitor:
+            Measure how late the IOLoop runs callbacks. ``True`` measures
+            every half second, a number every that many seconds. See
+            :py:class:`tchannel.telemetry.LoopMonitor`. With ``metrics``, the
+            lag is recorded in the ``loop.lag`` histogram.
+
+        :param bool debug_endpoints:
+            Register the ``tchannel::debug`` JSON endpoint, which returns
+            :py:meth:`snapshot`, and the ``tchannel::profile`` JSON
+            endpoint, which profiles this process on demand. Its body may
+            set the ``seconds`` to profile for (10 by default, at most 60),
+            the ``mode`` and the sampling ``interval``; see
+            :py:func:`tchannel.profiling.profile`.
+
+        :param capture:
+            A :py:class:`tchannel.capture.Capture` that records every frame
+            sent and received on connections opened while it isn't closed.
+            The capture can be replayed against a server with
+            :py:func:`tchannel.capture.replay`.
         """
         if not name:
             raise ServiceNameIsRequiredError
@@ -116,20 +197,47 @@ class TChannel(object):
             tracer=tracer,
             dispatcher=DeprecatedDispatcher(_handler_returns_response=True),
             reuse_port=reuse_port,
+            json_codec=json_codec,
+            metrics=metrics,
+            timings=timings,
+            capture=capture,
             _from_new_api=True,
             context_provider_fn=lambda: self.context_provider,
         )
 
         self.name = name
 
+        # In-flight calls that identical calls may share, by call key.
+        self._coalesce = coalesce
+        self._flights = {}
+
         # set arg schemes
         self.raw = schemes.RawArgScheme(self)
         self.json = schemes.JsonArgScheme(self)
         self.thrift = schemes.ThriftArgScheme(self)
         self._listen_lock = Lock()
-        # register default health endpoint
+        # register default health endpoint. meta.thrift is only loaded when
+        # the first TChannel is created rather than on import.
+        from .health import health, Meta
         self.thrift.register(Meta)(health)
 
+        self.loop_monitor = None
+        if loop_monitor:
+            self.loop_monitor = LoopMonitor(
+                histogram=(
+                    metrics.histogram('loop.lag')
+                    if metrics is not None else None
+                ),
+            )
+            if loop_monitor is not True:
+                self.loop_monitor.interval = loop_monitor
+            self.loop_monitor.start()
+        if metrics is not None:
+            metrics.add_collector(self._collect_metrics)
+        if debug_endpoints:
+            self.json.register('tchannel::debug')(self._debug)
+            self.json.register('tchannel::profile')(self._profile)
+
         # advertise_response is the Future containing the response of calling
         # advertise().
         self._advertise_response = None
@@ -164,12 +272,39 @@ class TChannel(object):
         tracing_span=None,
         trace=None,  # to trace or not, defaults to self._dep_tchannel.trace
         caller_name=None,
+        speculative=None,
+        cache=None,
+        cache_key=None,
+        coalesce=None,
+        timings=None,
     ):
         """Make low-level requests to TChannel services.
 
         **Note:** Usually you would interact with a higher-level arg scheme
         like :py:class:`tchannel.schemes.JsonArgScheme` or
         :py:class:`tchannel.schemes.ThriftArgScheme`.
+
+        :param cache:
+            A :py:class:`tchannel.caching.ResponseCache` to answer this call
+            from, and to store the response in. Only use this for idempotent
+            endpoints. Calls waiting for the response of an identical call
+            still time out after their own ``timeout``; calls with a longer
+            ``timeout`` send their own request.
+        :param bytes cache_key:
+            Key under which the response is cached, and which identifies
+            identical calls for ``coalesce``. Defaults to a digest of
+            ``service``, ``arg1``, ``arg2`` and ``arg3``.
+        :param bool coalesce:
+            Share the request of an identical call that is already in
+            flight instead of sending another one. Calls are identical if
+            they have the same ``cache_key`` and call options. Each caller
+            still times out after its own ``timeout``; calls with a longer
+            ``timeout`` than the request in flight send their own. Defaults
+            to the ``coalesce`` argument of the TChannel.
+        :param timings:
+            :py:class:`tchannel.metrics.Timings` to record the phases of
+            this call in. Started here if the TChannel was created with
+            ``timings=True`` and none is given.
         """
 
         # TODO - don't use asserts for public API
@@ -188,6 +323,80 @@ class TChannel(object):
             retry_on = retry.DEFAULT
         if retry_limit is None:
             retry_limit = retry.DEFAULT_RETRY_LIMIT
+        if timings is None:
+            timings = self._start_timings(caller_name, service, arg1)
+
+        coalesce = self._coalesces(coalesce)
+        if cache is not None or coalesce:
+            # Sends this call without looking it up in the cache or sharing
+            # it with identical calls.
+            send = functools.partial(
+                self.call,
+                scheme=scheme,
+                service=service,
+                arg1=arg1,
+                arg2=arg2,
+                arg3=arg3,
+                timeout=timeout,
+                retry_on=retry_on,
+                retry_limit=retry_limit,
+                routing_delegate=routing_delegate,
+                hostport=hostport,
+                shard_key=shard_key,
+                tracing_span=tracing_span,
+                trace=trace,
+                caller_name=caller_name,
+                speculative=speculative,
+                coalesce=False,
+                timings=timings,
+            )
+
+        if cache is not None:
+            if cache_key is None:
+                cache_key = cache.key(service, arg1, arg2, arg3)
+
+            sent = []
+
+            def fetch():
+                sent.append(True)
+                return send()
+
+            try:
+                response = yield cache.fetch(
+                    cache_key, fetch, _cached_size, timeout=timeout
+                )
+            except gen.TimeoutError:
+                raise TimeoutError(
+                    'Cached request timed out after %s seconds.' % timeout
+                )
+            if sent:
+                yield self._dep_tchannel.event_emitter.fire(
+                    EventType.on_cache_miss, service, arg1
+                )
+            else:
+                if tracing_span is not None:
+                    tracing_span.set_tag('tchannel.cache', 'hit')
+                    tracing_span.finish()
+                yield self._dep_tchannel.event_emitter.fire(
+                    EventType.on_cache_hit, service, arg1
+                )
+
+            raise gen.Return(_copy_response(response, timings))
+
+        if coalesce:
+            if cache_key is None:
+                cache_key = ResponseCache.key(service, arg1, arg2, arg3)
+            response = yield self._coalesce_call(
+                key=(
+                    cache_key, scheme, hostport, shard_key, routing_delegate,
+                    caller_name, retry_on, retry_limit, speculative,
+                ),
+                timeout=timeout,
+                tracing_span=tracing_span,
+                send=send,
+            )
+            response.timings = timings
+            raise gen.Return(response)
 
         # TODO - allow filters/steps for serialization, tracing, etc...
 
@@ -219,21 +428,75 @@ class TChannel(object):
             headers=transport_headers,
             retry_limit=retry_limit,
             ttl=timeout,
+            speculative=speculative,
+            timings=timings,
         )
 
         # unwrap response
-        body = yield response.get_body()
-        headers = yield response.get_header()
+        if response.args is not None:
+            headers, body = response.args[1], response.args[2]
+        else:
+            body = yield response.get_body()
+            headers = yield response.get_header()
         t = TransportHeaders.from_dict(response.headers)
         result = Response(
             body=body,
             headers=headers,
             transport=t,
             status=response.code,
+            timings=timings,
         )
 
         raise gen.Return(result)
 
+    def _start_timings(self, caller_name, service, endpoint):
+        if not self._dep_tchannel.timings:
+            return None
+        metrics = self._dep_tchannel.metrics
+        if metrics is None:
+            return Timings()
+        return Timings(
+            metrics.outbound(caller_name or self.name, service, endpoint)
+        )
+
+    def _coalesces(self, coalesce):
+        if coalesce is None:
+            return self._coalesce
+        return coalesce
+
+    @gen.coroutine
+    def _coalesce_call(self, key, timeout, tracing_span, send):
+        flight = self._flights.get(key)
+
+        # Calls that may wait longer than the request in flight send their
+        # own so that they aren't failed by its timeout.
+        if flight is None or flight.timeout < timeout:
+            flight = _Flight(send(), timeout)
+            self._flights[key] = flight
+
+            def forget(future):
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+            flight.future.add_done_callback(forget)
+            response = yield flight.future
+        else:
+            if tracing_span is not None:
+                tracing_span.set_tag('tchannel.coalesced', True)
+                tracing_span.finish()
+            try:
+                response = yield gen.with_timeout(
+                    timedelta(seconds=timeout),
+                    flight.future,
+                    quiet_exceptions=(TChannelError,),
+                )
+            except gen.TimeoutError:
+                raise TimeoutError(
+                    'Coalesced request timed out after %s seconds.' % timeout
+                )
+
+        raise gen.Return(_copy_response(response))
+
     def listen(self, port=None):
         with self._listen_lock:
             if self._dep_tchannel.is_listening():
@@ -263,8 +526,71 @@ class TChannel(object):
         return self._dep_tchannel.closed
 
     def close(self):
+        if self.loop_monitor is not None:
+            self.loop_monitor.stop()
+        metrics = self._dep_tchannel.metrics
+        if metrics is not None:
+            metrics.remove_collector(self._collect_metrics)
         return self._dep_tchannel.close()
 
+    def snapshot(self):
+        """Get the health of the IOLoop and of every open connection.
+
+        :returns:
+            A dict with this TChannel's ``name`` and ``hostport``, the
+            measurements of its ``loop_monitor`` under ``loop`` (None without
+            one) and :py:meth:`stats` of each open connection under
+            ``connections``.
+        """
+        return {
+            'name': self.name,
+            'hostport': self.hostport,
+            'loop': (
+                self.loop_monitor.snapshot()
+                if self.loop_monitor is not None else None
+            ),
+            'connections': [
+                connection.stats()
+                for connection in telemetry.connections(self._dep_tchannel)
+            ],
+        }
+
+    def _debug(self, request):
+        return self.snapshot()
+
+    @gen.coroutine
+    def _profile(self, request):
+        options = request.body
+        if options is None:
+            options = {}
+        elif not isinstance(options, dict):
+            raise BadRequestError('Profile options must be an object')
+        seconds = options.get('seconds', 10)
+        interval = options.get('interval', 0.005)
+        if not (
+            isinstance(seconds, (int, float)) and
+            0 < seconds <= profiling.MAX_SECONDS
+        ):
+            raise BadRequestError(
+                'seconds must be a number between 0 and %d'
+                % profiling.MAX_SECONDS
+            )
+        if not (isinstance(interval, (int, float)) and interval > 0):
+            raise BadRequestError('interval must be a positive number')
+        try:
+            result = yield profiling.profile(
+                self._dep_tchannel._handler,
+                seconds,
+                mode=options.get('mode', 'collapsed'),
+                interval=interval,
+            )
+        except ValueError as e:
+            raise BadRequestError(str(e))
+        raise gen.Return(result)
+
+    def _collect_metrics(self, registry):
+        telemetry.record_connection_gauges(self._dep_tchannel, registry)
+
     def register(self, scheme, endpoint=None, handler=None, **kwargs):
         if scheme is self.FALLBACK:
             # scheme is not required for fallback endpoints
@@ -38,6 +38,13 @@ examples:
 
       tcurl.py --thrift larry.thrift --service larry --endpoint Larry::nyuck \\
       --body '{"nyuck": "nyuck"}'
+
+
+    Send 5000 requests a second to "larry" for a minute from 4 processes,
+    with at most 200 in flight at once:
+
+      tcurl.py --service larry --endpoint nyuck --body-file body.json \\
+      --rate 5000 --duration 60 --concurrency 200 --processes 4
 """
 
 from __future__ import absolute_import, print_function
@@ -45,14 +52,18 @@ from __future__ import absolute_import, print_function
 import argparse
 import logging
 import json
+import multiprocessing
 import os
 import sys
+import threading
 import traceback
 
 import tornado.ioloop
 import tornado.gen
+from tornado.concurrent import Future
 
 from . import TChannel
+from . import loadgen
 from . import thrift
 
 log = logging.getLogger('tchannel')
@@ -120,6 +131,20 @@ def parse_args(args=None):
         ),
     )
 
+    parser.add_argument(
+        "--headers-file",
+        dest="headers_file",
+        default=None,
+        help="Read --headers from the given file.",
+    )
+
+    parser.add_argument(
+        "--body-file",
+        dest="body_file",
+        default=None,
+        help="Read --body from the given file.",
+    )
+
     parser.add_argument(
         "--timeout",
         dest="timeout",
@@ -146,6 +171,51 @@ def parse_args(args=None):
         help="Say more.",
     )
 
+    load_group = parser.add_argument_group(
+        'load',
+        description=(
+            "With --rate, requests are sent at a fixed rate whether or not "
+            "earlier ones have finished, and a report of the throughput and "
+            "latency is printed instead of the response."
+        ),
+    )
+
+    load_group.add_argument(
+        "--rate",
+        dest="rate",
+        default=None,
+        type=float,
+        help="Requests to send per second.",
+    )
+
+    load_group.add_argument(
+        "--duration",
+        dest="duration",
+        default=10.0,
+        type=float,
+        help="Seconds to send requests for.",
+    )
+
+    load_group.add_argument(
+        "--concurrency",
+        dest="concurrency",
+        default=None,
+        type=int,
+        help=(
+            "Most requests in flight at once. Requests that are due while "
+            "this many are in flight wait for a slot, and the wait counts "
+            "towards their latency."
+        ),
+    )
+
+    load_group.add_argument(
+        "--processes",
+        dest="processes",
+        default=1,
+        type=int,
+        help="Number of processes to split --rate and --concurrency over.",
+    )
+
     thrift_group = parser.add_argument_group('thrift')
 
     thrift_group.add_argument(
@@ -170,6 +240,17 @@ def parse_args(args=None):
 
     args = parser.parse_args(args)
 
+    mode = 'rb' if args.raw else 'r'
+    try:
+        if args.body_file:
+            with open(args.body_file, mode) as f:
+                args.body = f.read()
+        if args.headers_file:
+            with open(args.headers_file, mode) as f:
+                args.headers = f.read()
+    except IOError as e:
+        return parser.error(str(e))
+
     if not args.raw:
         try:
             args.body = json.loads(args.body) if args.body else {}
@@ -192,6 +273,16 @@ def parse_args(args=None):
     if args.thrift and args.raw:
         return parser.error("can't use --thrift and --raw together")
 
+    if args.rate is not None:
+        if args.rate <= 0:
+            return parser.error("--rate must be positive")
+        if args.duration <= 0:
+            return parser.error("--duration must be positive")
+        if args.concurrency is not None and args.concurrency < 1:
+            return parser.error("--concurrency must be at least 1")
+        if args.processes < 1:
+            return parser.error("--processes must be at least 1")
+
     return args
 
 
@@ -199,9 +290,29 @@ def parse_args(args=None):
 def main(argv=None):
     args = parse_args(argv)
 
+    if args.rate is not None:
+        result = yield _generate_load(
+            args, argv if argv is not None else sys.argv[1:]
+        )
+        loadgen.print_report(result)
+        raise tornado.gen.Return(result)
+
     # Should this be my username?
     tchannel = TChannel(name='tcurl.py')
+    send = _request_sender(tchannel, args)
 
+    result = yield _catch_errors(send(), verbose=args.verbose)
+
+    if not args.raw:
+        print(json.dumps(result.body, default=_dictify))
+    else:
+        print(result.body)
+
+    raise tornado.gen.Return(result)
+
+
+def _request_sender(tchannel, args):
+    """Get a function that sends the request described by ``args``."""
     if args.health:
 
         args.thrift = open(
@@ -223,52 +334,115 @@ def main(argv=None):
         thrift_method = getattr(thrift_service, thrift_method_name)
 
         body = args.body or {}
+        request = thrift_method(**body)
 
-        result = yield _catch_errors(
-            tchannel.thrift(
-                thrift_method(**body),
-                headers=args.headers,
-                timeout=args.timeout,
-            ),
-            verbose=args.verbose,
+        return lambda: tchannel.thrift(
+            request,
+            headers=args.headers,
+            timeout=args.timeout,
         )
 
     elif args.raw:
 
-        result = yield _catch_errors(
-            tchannel.raw(
-                service=args.service,
-                endpoint=args.endpoint,
-                body=args.body,
-                headers=args.headers,
-                timeout=args.timeout,
-                hostport=args.host,
-            ),
-            verbose=args.verbose,
+        return lambda: tchannel.raw(
+            service=args.service,
+            endpoint=args.endpoint,
+            body=args.body,
+            headers=args.headers,
+            timeout=args.timeout,
+            hostport=args.host,
         )
 
     else:
 
+        return lambda: tchannel.json(
+            service=args.service,
+            endpoint=args.endpoint,
+            body=args.body,
+            headers=args.headers,
+            timeout=args.timeout,
+            hostport=args.host,
+        )
+
+
+@tornado.gen.coroutine
+def _generate_load(args, argv):
+    if args.processes == 1:
         result = yield _catch_errors(
-            tchannel.json(
-                service=args.service,
-                endpoint=args.endpoint,
-                body=args.body,
-                headers=args.headers,
-                timeout=args.timeout,
-                hostport=args.host,
-            ),
-            verbose=args.verbose,
+            _load(args, args.rate, args.concurrency), verbose=args.verbose,
         )
+        raise tornado.gen.Return(result)
+
+    # Each process sends its share of the calls, offset so that the calls of
+    # all processes are evenly spaced.
+    rate = args.rate / args.processes
+    concurrency = None
+    if args.concurrency is not None:
+        concurrency = max(1, args.concurrency // args.processes)
+    jobs = [
+        (argv, rate, concurrency, i / args.rate)
+        for i in range(args.processes)
+    ]
+
+    # The pool is waited on from a thread so that the IOLoop keeps running.
+    io_loop = tornado.ioloop.IOLoop.current()
+    answer = Future()
+
+    def run_pool():
+        pool = multiprocessing.Pool(args.processes)
+        try:
+            results = pool.map(_load_worker, jobs)
+        except Exception:
+            exc_info = sys.exc_info()
+            io_loop.add_callback(answer.set_exc_info, exc_info)
+        else:
+            io_loop.add_callback(answer.set_result, results)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    thread = threading.Thread(target=run_pool)
+    thread.daemon = True
+    thread.start()
+
+    results = yield _catch_errors(answer, verbose=args.verbose)
+    result = results[0]
+    for other in results[1:]:
+        result.merge(other)
+    raise tornado.gen.Return(result)
 
-    if not args.raw:
-        print(json.dumps(result.body, default=_dictify))
-    else:
-        print(result.body)
 
+@tornado.gen.coroutine
+def _load(args, rate, concurrency, delay=0):
+    tchannel = TChannel(name='tcurl.py')
+    send = _request_sender(tchannel, args)
+
+    # Connect before the clock starts.
+    yield send()
+    if delay:
+        yield tornado.gen.sleep(delay)
+
+    result = yield loadgen.generate(
+        send, rate, args.duration, concurrency=concurrency,
+    )
+    tchannel.close()
     raise tornado.gen.Return(result)
 
 
+def _load_worker(job):
+    argv, rate, concurrency, delay = job
+    args = parse_args(argv)
+    io_loop = tornado.ioloop.IOLoop()
+    io_loop.make_current()
+    try:
+        return io_loop.run_sync(
+            lambda: _load(args, rate, concurrency, delay)
+        )
+    finally:
+        io_loop.clear_current()
+        io_loop.close(all_fds=True)
+
+
 @tornado.gen.coroutine
 def _catch_errors(future, verbose, exit=sys.exit):
     try:
@@ -0,0 +1,154 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Health of the IOLoop and of the connections of a TChannel.
+
+A blocked IOLoop delays every call on it. :py:class:`LoopMonitor` measures
+how late the IOLoop runs callbacks, and :py:meth:`tchannel.TChannel.snapshot`
+reports it along with what is queued up on each connection:
+
+.. code-block:: python
+
+    from tchannel import TChannel, errors
+
+    tchannel = TChannel('my-service', loop_monitor=True)
+
+    @tchannel.json.register
+    def endpoint(request):
+        if tchannel.loop_monitor.lag > 0.1:
+            raise errors.BusyError('shedding load')
+        ...
+"""
+
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+from tornado.ioloop import IOLoop
+
+__all__ = ['LoopMonitor']
+
+#: Connection stats that are summed into the gauges of
+#: :py:func:`record_connection_gauges`.
+CONNECTION_GAUGES = (
+    'writer_queue', 'reader_queue', 'inbound_backlog', 'read_buffer_bytes',
+    'write_buffer_bytes', 'outbound_pending', 'outbound_calls',
+    'inbound_calls', 'tombstones',
+)
+
+
+class LoopMonitor(object):
+    """Measures how late the IOLoop runs callbacks.
+
+    Every ``interval`` seconds a callback is scheduled on the IOLoop, and the
+    time between when it was due and when it ran is its lag. A lag close to
+    zero means the IOLoop is idle or busy with short callbacks; a large lag
+    means something, usually handler code, is blocking it.
+
+    :param float interval:
+        Seconds between measurements.
+    :param histogram:
+        :py:class:`tchannel.metrics.Histogram` to record every lag in, if
+        any.
+    """
+
+    def __init__(self, interval=0.5, histogram=None):
+        self.interval = interval
+        self.histogram = histogram
+
+        #: Most recent lag, in seconds.
+        self.lag = 0.0
+
+        #: Largest lag since the monitor started, in seconds.
+        self.max_lag = 0.0
+
+        #: Number of lags measured.
+        self.samples = 0
+
+        self._io_loop = None
+        self._due = None
+        self._timeout = None
+
+    @property
+    def running(self):
+        return self._timeout is not None
+
+    def start(self, io_loop=None):
+        """Start measuring lag on ``io_loop``, or the current IOLoop."""
+        if self._timeout is not None:
+            return
+        self._io_loop = io_loop or IOLoop.current()
+        self._schedule()
+
+    def stop(self):
+        """Stop measuring lag."""
+        if self._timeout is not None:
+            self._io_loop.remove_timeout(self._timeout)
+            self._timeout = None
+
+    def _schedule(self):
+        self._due = self._io_loop.time() + self.interval
+        self._timeout = self._io_loop.call_at(self._due, self._measure)
+
+    def _measure(self):
+        lag = max(0.0, self._io_loop.time() - self._due)
+        self.lag = lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+        self.samples += 1
+        if self.histogram is not None:
+            self.histogram.record(lag)
+        self._schedule()
+
+    def snapshot(self):
+        """Get the measurements as a dict."""
+        return {
+            'interval': self.interval,
+            'lag': self.lag,
+            'max_lag': self.max_lag,
+            'samples': self.samples,
+        }
+
+
+def connections(tchannel):
+    """Get the open connections of a
+    :py:class:`tchannel.tornado.TChannel`."""
+    return [
+        connection
+        for peer in tchannel.peers.peers
+        for connection in peer.connections
+        if not connection.closed
+    ]
+
+
+def record_connection_gauges(tchannel, registry):
+    """Set ``connection.*`` gauges to totals over all connections of a
+    :py:class:`tchannel.tornado.TChannel`.
+
+    Sets ``connection.count`` and, for every name in
+    :py:data:`CONNECTION_GAUGES`, ``connection.<name>`` with underscores
+    replaced by dashes.
+    """
+    stats = [connection.stats() for connection in connections(tchannel)]
+    registry.gauge('connection.count').set(len(stats))
+    for name in CONNECTION_GAUGES:
+        registry.gauge('connection.' + name.replace('_', '-')).set(
+            sum(s[name] for s in stats)
+        )
@@ -30,6 +30,11 @@ This allows recording TChannel requests and their responses into YAML files
 during integration tests and replaying those recorded responses when the tests
 are run next time.
 
+Cassettes whose path ends in ``.vcr`` are stored in a binary format instead
+of YAML. They load much faster, and the interactions in them are only
+decoded when they are matched or replayed, which helps with cassettes that
+hold thousands of interactions.
+
 The simplest way to use this is with the :py:func:`use_cassette` function.
 
 .. autofunction:: use_cassette
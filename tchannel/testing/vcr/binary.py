@@ -0,0 +1,217 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Binary storage format for cassettes.
+
+Cassettes whose path ends in ``.vcr`` are stored in this format instead of
+YAML. Requests and responses are stored as Thrift structs and only decoded
+when a request is matched against them or a response is replayed. Each is
+preceded by the fields requests are most often matched on, so that the
+cassette can be indexed without decoding anything.
+
+A file starts with ``TVCR`` and the version of the cassette, followed by a
+record for each interaction::
+
+    serviceName~2 endpoint~2 hostPort~2 argScheme:1 digest:32
+    request~4 response~4
+
+where ``digest`` is the SHA-256 of the request body.
+"""
+
+from __future__ import absolute_import
+
+import struct
+from hashlib import sha256
+
+import six
+
+from . import proxy
+
+__all__ = ['load', 'dump']
+
+#: Extension of cassettes stored in this format.
+EXTENSION = '.vcr'
+
+MAGIC = b'TVCR'
+
+#: Request fields stored ahead of every interaction, in order. The body is
+#: stored as its digest.
+FIELDS = ('serviceName', 'endpoint', 'hostPort', 'argScheme', 'body')
+
+_HEADER = struct.Struct('>4sB')
+_SHORT = struct.Struct('>H')
+_LONG = struct.Struct('>I')
+_ARG_SCHEME = struct.Struct('>B')
+_DIGEST_SIZE = 32
+
+
+def digest(body):
+    if isinstance(body, six.text_type):
+        body = body.encode('utf-8')
+    return sha256(body).digest()
+
+
+def request_fields(request):
+    """Get the :py:data:`FIELDS` of a request."""
+    return (
+        request.serviceName,
+        request.endpoint,
+        request.hostPort,
+        request.argScheme,
+        digest(request.body),
+    )
+
+
+class LazyInteraction(object):
+    """An interaction whose request and response are decoded on first use.
+
+    :ivar fields:
+        The :py:data:`FIELDS` of the request.
+    """
+
+    __slots__ = (
+        'fields', '_request', '_request_bytes', '_response',
+        '_response_bytes',
+    )
+
+    def __init__(self, fields, request_bytes, response_bytes):
+        self.fields = fields
+        self._request = None
+        self._request_bytes = request_bytes
+        self._response = None
+        self._response_bytes = response_bytes
+
+    @property
+    def request(self):
+        if self._request is None:
+            self._request = proxy.loads(
+                proxy.Request, self._request_bytes.tobytes()
+            )
+        return self._request
+
+    @property
+    def response(self):
+        if self._response is None:
+            self._response = proxy.loads(
+                proxy.Response, self._response_bytes.tobytes()
+            )
+        return self._response
+
+    def to_primitive(self):
+        return {
+            'request': self.request.to_primitive(),
+            'response': self.response.to_primitive(),
+        }
+
+
+def _encode_string(value):
+    if isinstance(value, six.text_type):
+        value = value.encode('utf-8')
+    return _SHORT.pack(len(value)) + value
+
+
+def _encode(interaction):
+    if isinstance(interaction, LazyInteraction):
+        # Interactions are never modified, so what was read can be written
+        # back as is.
+        fields = interaction.fields
+        request = interaction._request_bytes.tobytes()
+        response = interaction._response_bytes.tobytes()
+    else:
+        fields = request_fields(interaction.request)
+        request = proxy.dumps(interaction.request)
+        response = proxy.dumps(interaction.response)
+
+    service, endpoint, host_port, arg_scheme, body_digest = fields
+    return b''.join([
+        _encode_string(service),
+        _encode_string(endpoint),
+        _encode_string(host_port),
+        _ARG_SCHEME.pack(arg_scheme),
+        body_digest,
+        _LONG.pack(len(request)),
+        request,
+        _LONG.pack(len(response)),
+        response,
+    ])
+
+
+def dump(d):
+    """Serialize the ``interactions`` and ``version`` of a cassette.
+
+    Unlike the YAML serializer, interactions are passed as is rather than
+    as primitives.
+    """
+    return b''.join(
+        [_HEADER.pack(MAGIC, d['version'])] +
+        [_encode(interaction) for interaction in d['interactions']]
+    )
+
+
+def load(s):
+    """Read a cassette written by :py:func:`dump`.
+
+    :returns:
+        None if the file was empty, or a dict with its ``version`` and a list
+        of ``interactions`` that have not been decoded yet.
+    :raises ValueError:
+        If the file isn't a binary cassette or is truncated.
+    """
+    if not s:
+        return None
+    if len(s) < _HEADER.size or s[:len(MAGIC)] != MAGIC:
+        raise ValueError('not a binary cassette')
+    version = _HEADER.unpack_from(s)[1]
+
+    view = memoryview(s)
+
+    def take(offset, size):
+        end = offset + size
+        if end > len(s):
+            raise ValueError('truncated cassette')
+        return view[offset:end], end
+
+    def take_sized(offset, size_struct):
+        take(offset, size_struct.size)
+        (size,) = size_struct.unpack_from(s, offset)
+        return take(offset + size_struct.size, size)
+
+    interactions = []
+    offset = _HEADER.size
+    while offset < len(s):
+        service, offset = take_sized(offset, _SHORT)
+        endpoint, offset = take_sized(offset, _SHORT)
+        host_port, offset = take_sized(offset, _SHORT)
+        take(offset, _ARG_SCHEME.size)
+        (arg_scheme,) = _ARG_SCHEME.unpack_from(s, offset)
+        body_digest, offset = take(offset + _ARG_SCHEME.size, _DIGEST_SIZE)
+        request, offset = take_sized(offset, _LONG)
+        response, offset = take_sized(offset, _LONG)
+
+        fields = (
+            service.tobytes().decode('utf-8'),
+            endpoint.tobytes().decode('utf-8'),
+            host_port.tobytes(),
+            arg_scheme,
+            body_digest.tobytes(),
+        )
+        interactions.append(LazyInteraction(fields, request, response))
+
+    return {'version': version, 'interactions': interactions}
@@ -27,9 +27,9 @@ import json
 from itertools import chain
 from collections import deque
 from collections import namedtuple
-from copy import deepcopy
 from hashlib import sha256
 
+from . import binary
 from . import yaml
 from .exceptions import RequestNotFoundError
 from .exceptions import UnsupportedVersionError
@@ -153,6 +153,48 @@ DEFAULT_MATCHERS = (
 )
 
 
+def _key(interaction, fields):
+    """Get the index key of an interaction for the given request fields."""
+    if isinstance(interaction, binary.LazyInteraction):
+        return tuple(
+            interaction.fields[binary.FIELDS.index(f)] for f in fields
+        )
+    return _request_key(interaction.request, fields)
+
+
+def _request_key(request, fields):
+    return tuple(
+        binary.digest(request.body) if f == 'body' else getattr(request, f)
+        for f in fields
+    )
+
+
+class _Loaded(object):
+    """Interactions loaded from a file.
+
+    These are shared by every cassette that loads the same file and are never
+    modified. Indexes from the values of request fields to the positions of
+    the interactions with those values are built on first use.
+    """
+
+    __slots__ = ('interactions', '_indexes')
+
+    def __init__(self, interactions):
+        self.interactions = tuple(interactions)
+        self._indexes = {}
+
+    def index(self, fields):
+        index = self._indexes.get(fields)
+        if index is None:
+            index = {}
+            for i, interaction in enumerate(self.interactions):
+                index.setdefault(_key(interaction, fields), []).append(i)
+            index = self._indexes[fields] = {
+                key: tuple(positions) for key, positions in index.items()
+            }
+        return index
+
+
 class Cassette(object):
     """Represents a series of recorded interactions."""
 
@@ -172,7 +214,9 @@ class Cassette(object):
             be considered equal.
         :param serializer:
             An object with a ``dump(obj)`` and a ``load(str)`` method used to
-            serialize and deserialize the cassette.
+            serialize and deserialize the cassette. Defaults to
+            :py:mod:`tchannel.testing.vcr.binary` for paths ending in
+            ``.vcr`` and YAML otherwise.
         """
         # TODO move documentation around
         record_mode = record_mode or RecordMode.ONCE
@@ -186,7 +230,9 @@ class Cassette(object):
         self.existed = False
 
         if serializer is None:
-            serializer = yaml
+            serializer = (
+                binary if path.endswith(binary.EXTENSION) else yaml
+            )
         self.serializer = serializer
 
         if matchers is None:
@@ -199,11 +245,15 @@ class Cassette(object):
             except KeyError:
                 raise KeyError('%s is not a known matcher' % m)
 
+        # Requests can only match if these fields are equal, so they are used
+        # to index the interactions.
+        self._key_fields = tuple(f for f in binary.FIELDS if f in matchers)
+
         self._record_mode = record_mode
-        self._available = deque()
         self._played = deque()
         self._recorded = deque()
         self._cache = Cassette._cache
+        self._use(_Loaded(()))
 
         self._load()
 
@@ -227,6 +277,15 @@ class Cassette(object):
         """Number of responses that have been replayed."""
         return len(self._played)
 
+    @property
+    def _available(self):
+        """Loaded interactions that haven't been played, in order."""
+        return [
+            interaction
+            for i, interaction in enumerate(self._loaded.interactions)
+            if i not in self._played_positions
+        ]
+
     @property
     def data(self):
         """Get all known data for this cassette."""
@@ -238,14 +297,31 @@ class Cassette(object):
     def _match(self, left, right):
         return all(m(left, right) for m in self._matchers)
 
-    def _find(self, request, haystack=None):
-        "A generator that returns yields matching interactions for a request"
+    def _use(self, loaded):
+        self._loaded = loaded
+        self._index = loaded.index(self._key_fields)
+        # Positions of unplayed interactions by key. The shared index is
+        # copied into here for a key when an interaction with it is played.
+        self._buckets = {}
+        self._played_positions = set()
+
+    def _find(self, request):
+        """Find the first unplayed interaction matching a request.
 
-        haystack = haystack or self._available
+        :returns:
+            None, or the key of the request, the index of the interaction in
+            the bucket for that key and its position in the cassette.
+        """
+        key = _request_key(request, self._key_fields)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._index.get(key, ())
 
-        for interaction in haystack:
-            if self._match(request, interaction.request):
-                yield interaction
+        interactions = self._loaded.interactions
+        for i, position in enumerate(bucket):
+            if self._match(request, interactions[position].request):
+                return key, i, position
+        return None
 
     def _load(self):
         file_hash = None
@@ -256,7 +332,7 @@ class Cassette(object):
                 file_hash = sha256(data).hexdigest()
                 cached = self._cache.get((self.path, file_hash))
                 if cached is not None:
-                    self._available = deepcopy(cached)
+                    self._use(cached)
                     return
         except IOError:
             return  # nothing to read
@@ -271,11 +347,16 @@ class Cassette(object):
                 'format: version %s' % (self.path, str(data['version']))
             )
 
-        self._available = [
-            Interaction.to_native(i) for i in data['interactions']
-        ]
+        if self.serializer is binary:
+            interactions = data['interactions']
+        else:
+            interactions = [
+                Interaction.to_native(i) for i in data['interactions']
+            ]
+        loaded = _Loaded(interactions)
         if file_hash is not None:
-            self._cache[(self.path, file_hash)] = deepcopy(self._available)
+            self._cache[(self.path, file_hash)] = loaded
+        self._use(loaded)
 
     def save(self):
         if not self._recorded:
@@ -291,9 +372,13 @@ class Cassette(object):
             interactions.extend(self._available)
         interactions.extend(self._recorded)
 
+        if self.serializer is binary:
+            interactions_data = interactions
+        else:
+            interactions_data = [i.to_primitive() for i in interactions]
         data = self.serializer.dump(
             {
-                'interactions': [i.to_primitive() for i in interactions],
+                'interactions': interactions_data,
                 'version': VERSION,
             }
         )
@@ -308,18 +393,13 @@ class Cassette(object):
             f.write(data)
 
         self._played = deque()
-        self._available = interactions
         self._recorded = deque()
+        self._use(_Loaded(interactions))
 
     def can_replay(self, request):
         if not self._record_mode.replayable:
             return False
-        try:
-            next(self._find(request))
-        except StopIteration:
-            return False
-        else:
-            return True
+        return self._find(request) is not None
 
     def replay(self, request):
         assert self._record_mode.replayable, (
@@ -327,15 +407,25 @@ class Cassette(object):
             'requests'
         )
 
-        for interaction in self._find(request):
-            # TODO request matchers
-            self._available.remove(interaction)
-            self._played.append(interaction)
-            return interaction.response
+        found = self._find(request)
+        if found is None:
+            raise RequestNotFoundError(
+                'Could not find a recorded response for %s' % repr(request)
+            )
 
-        raise RequestNotFoundError(
-            'Could not find a recorded response for %s' % repr(request)
-        )
+        key, i, position = found
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = deque(self._index[key])
+        if i == 0:
+            bucket.popleft()
+        else:
+            del bucket[i]
+
+        interaction = self._loaded.interactions[position]
+        self._played_positions.add(position)
+        self._played.append(interaction)
+        return interaction.response
 
     def record(self, request, response):
         assert not self.write_protected, (
@@ -20,6 +20,7 @@
 
 from __future__ import absolute_import
 
+from .cache import set_cache_dir  # noqa
 from .client import client_for  # noqa
 from .module import thrift_request_builder  # noqa
 from .server import register  # noqa
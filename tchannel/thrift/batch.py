@@ -0,0 +1,364 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Send many small Thrift calls together.
+
+Calls added to a :py:class:`Batch` are held until the batch is flushed and
+then issued together. Their frames are pipelined into as few writes as
+possible. With ``envelope=True``, calls to the same endpoint are also
+combined into a single request to the :py:data:`BATCH_ENDPOINT` of servers
+that opted in with ``tchannel.thrift.register_batch_endpoint()``.
+
+The envelope is a raw request whose ``arg3`` is laid out as::
+
+    endpoint~2 n:4 (headers~4 body~4){n}
+
+where ``headers`` and ``body`` are the Thrift ``arg2`` and ``arg3`` of each
+call. The response ``arg3`` is::
+
+    n:4 (status:1 headers~4 body~4){n}
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import struct
+import sys
+from collections import OrderedDict
+
+import six
+from tornado import gen
+from tornado.concurrent import Future
+from tornado.concurrent import chain_future
+from tornado.ioloop import IOLoop
+
+from tchannel.errors import BadRequestError
+from tchannel.errors import ReadError
+from tchannel.errors import UnexpectedError
+from tchannel.request import Request
+from tchannel.response import Response
+from tchannel.response import response_from_mixed
+from tchannel.schemes import RAW
+from tchannel.schemes import THRIFT
+from tchannel.status import OK
+
+#: Endpoint that executes batches of Thrift calls.
+BATCH_ENDPOINT = 'tchannel::batch'
+
+# Status of a call that failed with an unexpected error. The body holds the
+# error description.
+_UNEXPECTED = 0xff
+
+_uint8 = struct.Struct('>B')
+_uint16 = struct.Struct('>H')
+_uint32 = struct.Struct('>I')
+
+
+def _to_bytes(s):
+    if isinstance(s, six.text_type):
+        return s.encode('utf-8')
+    return s
+
+
+class _Reader(object):
+
+    __slots__ = ('data', 'offset')
+
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def read(self, size):
+        s = self.data[self.offset:self.offset + size]
+        if len(s) != size:
+            raise ReadError(
+                "Expected %d bytes but got %d bytes." % (size, len(s))
+            )
+        self.offset += size
+        return s
+
+    def read_number(self, number):
+        return number.unpack(self.read(number.size))[0]
+
+    def read_string(self, number):
+        return self.read(self.read_number(number))
+
+
+def encode_request(endpoint, calls):
+    """Encodes the body of a batch request.
+
+    :param endpoint:
+        Thrift endpoint that all calls are made to.
+    :param calls:
+        List of ``(headers, body)`` pairs of serialized Thrift calls.
+    """
+    endpoint = _to_bytes(endpoint)
+    parts = [_uint16.pack(len(endpoint)), endpoint, _uint32.pack(len(calls))]
+    for headers, body in calls:
+        parts.append(_uint32.pack(len(headers)))
+        parts.append(headers)
+        parts.append(_uint32.pack(len(body)))
+        parts.append(body)
+    return b''.join(parts)
+
+
+def decode_request(data):
+    """Decodes the body of a batch request.
+
+    :returns:
+        ``(endpoint, calls)``; see :py:func:`encode_request`.
+    """
+    reader = _Reader(_to_bytes(data))
+    endpoint = reader.read_string(_uint16).decode('utf-8')
+    calls = [
+        (reader.read_string(_uint32), reader.read_string(_uint32))
+        for _ in six.moves.range(reader.read_number(_uint32))
+    ]
+    return endpoint, calls
+
+
+def encode_response(results):
+    """Encodes the body of a batch response.
+
+    :param results:
+        List of ``(status, headers, body)`` for every call in the batch.
+    """
+    parts = [_uint32.pack(len(results))]
+    for status, headers, body in results:
+        parts.append(_uint8.pack(status))
+        parts.append(_uint32.pack(len(headers)))
+        parts.append(headers)
+        parts.append(_uint32.pack(len(body)))
+        parts.append(body)
+    return b''.join(parts)
+
+
+def decode_response(data):
+    """Decodes the body of a batch response.
+
+    :returns:
+        List of ``(status, headers, body)``; see :py:func:`encode_response`.
+    """
+    reader = _Reader(_to_bytes(data))
+    return [
+        (
+            reader.read_number(_uint8),
+            reader.read_string(_uint32),
+            reader.read_string(_uint32),
+        )
+        for _ in six.moves.range(reader.read_number(_uint32))
+    ]
+
+
+class Batch(object):
+    """Collects Thrift calls and sends them together.
+
+    Use it as a context manager to send all calls made inside the block when
+    it exits,
+
+    .. code-block:: python
+
+        with tchannel.thrift.batch() as batch:
+            futures = [batch(KeyValue.getValue(key)) for key in keys]
+        responses = yield futures
+
+    or pass a ``window`` to send calls automatically that many seconds after
+    the first call of the batch.
+
+    Obtain instances through :py:meth:`ThriftArgScheme.batch`.
+    """
+
+    __slots__ = ('_scheme', 'window', 'envelope', '_options', '_calls',
+                 '_timeout')
+
+    def __init__(self, scheme, window=None, envelope=False, **options):
+        self._scheme = scheme
+        self.window = window
+        self.envelope = envelope
+        self._options = options
+        self._calls = []
+        self._timeout = None
+
+    def __call__(self, request, headers=None):
+        """Adds a call to the batch.
+
+        :param request:
+            Request obtained by calling a method on service objects generated
+            by :py:func:`tchannel.thrift.load`.
+        :param dict headers:
+            Application headers for this call.
+        :returns:
+            A Future that resolves to the ``Response`` of this call, or fails
+            with its error, once the batch has been sent.
+        """
+        future = Future()
+        self._calls.append((request, headers, future))
+        if self.window is not None and self._timeout is None:
+            self._timeout = IOLoop.current().call_later(
+                self.window, self.flush
+            )
+        return future
+
+    def __len__(self):
+        return len(self._calls)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        else:
+            self._calls = []
+
+    def flush(self):
+        """Sends all calls added to the batch so far."""
+        if self._timeout is not None:
+            IOLoop.current().remove_timeout(self._timeout)
+            self._timeout = None
+        calls, self._calls = self._calls, []
+
+        if not self.envelope:
+            for request, headers, future in calls:
+                self._send(request, headers, future)
+            return
+
+        groups = OrderedDict()
+        for call in calls:
+            request = call[0]
+            key = (request.service, request.endpoint, request.hostport)
+            groups.setdefault(key, []).append(call)
+
+        for group in groups.values():
+            if len(group) == 1:
+                self._send(*group[0])
+            else:
+                self._send_envelope(group)
+
+    def _send(self, request, headers, future):
+        chain_future(self._scheme(request, headers=headers, **self._options),
+                     future)
+
+    @gen.coroutine
+    def _send_envelope(self, calls):
+        request = calls[0][0]
+        serializer = request.get_serializer()
+        try:
+            body = encode_request(request.endpoint, [
+                (
+                    serializer.serialize_header(headers or {}),
+                    serializer.serialize_body(call_request.call_args),
+                )
+                for call_request, headers, _ in calls
+            ])
+            options = dict(self._options)
+            hostport = options.pop('hostport', None) or request.hostport
+            response = yield self._scheme._tchannel.call(
+                scheme=RAW,
+                service=request.service,
+                arg1=BATCH_ENDPOINT,
+                arg3=body,
+                hostport=hostport,
+                **options
+            )
+            results = decode_response(response.body)
+            if len(results) != len(calls):
+                raise ReadError(
+                    "Expected %d results but got %d." % (
+                        len(calls), len(results),
+                    )
+                )
+        except Exception:
+            exc_info = sys.exc_info()
+            for _, _, future in calls:
+                future.set_exc_info(exc_info)
+            return
+
+        for (call_request, _, future), result in zip(calls, results):
+            status, headers, body = result
+            try:
+                if status == _UNEXPECTED:
+                    raise UnexpectedError(body.decode('utf-8'))
+                body = serializer.deserialize_body(body)
+                future.set_result(Response(
+                    body=call_request.read_body(body),
+                    headers=serializer.deserialize_header(headers),
+                    transport=response.transport,
+                    status=status,
+                ))
+            except Exception:
+                future.set_exc_info(sys.exc_info())
+
+
+def build_batch_handler(dispatcher):
+    """Builds the handler for :py:data:`BATCH_ENDPOINT`.
+
+    :param dispatcher:
+        RequestDispatcher holding the Thrift endpoints that may be batched.
+    """
+
+    @gen.coroutine
+    def run(request, handler, headers, body):
+        try:
+            call = Request(
+                body=handler.req_serializer.deserialize_body(body),
+                headers=handler.req_serializer.deserialize_header(headers),
+                transport=request.transport,
+                endpoint=request.endpoint,
+                service=request.service,
+                timeout=request.timeout,
+                cancel_token=request.cancel_token,
+            )
+            response = yield gen.maybe_future(handler.endpoint(call))
+            response = response_from_mixed(response)
+            result = (
+                response.status or OK,
+                handler.resp_serializer.serialize_header(response.headers),
+                handler.resp_serializer.serialize_body(response.body),
+            )
+        except Exception as e:
+            result = (_UNEXPECTED, b'', _to_bytes(
+                "%r from %s in batch" % (e, request.endpoint)
+            ))
+        raise gen.Return(result)
+
+    @gen.coroutine
+    def handle_batch(request):
+        try:
+            endpoint, calls = decode_request(request.body)
+        except ReadError as e:
+            raise BadRequestError("Invalid batch: %s" % e)
+
+        handler = dispatcher.handlers.get(endpoint)
+        if (
+            handler is None or
+            handler.streaming or
+            handler.req_serializer.name != THRIFT
+        ):
+            raise BadRequestError(
+                "Endpoint '%s' can't be batched." % endpoint
+            )
+
+        request.endpoint = endpoint
+        results = yield [
+            run(request, handler, headers, body) for headers, body in calls
+        ]
+        raise gen.Return(encode_response(results))
+
+    return handle_batch
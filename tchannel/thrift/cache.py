@@ -0,0 +1,267 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import errno
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+
+import six
+import thriftrw
+from six.moves import cPickle as pickle
+from thriftrw.compile import Compiler
+from thriftrw.idl import Parser
+from thriftrw.idl.ast import Include
+from thriftrw.protocol import BinaryProtocol
+
+log = logging.getLogger('tchannel')
+
+#: Environment variable naming the default directory in which parsed Thrift
+#: files are cached.
+CACHE_DIR_ENV = 'TCHANNEL_THRIFT_CACHE_DIR'
+
+# Parsed documents from different versions of thriftrw or Python can't be
+# shared, so they're part of the cache key.
+_KEY_PREFIX = ('%s:%d.%d:' % (
+    thriftrw.__version__, sys.version_info[0], sys.version_info[1],
+)).encode('ascii')
+
+
+def _digest(document):
+    if isinstance(document, six.text_type):
+        document = document.encode('utf-8')
+    return hashlib.sha1(_KEY_PREFIX + document).hexdigest()
+
+
+class ProgramCache(object):
+    """Parses Thrift documents, reusing the result for identical documents.
+
+    Parsed documents are kept in memory and, if ``directory`` is set, pickled
+    to that directory so that other processes can skip parsing as well. The
+    directory must only be writable by trusted users.
+
+    The PLY parser is only built the first time a document isn't found in
+    the cache.
+    """
+
+    __slots__ = ('directory', '_programs', '_parser')
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._programs = {}
+        self._parser = None
+
+    def parse(self, document):
+        key = _digest(document)
+        program = self._programs.get(key)
+        if program is not None:
+            return program
+
+        program = self._read(key)
+        if program is None:
+            if self._parser is None:
+                self._parser = Parser()
+            program = self._parser.parse(document)
+            self._write(key, program)
+
+        self._programs[key] = program
+        return program
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def _read(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                return pickle.load(f)
+        except (IOError, OSError):
+            return None
+        except Exception:
+            log.warning(
+                'Ignoring unreadable Thrift cache entry %s', self._path(key),
+                exc_info=True,
+            )
+            return None
+
+    def _write(self, key, program):
+        if not self.directory:
+            return
+        tmp_path = None
+        try:
+            try:
+                os.makedirs(self.directory)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+
+            # Write to a temporary file first so that concurrent readers
+            # never see a partial entry.
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(program, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, self._path(key))
+            tmp_path = None
+        except Exception:
+            log.warning(
+                'Failed to write Thrift cache entry to %s', self.directory,
+                exc_info=True,
+            )
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+
+# Attributes set by Compiler.__init__ in the versions of thriftrw that
+# _Compiler knows how to initialize.
+_COMPILER_SLOTS = frozenset(
+    ['protocol', 'strict', 'parser', 'include_as', '_module_specs']
+)
+
+
+class _Compiler(Compiler):
+    """A thriftrw Compiler that parses documents with the given parser.
+
+    ``Compiler.__init__`` always builds a new PLY parser, which takes longer
+    than compiling most Thrift files.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, parser):
+        self.protocol = BinaryProtocol()
+        self.strict = True
+        self.include_as = False
+        self.parser = parser
+        self._module_specs = {}
+
+
+def _compiler(parser):
+    """Get a thriftrw Compiler that parses documents with ``parser``."""
+    if frozenset(getattr(Compiler, '__slots__', ())) == _COMPILER_SLOTS:
+        return _Compiler(parser)
+
+    # Other versions of thriftrw may set up compilers differently, so let
+    # them build their own parser and replace it.
+    compiler = Compiler(BinaryProtocol())
+    compiler.parser = parser
+    return compiler
+
+
+class ModuleCache(object):
+    """Compiles Thrift files, reusing modules compiled from the same content.
+
+    Modules are keyed by path, module name, and a hash of the contents of the
+    file and of every file it includes, so editing any of them and loading
+    the file again compiles it afresh.
+    """
+
+    __slots__ = ('programs', '_modules', '_compiler', '_compiled')
+
+    def __init__(self, directory=None):
+        self.programs = ProgramCache(directory)
+        self._modules = {}
+        self._compiler = None
+        # Path -> (name, digest) for every file compiled by _compiler.
+        self._compiled = {}
+
+    def _files(self, path, name, document, files):
+        """Add the name and digest of a file and of every file it includes,
+        recursively, to ``files`` by path."""
+        files[path] = (name, _digest(document))
+        for header in self.programs.parse(document).headers:
+            if not isinstance(header, Include):
+                continue
+            include = os.path.normpath(
+                os.path.join(os.path.dirname(path), header.path)
+            )
+            # Missing files are reported by the compiler.
+            if include in files or not os.path.isfile(include):
+                continue
+            with open(include, 'r') as f:
+                self._files(
+                    include,
+                    os.path.splitext(os.path.basename(include))[0],
+                    f.read(),
+                    files,
+                )
+        return files
+
+    def load(self, path, name=None):
+        path = os.path.abspath(path)
+        if name is None:
+            name = os.path.splitext(os.path.basename(path))[0]
+
+        with open(path, 'r') as f:
+            document = f.read()
+
+        files = self._files(path, name, document, {})
+        key = (path, name, frozenset(files.items()))
+        module = self._modules.get(key)
+        if module is not None:
+            return module
+
+        # thriftrw compilers remember every file they have compiled by path.
+        # Start over if any of these files was compiled before from something
+        # else.
+        if self._compiler is None or any(
+            self._compiled.get(p, f) != f for p, f in files.items()
+        ):
+            self._compiler = _compiler(self.programs)
+            self._compiled = {}
+        self._compiled.update(files)
+
+        module = self._compiler.compile(name, document, path).link().surface
+        self._modules[key] = module
+        return module
+
+
+_cache = ModuleCache(os.environ.get(CACHE_DIR_ENV) or None)
+
+
+def set_cache_dir(directory):
+    """Sets the directory in which parsed Thrift files are cached.
+
+    Parsing Thrift files is the slowest part of
+    :py:func:`tchannel.thrift.load`. With a cache directory, processes that
+    load a Thrift file that was already parsed by another process, such as
+    pre-forked workers or repeated ``tcurl`` runs, only have to compile it.
+    The directory is created if necessary and must only be writable by
+    trusted users. Pass ``None`` to stop caching to disk.
+
+    The default directory is read from the ``TCHANNEL_THRIFT_CACHE_DIR``
+    environment variable. Compiled modules are always cached in memory.
+
+    :param str directory:
+        Path to the cache directory.
+    """
+    _cache.programs.directory = directory
+
+
+def load(path, name=None):
+    return _cache.load(path, name)
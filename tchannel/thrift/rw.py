@@ -24,7 +24,6 @@ import sys
 import types
 from functools import partial
 
-import thriftrw
 from tornado import gen
 from tornado.util import raise_exc_info
 
@@ -34,6 +33,7 @@ from tchannel.errors import ValueExpectedError
 from tchannel.response import Response, response_from_mixed
 from tchannel.serializer.thrift import ThriftRWSerializer
 
+from . import cache
 from .module import ThriftRequest
 
 
@@ -141,6 +141,10 @@ def load(path, service=None, hostport=None, module_name=None):
     :param str module_name:
         Name used for the generated Python module. Defaults to the name of the
         Thrift file.
+
+    Loading a file whose contents have not changed returns the module
+    compiled earlier. To share parsed Thrift files between processes, see
+    :py:func:`tchannel.thrift.set_cache_dir`.
     """
     # TODO replace with more specific exceptions
     # assert service, 'service is required'
@@ -150,7 +154,7 @@ def load(path, service=None, hostport=None, module_name=None):
     if not path.endswith('.thrift'):
         service, path = path, service
 
-    module = thriftrw.load(path=path, name=module_name)
+    module = cache.load(path, module_name)
     return TChannelThriftModule(service, module, hostport)
 
 
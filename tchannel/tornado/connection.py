@@ -20,6 +20,7 @@
 
 from __future__ import absolute_import
 
+import functools
 import logging
 import os
 import socket
@@ -51,6 +52,7 @@ from ..messages.common import PROTOCOL_VERSION
 from ..messages.common import FlagsType
 from ..messages.common import StreamState
 from ..messages.types import Types
+from ..metrics import now
 from .message_factory import build_raw_error_message
 from .message_factory import MessageFactory
 from .tombstone import Cemetery
@@ -68,6 +70,10 @@ INCOMING = object()
 
 DEFAULT_INIT_TIMEOUT_SECS = 5
 
+# Frames waiting to be written are combined into writes of up to this many
+# bytes.
+MAX_COALESCED_WRITE_SIZE = 256 * 1024
+
 
 class TornadoConnection(object):
     """Manages a bi-directional TChannel conversation between two machines.
@@ -93,6 +99,9 @@ class TornadoConnection(object):
     CALL_REQ_TYPES = frozenset([Types.CALL_REQ, Types.CALL_REQ_CONTINUE])
     CALL_RES_TYPES = frozenset([Types.CALL_RES, Types.CALL_RES_CONTINUE])
 
+    # Incoming messages that are passed on to the request handler.
+    HANDLER_TYPES = CALL_REQ_TYPES | frozenset([Types.CANCEL, Types.CLAIM])
+
     def __init__(self, connection, tchannel=None, direction=None):
         assert connection, "connection is required"
 
@@ -131,6 +140,10 @@ class TornadoConnection(object):
         # Total number of pending outbound requests and responses.
         self.total_outbound_pendings = 0
 
+        # Map from message ID to CancellationTokens for incoming calls that
+        # are still being processed.
+        self._inbound_pending_call = {}
+
         # Collection of request IDs known to have timed out.
         self._request_tombstones = Cemetery()
 
@@ -143,8 +156,25 @@ class TornadoConnection(object):
         # pending request/response lists.
         self._outbound_pending_change_cb = None
 
-        self.reader = Reader(self.connection)
-        self.writer = Writer(self.connection)
+        # Capture recording the frames of this connection, if any, and the
+        # number this connection is known by in it.
+        capture = self._capture = getattr(tchannel, 'capture', None)
+        self._capture_id = None
+        received = sent = None
+        if capture is not None and not capture.closed:
+            self._capture_id = capture.connection_opened(self)
+            received = functools.partial(
+                capture.frame_received, self._capture_id
+            )
+            sent = functools.partial(capture.frame_sent, self._capture_id)
+
+        self.reader = Reader(self.connection, tap=received)
+        metrics = getattr(tchannel, 'metrics', None)
+        self.writer = Writer(
+            self.connection,
+            queue_wait=metrics.queue_wait if metrics is not None else None,
+            tap=sent,
+        )
 
         connection.set_close_callback(self._on_close)
 
@@ -172,6 +202,9 @@ class TornadoConnection(object):
         self.closed = True
         self._request_tombstones.clear()
 
+        if self._capture_id is not None:
+            self._capture.connection_closed(self._capture_id)
+
         for message_id, future in six.iteritems(self._outbound_pending_call):
             future.set_exception(
                 NetworkError(
@@ -180,6 +213,13 @@ class TornadoConnection(object):
             )
         self._outbound_pending_call = {}
 
+        # Nobody is around to receive responses for calls that are still
+        # being processed.
+        inbound_pending_call = self._inbound_pending_call
+        self._inbound_pending_call = {}
+        for cancel_token in six.itervalues(inbound_pending_call):
+            cancel_token.cancel('connection closed')
+
         try:
             while True:
                 message = self._messages.get_nowait()
@@ -223,7 +263,7 @@ class TornadoConnection(object):
                 return
 
             message = future.result()
-            if message.message_type in self.CALL_REQ_TYPES:
+            if message.message_type in self.HANDLER_TYPES:
                 self._messages.put(message)
                 return
 
@@ -231,7 +271,7 @@ class TornadoConnection(object):
                 _handle_response(message)
                 return
 
-            if message.id in self._request_tombstones:
+            if self._request_tombstones.absorb(message.id):
                 return  # recently timed out; safe to ignore
 
             log.info('Unconsumed message %s', message)
@@ -534,11 +574,9 @@ class TornadoConnection(object):
         error_message = build_raw_error_message(error)
         write_future = self.writer.put(error_message)
         write_future.add_done_callback(
-            lambda f: IOLoop.current().add_callback(
-                self.tchannel.event_emitter.fire(
-                    EventType.after_send_error,
-                    error,
-                )
+            lambda f: self.tchannel.event_emitter.fire(
+                EventType.after_send_error,
+                error,
             )
         )
         return write_future
@@ -549,6 +587,72 @@ class TornadoConnection(object):
     def pong(self):
         return self.writer.put(messages.PingResponseMessage())
 
+    def send_cancel(self, message_id, ttl=None, tracing=None, why=None):
+        """Ask the remote host to stop processing a request.
+
+        :param message_id:
+            ID of the request that was abandoned.
+        :param ttl:
+            TTL (in seconds) of the abandoned request.
+        :param tracing:
+            Tracing information of the abandoned request.
+        :param why:
+            Human-readable reason for the cancellation.
+        :returns:
+            A future that resolves when the write finishes.
+        """
+        return self.writer.put(messages.CancelMessage(
+            id=message_id,
+            ttl=int((ttl or 0) * 1000),
+            tracing=tracing,
+            why=why,
+        ))
+
+    def send_claim(self, ttl=None, tracing=None):
+        """Tell the remote host that a speculative request was claimed.
+
+        The remote host stops processing its copy of the request with the
+        same tracing information.
+
+        :param ttl:
+            TTL (in seconds) of the claimed request.
+        :param tracing:
+            Tracing information of the claimed request.
+        :returns:
+            A future that resolves when the write finishes.
+        """
+        return self.writer.put(messages.ClaimMessage(
+            id=self.writer.next_message_id(),
+            ttl=int((ttl or 0) * 1000),
+            tracing=tracing,
+        ))
+
+    def track_inbound_call(self, message_id, cancel_token):
+        """Start tracking an incoming call that is being processed.
+
+        :param message_id:
+            ID of the incoming request.
+        :param cancel_token:
+            CancellationToken to trigger if the caller cancels the request.
+        """
+        self._inbound_pending_call[message_id] = cancel_token
+
+    def untrack_inbound_call(self, message_id):
+        """Stop tracking an incoming call once it has been processed."""
+        self._inbound_pending_call.pop(message_id, None)
+
+    def cancel_inbound_call(self, message_id, why=None):
+        """Cancel an incoming call that is still being processed.
+
+        :returns:
+            True if a call with the given ID was being processed.
+        """
+        cancel_token = self._inbound_pending_call.pop(message_id, None)
+        if cancel_token is None:
+            return False
+        cancel_token.cancel(why)
+        return True
+
     def add_pending_outbound(self):
         self.total_outbound_pendings += 1
         if self._outbound_pending_change_cb:
@@ -559,6 +663,35 @@ class TornadoConnection(object):
         if self._outbound_pending_change_cb:
             self._outbound_pending_change_cb()
 
+    def stats(self):
+        """Get a snapshot of what is queued up on this connection.
+
+        :returns:
+            A dict with the ``direction`` (``'in'`` or ``'out'``) and
+            ``hostport`` of the connection, the number of frames waiting to
+            be written (``writer_queue``), of frames read but not yet parsed
+            (``reader_queue``), of incoming messages waiting to be handled
+            (``inbound_backlog``), the bytes buffered by the IOStream, the
+            outstanding calls in each direction and the tombstones of
+            timed-out requests.
+        """
+        stream = self.connection
+        return {
+            'direction': 'out' if self.direction is OUTGOING else 'in',
+            'hostport': '%s:%d' % (self.remote_host, self.remote_host_port),
+            'closed': self.closed,
+            'writer_queue': len(self.writer.queue),
+            'reader_queue': len(self.reader.queue),
+            'inbound_backlog': len(self._messages),
+            'read_buffer_bytes': getattr(stream, '_read_buffer_size', 0),
+            'write_buffer_bytes': getattr(stream, '_write_buffer_size', 0),
+            'outbound_pending': self.total_outbound_pendings,
+            'outbound_calls': len(self._outbound_pending_call),
+            'inbound_calls': len(self._inbound_pending_call),
+            'tombstones': len(self._request_tombstones),
+            'absorbed': self._request_tombstones.absorbed,
+        }
+
 
 class StreamConnection(TornadoConnection):
     """Streaming request/response into protocol messages and sent by tornado
@@ -646,6 +779,20 @@ class StreamConnection(TornadoConnection):
 
     def stream_request(self, request, out_future):
         """send the given request and response is not required"""
+        if request.args is not None:
+            # The args are already in memory; write them out right away.
+            message = (self.request_message_factory.
+                       build_raw_request_message(
+                           request, list(request.args), is_completed=True))
+            write_future = self.write(message)
+
+            def on_written(future):
+                if future.exception() and out_future.running():
+                    out_future.set_exc_info(future.exc_info())
+
+            write_future.add_done_callback(on_written)
+            return write_future
+
         request.close_argstreams()
 
         def on_done(future):
@@ -676,9 +823,17 @@ class StreamConnection(TornadoConnection):
         future = tornado.gen.Future()
         self._outbound_pending_call[request.id] = future
         self.add_pending_outbound()
-        self.stream_request(request, future).add_done_callback(
+        stream_future = self.stream_request(request, future)
+        stream_future.add_done_callback(
             lambda f: self.remove_pending_outbound()
         )
+        timings = request.timings
+        if timings is not None:
+            def on_written(f):
+                if not f.exception():
+                    timings.mark('written')
+
+            stream_future.add_done_callback(on_written)
 
         if request.ttl:
             self._add_timeout(request, future)
@@ -705,12 +860,49 @@ class StreamConnection(TornadoConnection):
         else:
             response = f.result()
             response.tracing = request.tracing
+            if request.timings is not None:
+                request.timings.mark('received')
             response_future.set_result(response)
 
     def remove_outstanding_request(self, request):
         """Remove request from pending request list"""
         self._outbound_pending_call.pop(request.id, None)
 
+    def cancel_request(self, request, why=None):
+        """Abandon an outgoing request.
+
+        The pending response for the request fails with a ``CanceledError``
+        and the remote host is asked to stop working on the request. Messages
+        received for the request afterwards are ignored.
+
+        :param request:
+            Request that was sent with ``send_request``.
+        :param why:
+            Human-readable reason for the cancellation.
+        :returns:
+            True if the request was still pending.
+        """
+        future = self._outbound_pending_call.pop(request.id, None)
+        if future is None:
+            return False
+
+        if future.running():
+            future.set_exception(errors.CanceledError(
+                'request to service %s through %s:%d was canceled: %s' % (
+                    str(request.service),
+                    str(self.remote_host),
+                    self.remote_host_port,
+                    why,
+                ),
+                id=request.id,
+                tracing=request.tracing,
+            ))
+
+        self._request_tombstones.add(request.id, request.ttl)
+        if not self.closed:
+            self.send_cancel(request.id, request.ttl, request.tracing, why)
+        return True
+
     def _add_timeout(self, request, future):
         """Adds a timeout for the given request to the given future."""
         io_loop = IOLoop.current()
@@ -720,6 +912,7 @@ class StreamConnection(TornadoConnection):
             request.id,
             request.service,
             request.ttl,
+            request.tracing,
             future,
         )
         io_loop.add_future(future, lambda f: io_loop.remove_timeout(t))
@@ -727,7 +920,9 @@ class StreamConnection(TornadoConnection):
         # forget about it, especially because we want to avoid memory
         # leaks with very large timeouts.
 
-    def _request_timed_out(self, req_id, req_service, req_ttl, future):
+    def _request_timed_out(
+        self, req_id, req_service, req_ttl, req_tracing, future
+    ):
         if not future.running():  # Already done.
             return
 
@@ -745,13 +940,19 @@ class StreamConnection(TornadoConnection):
         self._request_tombstones.add(req_id, req_ttl)
         self._outbound_pending_call.pop(req_id)
 
+        # Let the server know that nobody is waiting for the response anymore.
+        if not self.closed:
+            self.send_cancel(req_id, req_ttl, req_tracing, 'timeout')
+
 
 class Reader(object):
 
-    def __init__(self, io_stream):
+    def __init__(self, io_stream, tap=None):
         self.queue = queues.Queue()
         self.filling = False
         self.io_stream = io_stream
+        # Called with the raw bytes of every frame read, if set.
+        self.tap = tap
 
     def fill(self):
         self.filling = True
@@ -773,7 +974,7 @@ class Reader(object):
                 lambda f: io_loop.spawn_callback(self.fill),
             )
 
-        read_message(self.io_stream).add_done_callback(keep_reading)
+        read_message(self.io_stream, self.tap).add_done_callback(keep_reading)
 
     def get(self):
         """Receive the next message off the wire.
@@ -802,10 +1003,14 @@ class Reader(object):
 
 class Writer(object):
 
-    def __init__(self, io_stream):
+    def __init__(self, io_stream, queue_wait=None, tap=None):
         self.queue = queues.Queue()
         self.draining = False
         self.io_stream = io_stream
+        # Histogram of the time frames spend in the queue, if any.
+        self.queue_wait = queue_wait
+        # Called with the raw bytes of every frame written, if set.
+        self.tap = tap
         # Tracks message IDs for this connection.
         self._id_sequence = 0
 
@@ -814,12 +1019,14 @@ class Writer(object):
 
         io_loop = IOLoop.current()
 
-        def on_write(f, done):
+        def on_write(f, dones):
             if f.exception():
                 log.error("write failed", exc_info=f.exc_info())
-                done.set_exc_info(f.exc_info())
+                for done in dones:
+                    done.set_exc_info(f.exc_info())
             else:
-                done.set_result(f.result())
+                for done in dones:
+                    done.set_result(f.result())
 
             io_loop.spawn_callback(next_write)
 
@@ -829,16 +1036,44 @@ class Writer(object):
                 log.error("queue get failed", exc_info=f.exc_info())
                 return
 
-            message, done = f.result()
+            message, done, queued_at = f.result()
+            bodies, dones = [message], [done]
+            queue_wait = self.queue_wait
+            if queue_wait is not None:
+                dequeued_at = now()
+                queue_wait.record(dequeued_at - queued_at)
+
+            # Frames queued while we were waiting are pipelined into the
+            # same write.
+            size = len(message)
+            while size < MAX_COALESCED_WRITE_SIZE:
+                try:
+                    message, done, queued_at = self.queue.get_nowait()
+                except queues.QueueEmpty:
+                    break
+                if queue_wait is not None:
+                    queue_wait.record(dequeued_at - queued_at)
+                bodies.append(message)
+                dones.append(done)
+                size += len(message)
+
+            if self.tap is not None:
+                for body in bodies:
+                    self.tap(body)
+
             try:
                 # write() may raise if the stream was closed while we were
                 # waiting for an entry in the queue.
-                write_future = self.io_stream.write(message)
+                write_future = self.io_stream.write(
+                    bodies[0] if len(bodies) == 1 else b''.join(bodies)
+                )
             except Exception:
                 io_loop.spawn_callback(next_write)
-                done.set_exc_info(sys.exc_info())
+                exc_info = sys.exc_info()
+                for done in dones:
+                    done.set_exc_info(exc_info)
             else:
-                io_loop.add_future(write_future, lambda f: on_write(f, done))
+                io_loop.add_future(write_future, lambda f: on_write(f, dones))
 
         def next_write():
             if self.io_stream.closed():
@@ -893,7 +1128,11 @@ class Writer(object):
                 done_writing_future.set_exc_info(f.exc_info())
 
         self.queue.put(
-            (body, done_writing_future)
+            (
+                body,
+                done_writing_future,
+                now() if self.queue_wait is not None else None,
+            )
         ).add_done_callback(on_queue_error)
         return done_writing_future
 
@@ -903,11 +1142,13 @@ class Writer(object):
 FRAME_SIZE_WIDTH = frame.frame_rw.size_rw.width()
 
 
-def read_message(stream):
+def read_message(stream, tap=None):
     """Reads a message from the given IOStream.
 
     :param IOStream stream:
         IOStream to read from.
+    :param tap:
+        Function called with the raw bytes of the frame, if any.
     """
     answer = tornado.gen.Future()
     io_loop = IOLoop.current()
@@ -917,11 +1158,13 @@ def read_message(stream):
         return answer.set_exc_info(future.exc_info())
 
     @fail_to(answer)
-    def on_body(size, future):
+    def on_body(size_bytes, size, future):
         if future.exception():
             return on_error(future)
 
         body = future.result()
+        if tap is not None:
+            tap(size_bytes + body)
         f = frame.frame_rw.read(BytesIO(body), size=size)
         message_type = f.header.message_type
         message_rw = messages.RW.get(message_type)
@@ -944,7 +1187,7 @@ def read_message(stream):
         size = frame.frame_rw.size_rw.read(BytesIO(size_bytes))
         io_loop.add_future(
             stream.read_bytes(size - FRAME_SIZE_WIDTH),
-            lambda f: on_body(size, f)
+            lambda f: on_body(size_bytes, size, f)
         )
 
     try:
@@ -22,7 +22,9 @@ from __future__ import absolute_import
 
 import logging
 import sys
+import time
 from collections import namedtuple
+from collections import OrderedDict
 import six
 
 import tornado
@@ -33,19 +35,52 @@ from tornado.iostream import StreamClosedError
 from tchannel.request import Request
 from tchannel.request import TransportHeaders
 from tchannel.response import response_from_mixed
+from tchannel.streaming import ArgReader
+from tchannel.streaming import DEFAULT_BUFFER_SIZE
+from tchannel.streaming import StreamingRequest
+from tchannel.streaming import StreamingResponse
+from ..cancellation import CancellationToken
 from ..errors import BadRequestError
+from ..errors import CanceledError
+from ..errors import DeclinedError
 from ..errors import UnexpectedError
 from ..errors import TChannelError
 from ..event import EventType
 from ..messages import Types
+from ..profiling import FALLBACK_ENDPOINT
+from ..metrics import Timings
+from ..metrics import now
 from ..serializer.raw import RawSerializer
 from .response import Response as DeprecatedResponse
+from .response import StatusCode
+from .stream import InMemStream
 from .. import tracing
+from .. import transport
 
 log = logging.getLogger('tchannel')
 
 
-Handler = namedtuple('Handler', 'endpoint req_serializer resp_serializer')
+Handler = namedtuple(
+    'Handler', 'endpoint req_serializer resp_serializer streaming'
+)
+
+# A speculative request that is being processed. ``claimed`` is True if we
+# already claimed the request on the other peers it was sent to.
+SpeculativeCall = namedtuple(
+    'SpeculativeCall', 'request connection hostport claimed'
+)
+
+# Maximum number of claims remembered for speculative requests that haven't
+# arrived yet.
+MAX_EARLY_CLAIMS = 1024
+
+
+def _not_found_error(request):
+    return BadRequestError(
+        description="Endpoint '%s' is not defined" % (
+            request.endpoint,
+        ),
+    )
 
 
 class RequestDispatcher(object):
@@ -68,12 +103,31 @@ class RequestDispatcher(object):
 
     def __init__(self, _handler_returns_response=False):
         self.handlers = {}
+
+        # Maps (raw arg1, arg scheme) to (handler, endpoint name) for every
+        # registered endpoint, so that calls are routed without decoding
+        # arg1 or checking the arg scheme separately.
+        self._routes = {}
+
         self.register(self.FALLBACK, self.not_found)
         self._handler_returns_response = _handler_returns_response
 
+        # Speculative requests being processed, keyed by their tracing IDs.
+        self._speculative_calls = {}
+
+        # Claims received for speculative requests before the requests
+        # themselves. Maps tracing IDs to (claimant, expiry).
+        self._early_claims = OrderedDict()
+
+        #: :py:class:`tchannel.profiling.HandlerTimes` that records how long
+        #: calls take to handle, while a profile is running.
+        self.handler_times = None
+
     _HANDLER_NAMES = {
         Types.CALL_REQ: 'pre_call',
-        Types.CALL_REQ_CONTINUE: 'pre_call'
+        Types.CALL_REQ_CONTINUE: 'pre_call',
+        Types.CANCEL: 'cancel',
+        Types.CLAIM: 'claim',
     }
 
     def handle(self, message, connection):
@@ -117,6 +171,114 @@ class RequestDispatcher(object):
                 e.tracing = req.tracing
             connection.send_error(e)
 
+    def handle_cancel(self, message, connection):
+        """Handle incoming CancelMessage.
+
+        The caller is no longer waiting for the response of the request with
+        the same ID. The request's cancellation token is triggered and its
+        response is dropped.
+
+        :param message: CancelMessage
+        :param connection: tornado connection
+        """
+        if not connection.cancel_inbound_call(message.id, message.why):
+            log.debug('Received cancel for unknown request %d.', message.id)
+
+    def handle_claim(self, message, connection):
+        """Handle incoming ClaimMessage.
+
+        Another peer that received the same speculative request has claimed
+        it. Our copy of the request is declined if it's being processed, or
+        when it arrives if we haven't received it yet.
+
+        If both peers claimed the request at the same time, the peer with the
+        lower host-port keeps it.
+
+        :param message: ClaimMessage
+        :param connection: tornado connection
+        """
+        if not message.tracing.trace_id:
+            # Requests are matched to claims by their tracing IDs, which
+            # some clients leave empty.
+            log.debug('Ignored claim without a trace ID.')
+            return
+
+        claimant = '%s:%d' % (
+            connection.remote_host, connection.remote_host_port
+        )
+        key = (message.tracing.trace_id, message.tracing.span_id)
+
+        call = self._speculative_calls.get(key)
+        if call is None:
+            self._add_early_claim(key, claimant, message.ttl / 1000.0)
+            return
+
+        if call.claimed and call.hostport < claimant:
+            log.debug('Ignored claim from %s; we claimed first.', claimant)
+            return
+
+        self._decline(call.request, call.connection, claimant)
+
+    @staticmethod
+    def _decline(request, connection, claimant):
+        """Abandon a speculative request that another peer claimed.
+
+        The caller is answered with a Declined error right away so that it
+        stops waiting for this copy of the request.
+        """
+        why = 'claimed by %s' % claimant
+        if not request.cancel_token.cancel(why):
+            return
+
+        connection.send_error(DeclinedError(
+            description="Request to '%s' was %s." % (request.endpoint, why),
+            id=request.id,
+            tracing=request.tracing,
+        ))
+
+    def _add_early_claim(self, key, claimant, ttl):
+        now = time.time()
+        claims = self._early_claims
+        while claims and (
+            len(claims) >= MAX_EARLY_CLAIMS or
+            next(iter(claims.values()))[1] <= now
+        ):
+            claims.popitem(last=False)
+        claims[key] = (claimant, now + ttl)
+
+    def _pop_early_claim(self, key):
+        claimant, expiry = self._early_claims.pop(key, (None, 0))
+        if expiry <= time.time():
+            return None
+        return claimant
+
+    @staticmethod
+    def _send_claims(tchannel, hostports, request):
+        """Claim the request on the other peers it was sent to.
+
+        :param hostports:
+            Comma-separated host-ports of the peers to claim the request on.
+        """
+
+        def send_claim(hostport, future):
+            if future.exception():
+                log.info(
+                    'Failed to claim request to %s on %s.',
+                    request.endpoint, hostport,
+                )
+                return
+            future.result().send_claim(request.ttl, request.tracing)
+
+        for hostport in hostports.split(','):
+            if not hostport or hostport == tchannel.hostport:
+                continue
+            # Like incoming connections, claimed peers must not be added to
+            # the peer heap.
+            peer = tchannel.peers.get_isolated(hostport)
+            peer.connect().add_done_callback(
+                lambda f, hostport=hostport: send_claim(hostport, f)
+            )
+
     @tornado.gen.coroutine
     def handle_call(self, request, connection):
         # read arg_1 so that handle_call is able to get the endpoint
@@ -126,44 +288,69 @@ class RequestDispatcher(object):
         # NOTE: after here, the correct way to access value of arg_1 is through
         # request.endpoint. The original argstream[0] is no longer valid. If
         # user still tries read from it, it will return empty.
-        chunk = yield request.argstreams[0].read()
-        while chunk:
-            if six.PY3:
-                if isinstance(request.endpoint, str) and \
-                        isinstance(chunk, bytes):
-                    chunk = chunk.decode('utf8')
-
-            request.endpoint += chunk
+        tchannel = connection.tchannel
+        timings = None
+        if tchannel.timings:
+            timings = request.timings = Timings()
+
+        if request.args is not None:
+            arg1 = request.args[0]
+        else:
+            chunks = []
             chunk = yield request.argstreams[0].read()
+            while chunk:
+                chunks.append(chunk)
+                chunk = yield request.argstreams[0].read()
+            arg1 = b''.join(chunks)
 
-        log.debug('Received a call to %s.', request.endpoint)
+        requested_as = request.headers.get('as', None)
+        route = self._routes.get((arg1, requested_as))
+        if route is not None:
+            handler, request.endpoint = route
+        elif six.PY3:
+            request.endpoint = arg1.decode('utf8')
+        else:
+            request.endpoint = arg1
 
-        tchannel = connection.tchannel
+        log.debug('Received a call to %s.', request.endpoint)
 
         yield tchannel.event_emitter.fire(
             EventType.before_receive_request, request)
 
-        handler = self.get_endpoint(request.endpoint)
-
-        requested_as = request.headers.get('as', None)
-        expected_as = handler.req_serializer.name
-
-        if request.endpoint in self.handlers and requested_as != expected_as:
-            connection.send_error(BadRequestError(
-                description=(
-                    "Server expected a '%s' but request is '%s'"
-                    % (
-                        expected_as,
-                        requested_as,
-                    )
-                ),
-                id=request.id,
-                tracing=request.tracing,
-            ))
-
-            raise gen.Return(None)
+        if route is None:
+            handler = self.handlers.get(request.endpoint)
+            if handler is not None:
+                error = BadRequestError(
+                    description=(
+                        "Server expected a '%s' but request is '%s'"
+                        % (
+                            handler.req_serializer.name,
+                            requested_as,
+                        )
+                    ),
+                )
+            else:
+                handler = self.handlers[self.FALLBACK]
+                error = None
+                if handler.endpoint is self.not_found:
+                    error = _not_found_error(request)
+
+            if error is not None:
+                # Reject the call before anything is set up to process it.
+                error.id = request.id
+                error.tracing = request.tracing
+                connection.send_error(error)
+                raise gen.Return(None)
 
         request.serializer = handler.req_serializer
+        argstreams = None
+        if handler.streaming:
+            # Bounded buffers so that writes wait for the connection.
+            argstreams = [
+                InMemStream(),
+                InMemStream(max_buffer_size=DEFAULT_BUFFER_SIZE),
+                InMemStream(max_buffer_size=DEFAULT_BUFFER_SIZE),
+            ]
         response = DeprecatedResponse(
             id=request.id,
             checksum=request.checksum,
@@ -171,6 +358,7 @@ class RequestDispatcher(object):
             connection=connection,
             headers={'as': request.headers.get('as', 'raw')},
             serializer=handler.resp_serializer,
+            argstreams=argstreams,
         )
 
         def _on_post_response(future):
@@ -182,21 +370,112 @@ class RequestDispatcher(object):
             if isinstance(future.exception(), StreamClosedError):
                 return
 
+            # The request was canceled and the response dropped on purpose.
+            if isinstance(future.exception(), CanceledError):
+                return
+
             log.error('failed to write response', exc_info=future.exc_info())
 
         connection.post_response(response).add_done_callback(_on_post_response)
 
+        def _on_cancel(why):
+            # Stop writing the response. The caller will ignore it anyway.
+            response.set_exception(CanceledError(
+                description="Request to '%s' was canceled: %s" % (
+                    request.endpoint, why,
+                ),
+                id=request.id,
+                tracing=request.tracing,
+            ))
+
+        cancel_token = request.cancel_token = CancellationToken()
+        cancel_token.add_callback(_on_cancel)
+        connection.track_inbound_call(request.id, cancel_token)
+
+        # Speculative requests are sent to multiple peers. The first peer to
+        # claim the request tells the others to abandon it. Requests are
+        # matched to claims by their tracing IDs, so requests without any,
+        # which some clients send, are simply processed.
+        claim_at_start = request.headers.get(transport.CLAIM_AT_START)
+        claim_at_finish = request.headers.get(transport.CLAIM_AT_FINISH)
+        speculative_key = None
+        if (claim_at_start or claim_at_finish) and request.tracing.trace_id:
+            speculative_key = (
+                request.tracing.trace_id, request.tracing.span_id
+            )
+            claimant = self._pop_early_claim(speculative_key)
+            if claimant:
+                self._decline(request, connection, claimant)
+                connection.untrack_inbound_call(request.id)
+                raise gen.Return(response)
+
+            self._speculative_calls[speculative_key] = SpeculativeCall(
+                request=request,
+                connection=connection,
+                hostport=tchannel.hostport,
+                claimed=bool(claim_at_start),
+            )
+            if claim_at_start:
+                self._send_claims(tchannel, claim_at_start, request)
+
+        metrics = tchannel.metrics
+        if metrics is not None:
+            # Calls handled by the fallback are counted without an endpoint.
+            call_metrics = metrics.inbound(
+                request.headers.get('cn'),
+                request.service,
+                None if route is None else request.endpoint,
+            )
+            call_metrics.calls.inc()
+            started = now()
+            if timings is not None:
+                timings.metrics = call_metrics
+        if timings is not None:
+            timings.mark('routed')
+        handler_times = self.handler_times
+        if handler_times is not None:
+            handler_started = now()
+
         tracer = tracing.ServerTracer(
             tracer=tchannel.tracer, operation_name=request.endpoint
         )
         tracer.start_basic_span(request)
 
         try:
+            # Streaming impl - the handler reads the request and writes the
+            # response incrementally
+            if self._handler_returns_response and handler.streaming:
+                new_req = StreamingRequest(
+                    headers=ArgReader(request.argstreams[1]),
+                    body=ArgReader(request.argstreams[2]),
+                    transport=TransportHeaders.from_dict(request.headers),
+                    endpoint=request.endpoint,
+                    service=request.service,
+                    timeout=request.ttl,
+                    cancel_token=cancel_token,
+                )
+                with tracer.start_span(
+                    request=request, headers={},
+                    peer_host=connection.remote_host,
+                    peer_port=connection.remote_host_port
+                ) as span:
+                    context_provider = tchannel.context_provider_fn()
+                    with context_provider.span_in_context(span):
+                        # Cannot yield while inside the StackContext
+                        f = handler.endpoint(
+                            new_req, StreamingResponse(response)
+                        )
+                    yield gen.maybe_future(f)
+                if timings is not None:
+                    timings.mark('handled')
+
             # New impl - the handler takes a request and returns a response
-            if self._handler_returns_response:
+            elif self._handler_returns_response:
                 # convert deprecated req to new top-level req
                 b = yield request.get_body()
                 he = yield request.get_header()
+                if timings is not None:
+                    timings.mark('read')
                 t = TransportHeaders.from_dict(request.headers)
                 new_req = Request(
                     body=b,
@@ -205,6 +484,7 @@ class RequestDispatcher(object):
                     endpoint=request.endpoint,
                     service=request.service,
                     timeout=request.ttl,
+                    cancel_token=cancel_token,
                 )
                 with tracer.start_span(
                     request=request, headers=he,
@@ -216,6 +496,8 @@ class RequestDispatcher(object):
                         # Cannot yield while inside the StackContext
                         f = handler.endpoint(new_req)
                     new_resp = yield gen.maybe_future(f)
+                if timings is not None:
+                    timings.mark('handled')
 
                 # instantiate a tchannel.Response
                 new_resp = response_from_mixed(new_resp)
@@ -241,13 +523,33 @@ class RequestDispatcher(object):
                         f = handler.endpoint(request, response)
 
                     yield gen.maybe_future(f)
+                if timings is not None:
+                    timings.mark('handled')
 
+            if claim_at_finish and not cancel_token.cancelled:
+                self._send_claims(tchannel, claim_at_finish, request)
             response.flush()
+            if timings is not None:
+                timings.mark('responded')
+            if metrics is not None:
+                if response.code == StatusCode.ok:
+                    call_metrics.successes.inc()
+                else:
+                    call_metrics.app_errors.inc()
         except TChannelError as e:
-            e.tracing = request.tracing
-            e.id = request.id
-            connection.send_error(e)
+            if metrics is not None:
+                call_metrics.system_errors.inc()
+            if cancel_token.cancelled:
+                log.debug(
+                    'Dropped response for canceled request %d.', request.id
+                )
+            else:
+                e.tracing = request.tracing
+                e.id = request.id
+                connection.send_error(e)
         except Exception as e:
+            if metrics is not None:
+                call_metrics.system_errors.inc()
             # Maintain a reference to our original exc info because we stomp
             # the traceback below.
             exc_info = sys.exc_info()
@@ -272,7 +574,8 @@ class RequestDispatcher(object):
                 response.set_exception(error, exc_info=exc_info)
                 connection.request_message_factory.remove_buffer(response.id)
 
-                connection.send_error(error)
+                if not cancel_token.cancelled:
+                    connection.send_error(error)
                 yield tchannel.event_emitter.fire(
                     EventType.on_exception,
                     request,
@@ -284,6 +587,17 @@ class RequestDispatcher(object):
                 # https://docs.python.org/2/library/sys.html#sys.exc_info
                 del exc_tb
                 del exc_info
+        finally:
+            connection.untrack_inbound_call(request.id)
+            if speculative_key:
+                self._speculative_calls.pop(speculative_key, None)
+            if metrics is not None:
+                call_metrics.latency.record(now() - started)
+            if handler_times is not None:
+                handler_times.record(
+                    FALLBACK_ENDPOINT if route is None else request.endpoint,
+                    now() - handler_started,
+                )
         raise gen.Return(response)
 
     def get_endpoint(self, name):
@@ -299,7 +613,8 @@ class RequestDispatcher(object):
             rule,
             handler,
             req_serializer=None,
-            resp_serializer=None
+            resp_serializer=None,
+            streaming=False,
     ):
         """Register a new endpoint with the given name.
 
@@ -327,18 +642,34 @@ class RequestDispatcher(object):
         :param resp_serializer:
             Arg scheme serializer of this endpoint. It should be
             ``RawSerializer``, ``JsonSerializer``, and ``ThriftSerializer``.
+
+        :param streaming:
+            If True, the handler is called with a ``StreamingRequest`` and a
+            ``StreamingResponse`` instead of buffered request and response
+            objects. See :py:mod:`tchannel.streaming`.
         """
 
         assert handler, "handler must not be None"
         req_serializer = req_serializer or RawSerializer()
         resp_serializer = resp_serializer or RawSerializer()
-        self.handlers[rule] = Handler(handler, req_serializer, resp_serializer)
+        old = self.handlers.get(rule)
+        self.handlers[rule] = Handler(
+            handler, req_serializer, resp_serializer, streaming
+        )
+
+        if rule is self.FALLBACK:
+            return
+
+        arg1 = rule
+        if isinstance(arg1, six.text_type):
+            arg1 = arg1.encode('utf8')
+        if old is not None:
+            self._routes.pop((arg1, old.req_serializer.name), None)
+        self._routes[(arg1, req_serializer.name)] = (
+            self.handlers[rule], rule
+        )
 
     @staticmethod
     def not_found(request, response=None):
         """Default behavior for requests to unrecognized endpoints."""
-        raise BadRequestError(
-            description="Endpoint '%s' is not defined" % (
-                request.endpoint,
-            ),
-        )
+        raise _not_found_error(request)
@@ -170,6 +170,14 @@ class MessageFactory(object):
 
         return args
 
+    @staticmethod
+    def buffered_args(message):
+        """Get the args of a message that isn't fragmented as bytes."""
+        args = list(message.args)
+        while len(args) < CallContinueMessage.max_args_num:
+            args.append(b"")
+        return args
+
     def build_request(self, message):
         """Build inbound request object from protocol level message info.
 
@@ -179,6 +187,19 @@ class MessageFactory(object):
         :param message: CallRequestMessage
         :return: request object
         """
+        if message.flags == FlagsType.none:
+            # The whole request is in this frame; keep the args as they are.
+            return Request(
+                flags=message.flags,
+                ttl=message.ttl / 1000.0,
+                tracing=message.tracing,
+                service=message.service,
+                headers=message.headers,
+                checksum=message.checksum,
+                args=self.buffered_args(message),
+                id=message.id,
+                rewindable=False,
+            )
 
         args = self.prepare_args(message)
 
@@ -192,6 +213,7 @@ class MessageFactory(object):
             checksum=message.checksum,
             argstreams=args,
             id=message.id,
+            rewindable=False,
         )
         return req
 
@@ -205,6 +227,17 @@ class MessageFactory(object):
         :return: response object
         """
 
+        if message.flags == FlagsType.none:
+            # The whole response is in this frame; keep the args as they are.
+            return Response(
+                flags=message.flags,
+                code=message.code,
+                headers=message.headers,
+                checksum=message.checksum,
+                args=self.buffered_args(message),
+                id=message.id,
+            )
+
         args = self.prepare_args(message)
 
         # TODO decide what to pass to Response from message
@@ -240,6 +273,9 @@ class MessageFactory(object):
             self.verify_message(message)
 
             context = self.build_context(message)
+            if context.args is not None:
+                return context
+
             # streaming message
             if message.flags == common.FlagsType.fragment:
                 self.message_buffer[message.id] = context
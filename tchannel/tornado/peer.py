@@ -34,26 +34,35 @@ from tchannel.tracing import ClientTracer
 from tornado import gen
 from tornado.iostream import StreamClosedError
 
+from .. import transport
+
 from ..schemes import DEFAULT as DEFAULT_SCHEME
 from ..retry import (
-    DEFAULT as DEFAULT_RETRY, DEFAULT_RETRY_LIMIT
+    DEFAULT as DEFAULT_RETRY, DEFAULT_RETRY_LIMIT, NEVER as NEVER_RETRY
 )
+from ..errors import DeclinedError
 from ..errors import NoAvailablePeerError
 from ..errors import TChannelError
 from ..errors import NetworkError
 from ..event import EventType
 from ..glossary import DEFAULT_TIMEOUT
+from ..metrics import now
 from ..peer_heap import PeerHeap
 from ..peer_strategy import PreferIncomingCalculator
 from .connection import StreamConnection
 from .connection import INCOMING, OUTGOING
 from .request import Request
+from .response import StatusCode
 from .stream import InMemStream
 from .stream import read_full
 from .stream import maybe_stream
+from .stream import to_bytes
 
 log = logging.getLogger('tchannel')
 
+# Args of these types are sent straight from memory.
+_BUFFER_TYPES = (bytes, bytearray, six.text_type)
+
 
 class Peer(object):
     """A Peer manages connections to or from a specific host-port."""
@@ -356,6 +365,8 @@ class PeerClientOperation(object):
         headers=None,
         retry_limit=None,
         ttl=None,
+        speculative=None,
+        timings=None,
     ):
         """Make a request to the Peer.
 
@@ -375,6 +386,12 @@ class PeerClientOperation(object):
            is 0, it means no retry.
         :param ttl:
             Timeout for each request (second).
+        :param speculative:
+            If greater than 1, send the request to this many peers at once
+            instead of retrying it. See ``send_speculative``.
+        :param timings:
+            ``tchannel.metrics.Timings`` to record the phases of the request
+            in, if any.
         :return:
             Future that contains the response from the peer.
         """
@@ -384,18 +401,27 @@ class PeerClientOperation(object):
         # NoAvailablePeerError. Later during retry, if we can't find available
         # peer, we throw exceptions from retry not NoAvailablePeerError.
         peer, connection = yield self._get_peer_connection()
-
-        arg1, arg2, arg3 = (
-            maybe_stream(arg1), maybe_stream(arg2), maybe_stream(arg3)
-        )
+        if timings is not None:
+            timings.mark('connected')
+
+        args = None
+        if all(a is None or isinstance(a, _BUFFER_TYPES)
+               for a in (arg1, arg2, arg3)):
+            # Everything is in memory; skip the streams altogether.
+            args = [to_bytes(arg1), to_bytes(arg2), to_bytes(arg3)]
+            endpoint = args[0]
+        else:
+            arg1, arg2, arg3 = (
+                maybe_stream(arg1), maybe_stream(arg2), maybe_stream(arg3)
+            )
+            # hack to get endpoint from arg_1 for trace name
+            arg1.close()
+            endpoint = yield read_full(arg1)
 
         if retry_limit is None:
             retry_limit = DEFAULT_RETRY_LIMIT
 
         ttl = ttl or DEFAULT_TIMEOUT
-        # hack to get endpoint from arg_1 for trace name
-        arg1.close()
-        endpoint = yield read_full(arg1)
 
         # set default transport headers
         headers = headers or {}
@@ -409,29 +435,58 @@ class PeerClientOperation(object):
                 hostport=self._hostport, encoding=self.headers.get('as')
             )
 
+        speculative = speculative or 0
+        if self._hostport:
+            retry_limit = 0
+            speculative = 0
+        if headers.get('re') == NEVER_RETRY:
+            retry_limit = 0
+
         request = Request(
             service=self.service,
-            argstreams=[InMemStream(endpoint), arg2, arg3],
+            args=args,
+            argstreams=(
+                None if args is not None
+                else [InMemStream(endpoint), arg2, arg3]
+            ),
             id=connection.writer.next_message_id(),
             headers=headers,
             endpoint=endpoint,
             ttl=ttl,
-            tracing=tracing.span_to_tracing_field(self.tracing_span)
+            tracing=tracing.span_to_tracing_field(self.tracing_span),
+            # Only keep copies of the args if they may be sent again.
+            rewindable=retry_limit > 0 or speculative > 1,
+            timings=timings,
         )
 
         # only retry on non-stream request
-        if request.is_streaming_request or self._hostport:
-            retry_limit = 0
-
         if request.is_streaming_request:
+            retry_limit = 0
             request.ttl = 0
+            speculative = 0
+
+        metrics = self.tchannel.metrics
+        if metrics is not None:
+            call_metrics = metrics.outbound(
+                headers.get('cn'), self.service, endpoint
+            )
+            call_metrics.calls.inc()
+            started = now()
 
         try:
             with self.tracing_span:  # to ensure span is finished
-                response = yield self.send_with_retry(
-                    request, peer, retry_limit, connection
-                )
+                if speculative > 1:
+                    response = yield self.send_speculative(
+                        request, peer, connection, speculative
+                    )
+                else:
+                    response = yield self.send_with_retry(
+                        request, peer, retry_limit, connection
+                    )
         except Exception as e:
+            if metrics is not None:
+                call_metrics.latency.record(now() - started)
+                call_metrics.system_errors.inc()
             # event: on_exception
             exc_info = sys.exc_info()
             yield self.tchannel.event_emitter.fire(
@@ -439,6 +494,13 @@ class PeerClientOperation(object):
             )
             six.reraise(*exc_info)
 
+        if metrics is not None:
+            call_metrics.latency.record(now() - started)
+            if response.code == StatusCode.ok:
+                call_metrics.successes.inc()
+            else:
+                call_metrics.app_errors.inc()
+
         log.debug("Got response %s", response)
 
         raise gen.Return(response)
@@ -449,10 +511,19 @@ class PeerClientOperation(object):
         yield self.tchannel.event_emitter.fire(
             EventType.before_send_request, req,
         )
+        metrics = self.tchannel.metrics
+        if metrics is not None:
+            started = now()
         response_future = connection.send_request(req)
 
         try:
-            response = yield response_future
+            try:
+                response = yield response_future
+            finally:
+                if metrics is not None:
+                    metrics.outbound(
+                        req.headers.get('cn'), req.service, req.endpoint
+                    ).attempt_latency.record(now() - started)
         except StreamClosedError as error:
             network_error = NetworkError(
                 id=req.id,
@@ -503,6 +574,101 @@ class PeerClientOperation(object):
                 finally:
                     del tb  # for GC
 
+    @gen.coroutine
+    def send_speculative(self, request, peer, connection, count):
+        """Send copies of a request to up to ``count`` peers at once.
+
+        Every copy carries a claim-at-start header listing the other peers,
+        so the first peer to start working on the request tells the others to
+        abandon it. The first successful response is returned and the
+        remaining copies are canceled. Failed copies are not retried.
+
+        Peers answer the copies claimed by another peer with a Declined
+        error, so if the claimant fails, its error is raised right away.
+
+        :param request:
+            Non-streaming request to send.
+        :param peer:
+            Peer chosen for the request.
+        :param connection:
+            Connection to ``peer``.
+        :param count:
+            Maximum number of peers to send the request to.
+        """
+        targets = [(peer, connection)]
+        blacklist = set([peer.hostport])
+        while len(targets) < count:
+            try:
+                target = yield self._get_peer_connection(blacklist)
+            except NoAvailablePeerError:
+                break
+            targets.append(target)
+            blacklist.add(target[0].hostport)
+
+        if len(targets) == 1:
+            response = yield self._send(connection, request)
+            raise gen.Return(response)
+
+        hostports = [p.hostport for p, _ in targets]
+        requests = []
+        for peer, connection in targets:
+            if requests:
+                req = Request(
+                    service=request.service,
+                    args=request.args,
+                    argstreams=None if request.args is not None else [
+                        s.clone() for s in request._copy_argstreams
+                    ],
+                    id=connection.writer.next_message_id(),
+                    headers=dict(request.headers),
+                    endpoint=request.endpoint,
+                    ttl=request.ttl,
+                    tracing=request.tracing,
+                )
+            else:
+                req = request
+            req.headers[transport.SPECULATIVE_EXE] = str(len(targets))
+            req.headers[transport.CLAIM_AT_START] = ','.join(
+                h for h in hostports if h != peer.hostport
+            )
+            requests.append((connection, req))
+
+        attempts = {}
+        for connection, req in requests:
+            attempts[self._send(connection, req)] = (connection, req)
+
+        winner = None
+        exc_info = None
+        waiter = gen.WaitIterator(*attempts)
+        while not waiter.done():
+            try:
+                response = yield waiter.next()
+            except TChannelError as error:
+                # Declined copies were claimed by another peer, whose error
+                # is the one that matters.
+                if exc_info is None or isinstance(exc_info[1], DeclinedError):
+                    exc_info = sys.exc_info()
+                connection, req = attempts[waiter.current_future]
+                self.clean_up_outgoing_request(req, connection, error)
+                continue
+            winner = waiter.current_future
+            break
+
+        for future, (connection, req) in attempts.items():
+            if future is winner:
+                continue
+            # Losing copies fail with CanceledError; nobody waits for them.
+            future.add_done_callback(lambda f: f.exception())
+            connection.cancel_request(req, 'speculative request completed')
+
+        if winner is None:
+            try:
+                six.reraise(*exc_info)
+            finally:
+                del exc_info  # for GC
+
+        raise gen.Return(response)
+
     @gen.coroutine
     def _prepare_for_retry(
         self,
@@ -666,8 +832,9 @@ class PeerGroup(object):
         peer.rank = rank
         self.peer_heap.update_peer(peer)
 
-    def _get_isolated(self, hostport):
-        """Get a Peer for the given destination for a request.
+    def get_isolated(self, hostport):
+        """Get a Peer for the given destination without making it a
+        candidate for other requests.
 
         A new Peer is added and returned if one does not already exist for the
         given host-port. Otherwise, the existing Peer is returned.
@@ -729,7 +896,7 @@ class PeerGroup(object):
 
         blacklist = blacklist or set()
         if hostport:
-            return self._get_isolated(hostport)
+            return self.get_isolated(hostport)
 
         return self.peer_heap.smallest_peer(
             (lambda p: p.hostport not in blacklist and not p.is_ephemeral),
@@ -35,7 +35,9 @@ from ..messages.common import ChecksumType
 from ..messages.common import FlagsType
 from ..messages.common import StreamState
 from ..serializer.raw import RawSerializer
+from .stream import FileStream
 from .stream import InMemStream
+from .stream import maybe_stream
 from .util import get_arg
 
 
@@ -61,23 +63,41 @@ class Request(object):
         argstreams=None,
         serializer=None,
         endpoint=None,
+        rewindable=True,
+        args=None,
+        timings=None,
     ):
         self.flags = flags
         self.ttl = ttl
         self.service = service
         self.tracing = tracing or common.random_tracing()
-        # argstreams is a list of InMemStream/PipeStream objects
-        self.argstreams = argstreams or [InMemStream(),
-                                         InMemStream(),
-                                         InMemStream()]
+
+        # args is a list of the three args as bytes for requests that were
+        # built in memory. They're sent without going through argstreams.
+        self.args = args
+        if args is not None:
+            self._argstreams = None
+        else:
+            # argstreams is a list of InMemStream/PipeStream objects
+            self._argstreams = argstreams or [InMemStream(),
+                                              InMemStream(),
+                                              InMemStream()]
         self.checksum = checksum or (ChecksumType.crc32c, 0)
         self.id = id
         self.headers = headers or {}
         self.state = StreamState.init
         self.serializer = serializer or RawSerializer()
 
-        self.is_streaming_request = self._is_streaming_request()
-        if not self.is_streaming_request:
+        self.is_streaming_request = (
+            args is None and self._is_streaming_request()
+        )
+
+        # Untouched copies of the args to resend them from. Clones share the
+        # buffered chunks, which are immutable bytes, so this doesn't copy
+        # the args themselves. Requests that are never resent don't need it,
+        # and neither do requests with bytes args.
+        self._copy_argstreams = None
+        if rewindable and args is None and not self.is_streaming_request:
             self._copy_argstreams = [
                 self.argstreams[0].clone(),
                 self.argstreams[1].clone(),
@@ -86,9 +106,28 @@ class Request(object):
 
         self.endpoint = endpoint or ""
 
+        # Set for incoming requests by the dispatcher. Triggered if the
+        # caller cancels the request.
+        self.cancel_token = None
+
+        # tchannel.metrics.Timings of the call if it's being timed.
+        self.timings = timings
+
+    @property
+    def argstreams(self):
+        if self._argstreams is None:
+            self._argstreams = [maybe_stream(arg) for arg in self.args]
+        return self._argstreams
+
+    @argstreams.setter
+    def argstreams(self, argstreams):
+        self._argstreams = argstreams
+
     def rewind(self, id=None):
         self.id = id
-        if not self.is_streaming_request:
+        if self.args is not None:
+            self._argstreams = None
+        elif self._copy_argstreams is not None:
             self.argstreams = [
                 self._copy_argstreams[0].clone(),
                 self._copy_argstreams[1].clone(),
@@ -102,12 +141,12 @@ class Request(object):
         return self.headers.get('as', None)
 
     def set_exception(self, exception):
-        for stream in self.argstreams:
+        for stream in self._argstreams or ():
             stream.set_exception(exception)
             stream.close()
 
     def close_argstreams(self, force=False):
-        for stream in self.argstreams:
+        for stream in self._argstreams or ():
             if stream.auto_close or force:
                 stream.close()
 
@@ -153,11 +192,15 @@ class Request(object):
         return self.argstreams[2]
 
     def _is_streaming_request(self):
-        """check request is stream request or not"""
+        """check request is stream request or not
+
+        Files have a known size and can be rewound, so they don't count as
+        streams.
+        """
         arg2 = self.argstreams[1]
         arg3 = self.argstreams[2]
-        return not (isinstance(arg2, InMemStream) and
-                    isinstance(arg3, InMemStream) and
+        return not (isinstance(arg2, (InMemStream, FileStream)) and
+                    isinstance(arg3, (InMemStream, FileStream)) and
                     ((arg2.auto_close and arg3.auto_close) or (
                         arg2.state == StreamState.completed and
                         arg3.state == StreamState.completed)))
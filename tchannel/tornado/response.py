@@ -30,6 +30,7 @@ from ..messages.common import FlagsType
 from ..messages.common import StreamState
 from ..serializer.raw import RawSerializer
 from .stream import InMemStream
+from .stream import maybe_stream
 from .util import get_arg
 
 StatusCode = enum(
@@ -58,16 +59,24 @@ class Response(object):
         checksum=None,
         argstreams=None,
         serializer=None,
+        args=None,
     ):
 
         self.flags = flags or FlagsType.none
         self.code = code or StatusCode.ok
         self.tracing = tracing
         self.checksum = checksum or (ChecksumType.crc32c, 0)
-        # argstreams is a list of InMemStream/PipeStream objects
-        self.argstreams = argstreams or [InMemStream(),
-                                         InMemStream(),
-                                         InMemStream()]
+
+        # args is a list of the three args as bytes for responses that were
+        # received in a single frame. Streams are only built if asked for.
+        self.args = args
+        if args is not None:
+            self._argstreams = None
+        else:
+            # argstreams is a list of InMemStream/PipeStream objects
+            self._argstreams = argstreams or [InMemStream(),
+                                              InMemStream(),
+                                              InMemStream()]
         self.headers = headers or {}
         self.id = id
         self.connection = connection
@@ -76,6 +85,16 @@ class Response(object):
 
         self.serializer = serializer or RawSerializer()
 
+    @property
+    def argstreams(self):
+        if self._argstreams is None:
+            self._argstreams = [maybe_stream(arg) for arg in self.args]
+        return self._argstreams
+
+    @argstreams.setter
+    def argstreams(self, argstreams):
+        self._argstreams = argstreams
+
     @property
     def status_code(self):
         return self.code
@@ -232,11 +251,11 @@ class Response(object):
         self.close_argstreams()
 
     def set_exception(self, exception, exc_info=None):
-        for stream in self.argstreams:
+        for stream in self._argstreams or ():
             stream.set_exception(exception, exc_info=exc_info)
             stream.close()
 
     def close_argstreams(self, force=False):
-        for stream in self.argstreams:
+        for stream in self._argstreams or ():
             if stream.auto_close or force:
                 stream.close()
@@ -20,6 +20,10 @@
 
 from __future__ import absolute_import
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import mmap
+import os
 
 import tornado
 import tornado.concurrent
@@ -34,6 +38,15 @@ from ..messages import common
 from ..messages.common import StreamState
 import six
 
+# Largest chunk that MessageFactory sends in a single continue frame without
+# fragmenting it: the payload minus the frame header, the 2-byte arg size and
+# the 3 bytes of slack the fragmenter requires after an arg.
+FRAME_CHUNK_SIZE = common.MAX_PAYLOAD_SIZE - 7
+
+# Threads that FileSinks write on by default, so that a slow disk doesn't
+# block the IOLoop. Threads are only started once something is written.
+_file_writer = ThreadPoolExecutor(max_workers=4)
+
 
 @tornado.gen.coroutine
 def read_full(stream):
@@ -99,17 +112,24 @@ class Stream(object):
 
 class InMemStream(Stream):
 
-    def __init__(self, buf=None, auto_close=True):
+    def __init__(self, buf=None, auto_close=True, max_buffer_size=None):
         """In-Memory based stream
 
         :param buf: the buffer for the in memory stream
+        :param max_buffer_size:
+            If set, futures returned by ``write`` don't resolve until the
+            reader has brought the buffered data down to this many bytes.
         """
         self._stream = deque()
+        self._buffer_size = 0
         if buf:
             self._stream.append(buf)
+            self._buffer_size = len(buf)
         self.state = StreamState.init
         self._condition = Condition()
+        self._drained = Condition()
         self.auto_close = auto_close
+        self.max_buffer_size = max_buffer_size
 
         self.exception = None
         self.exc_info = None
@@ -118,7 +138,9 @@ class InMemStream(Stream):
         new_stream = InMemStream()
         new_stream.state = self.state
         new_stream.auto_close = self.auto_close
+        new_stream.max_buffer_size = self.max_buffer_size
         new_stream._stream = deque(self._stream)
+        new_stream._buffer_size = self._buffer_size
         return new_stream
 
     def read(self):
@@ -135,22 +157,30 @@ class InMemStream(Stream):
 
             while len(self._stream) and len(chunk) < common.MAX_PAYLOAD_SIZE:
                 new_chunk = self._stream.popleft()
+                self._buffer_size -= len(new_chunk)
                 if six.PY3 and isinstance(new_chunk, str):
                     new_chunk = new_chunk.encode('utf8')
                 chunk += new_chunk
 
+            if (self.max_buffer_size is not None and
+                    self._buffer_size <= self.max_buffer_size):
+                self._drained.notify_all()
+
             future.set_result(chunk)
             return future
 
         read_future = tornado.concurrent.Future()
 
+        def on_ready(f):
+            # Don't return the future; the IOLoop would treat a failed read
+            # as an error in the callback itself.
+            if not f.exception():
+                read_chunk(read_future)
+
         # We're not ready yet
         if self.state != StreamState.completed and not len(self._stream):
             wait_future = self._condition.wait()
-            tornado.ioloop.IOLoop.current().add_future(
-                wait_future,
-                lambda f: f.exception() or read_chunk(read_future)
-            )
+            tornado.ioloop.IOLoop.current().add_future(wait_future, on_ready)
             return read_future
 
         return read_chunk(read_future)
@@ -164,8 +194,14 @@ class InMemStream(Stream):
 
         if chunk:
             self._stream.append(chunk)
+            self._buffer_size += len(chunk)
             self._condition.notify()
 
+        if (self.max_buffer_size is not None and
+                self._buffer_size > self.max_buffer_size):
+            # Resolves once the reader catches up or the stream is closed.
+            return self._drained.wait()
+
         # This needs to return a future to match the async interface.
         r = tornado.concurrent.Future()
         r.set_result(None)
@@ -179,6 +215,7 @@ class InMemStream(Stream):
     def close(self):
         self.state = StreamState.completed
         self._condition.notify()
+        self._drained.notify_all()
 
 
 class PipeStream(Stream):
@@ -188,7 +225,7 @@ class PipeStream(Stream):
 
         NOTE: reading from or writing to files, use os.open to get the file
         descriptor instead of python's open. Socket file descriptors and
-        others are fine.
+        others are fine. For regular files, prefer FileStream and FileSink.
 
         when you use os.pipe to generate one write pipe and one read pipe, you
         need to pass both of them into init method.
@@ -263,6 +300,177 @@ class PipeStream(Stream):
             self._rs.close()
 
 
+class FileStream(Stream):
+
+    def __init__(self, path, offset=0, length=None, chunk_size=None):
+        """Stream that serves the contents of a file.
+
+        The file is memory-mapped and read in zero-copy ``memoryview``
+        chunks that fit in a single frame. Clones share the mapping, so
+        retrying a request doesn't read or copy the file again.
+
+        :param path: path of the file to read
+        :param offset: position in the file to start reading at
+        :param length: number of bytes to read; defaults to the rest of file
+        :param chunk_size: size of the chunks returned by ``read``
+        """
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            # Empty files can't be mapped.
+            self._mmap = (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                if size else None
+            )
+        # Python 2 mmaps don't support memoryview; slicing them copies.
+        self._view = (
+            memoryview(self._mmap) if six.PY3 and self._mmap else self._mmap
+        )
+
+        self._position = min(offset, size)
+        if length is None:
+            self._end = size
+        else:
+            self._end = min(self._position + length, size)
+        self.chunk_size = chunk_size or FRAME_CHUNK_SIZE
+
+        # Nothing is written to a FileStream, so it's complete from the start.
+        self.state = StreamState.completed
+        self.auto_close = True
+
+        self.exception = None
+        self.exc_info = None
+
+    def __len__(self):
+        """Number of bytes left to read."""
+        return self._end - self._position
+
+    def clone(self):
+        new_stream = FileStream.__new__(FileStream)
+        new_stream._mmap = self._mmap
+        new_stream._view = self._view
+        new_stream._position = self._position
+        new_stream._end = self._end
+        new_stream.chunk_size = self.chunk_size
+        new_stream.state = self.state
+        new_stream.auto_close = self.auto_close
+        new_stream.exception = None
+        new_stream.exc_info = None
+        return new_stream
+
+    def read(self):
+        future = tornado.concurrent.Future()
+        if self.exception:
+            if self.exc_info:
+                future.set_exc_info(self.exc_info)
+            else:
+                future.set_exception(self.exception)
+            return future
+
+        start = self._position
+        end = min(start + self.chunk_size, self._end)
+        if start >= end:
+            future.set_result(b"")
+            return future
+
+        self._position = end
+        future.set_result(self._view[start:end])
+        return future
+
+    def write(self, chunk):
+        raise UnexpectedError("FileStream is read-only.")
+
+    def set_exception(self, exception, exc_info=None):
+        self.exception = exception
+        self.exc_info = exc_info
+        self.close()
+
+    def close(self):
+        # The mapping is shared with clones; it's released once none of them
+        # are referenced.
+        self.state = StreamState.completed
+
+
+class FileSink(Stream):
+
+    def __init__(self, path, executor=None):
+        """Stream that writes everything written to it into a file.
+
+        Use this to store a large argument on disk as it's received instead
+        of holding it in memory. The file is created or truncated.
+
+        Chunks are written in order on a thread pool rather than on the
+        IOLoop. The file is closed once the pending writes finish.
+
+        :param path: path of the file to write
+        :param executor:
+            ``concurrent.futures.Executor`` to write on. Defaults to a pool
+            shared by all FileSinks.
+        """
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        self._executor = executor or _file_writer
+        self._writing = None
+        self.state = StreamState.init
+        self.auto_close = True
+        self.bytes_written = 0
+
+        self.exception = None
+        self.exc_info = None
+
+    def read(self):
+        raise UnexpectedError("FileSink is write-only.")
+
+    def write(self, chunk):
+        if self.exception:
+            raise self.exception
+
+        if self.state == StreamState.completed:
+            raise UnexpectedError("Stream has been closed.")
+
+        if isinstance(chunk, six.text_type):
+            chunk = chunk.encode('utf8')
+
+        self.state = StreamState.streaming
+        self.bytes_written += len(chunk)
+        self._writing = self._write(self._writing, chunk)
+        return self._writing
+
+    @tornado.gen.coroutine
+    def _write(self, previous, chunk):
+        if previous is not None:
+            yield previous
+        yield self._executor.submit(self._write_all, chunk)
+
+    def _write_all(self, chunk):
+        while len(chunk):
+            written = os.write(self._fd, chunk)
+            chunk = chunk[written:]
+
+    def set_exception(self, exception, exc_info=None):
+        self.exception = exception
+        self.exc_info = exc_info
+        self.close()
+
+    def close(self):
+        if self.state == StreamState.completed:
+            return
+        self.state = StreamState.completed
+        if self._writing is None or self._writing.done():
+            os.close(self._fd)
+        else:
+            self._writing.add_done_callback(lambda f: os.close(self._fd))
+
+
+def to_bytes(s):
+    """Convert an in-memory argument to bytes."""
+    if s is None:
+        return b""
+    if isinstance(s, six.text_type):
+        return s.encode('utf-8')
+    if isinstance(s, bytearray):
+        return bytes(s)
+    return s
+
+
 def maybe_stream(s):
     """Ensure that the given argument is a stream."""
     if isinstance(s, Stream):
@@ -273,10 +481,7 @@ def maybe_stream(s):
         stream.close()  # we don't intend to write anything
         return stream
 
-    if isinstance(s, six.text_type):
-        s = s.encode('utf-8')
-    if isinstance(s, bytearray):
-        s = bytes(s)
+    s = to_bytes(s)
 
     if isinstance(s, bytes):
         stream = InMemStream(s)
@@ -49,6 +49,7 @@ from ..glossary import (
 from ..net import local_ip
 from ..schemes import DEFAULT_NAMES
 from ..schemes import JSON
+from ..schemes import RAW
 from ..serializer.json import JsonSerializer
 from ..serializer.raw import RawSerializer
 from ..tracing import TracingContextProvider
@@ -78,7 +79,8 @@ class TChannel(object):
     def __init__(self, name, hostport=None, process_name=None,
                  known_peers=None, trace=False, dispatcher=None,
                  reuse_port=False, context_provider_fn=None,
-                 tracer=None, _from_new_api=False):
+                 tracer=None, json_codec=None, metrics=None,
+                 timings=False, capture=None, _from_new_api=False):
         """Build or re-use a TChannel.
 
         :param name:
@@ -111,6 +113,23 @@ class TChannel(object):
             A getter function to retrieve an instance of
             ``tracing.TracingContextProvider`` used to manage tracing span
             in a thread-local request context.
+
+        :param json_codec:
+            Name of the JSON codec used for JSON endpoints, or a
+            ``JsonCodec``. Defaults to the fastest installed codec. See
+            ``tchannel.serializer.json``.
+
+        :param metrics:
+            A ``tchannel.metrics.MetricsRegistry`` that records counters and
+            latency histograms of calls made and served by this TChannel.
+
+        :param timings:
+            Record when each call made or served by this TChannel reaches
+            each phase in a ``tchannel.metrics.Timings``.
+
+        :param capture:
+            A ``tchannel.capture.Capture`` that records the frames sent and
+            received on connections opened while it is set.
         """
 
         self._state = State.ready
@@ -145,6 +164,10 @@ class TChannel(object):
         self.name = name
         self._trace = trace
         self._tracer = tracer
+        self._json_serializer = JsonSerializer(json_codec)
+        self.metrics = metrics
+        self.timings = timings
+        self.capture = capture
 
         # register event hooks
         self.event_emitter = EventEmitter()
@@ -365,7 +388,8 @@ class TChannel(object):
             return
         return self._handler.handle(message, connection)
 
-    def _register_simple(self, endpoint, scheme, f):
+    def _register_simple(self, endpoint, scheme, f, streaming=False,
+                         json_codec=None):
         """Register a simple endpoint with this TChannel.
 
         :param endpoint:
@@ -375,15 +399,29 @@ class TChannel(object):
             registered.
         :param f:
             Callable handler for the endpoint.
+        :param streaming:
+            Whether the handler streams the request and response. Only
+            supported for the raw arg scheme.
+        :param json_codec:
+            JSON codec for this endpoint. Defaults to the codec of the
+            TChannel.
         """
         assert scheme in DEFAULT_NAMES, ("Unsupported arg scheme %s" % scheme)
+        assert not streaming or scheme == RAW, (
+            "Streaming is not supported for arg scheme %s" % scheme
+        )
         if scheme == JSON:
-            req_serializer = JsonSerializer()
-            resp_serializer = JsonSerializer()
+            if json_codec is None:
+                req_serializer = self._json_serializer
+            else:
+                req_serializer = JsonSerializer(json_codec)
+            resp_serializer = req_serializer
         else:
             req_serializer = RawSerializer()
             resp_serializer = RawSerializer()
-        self._handler.register(endpoint, f, req_serializer, resp_serializer)
+        self._handler.register(
+            endpoint, f, req_serializer, resp_serializer, streaming=streaming
+        )
         return f
 
     def _register_thrift(self, service_module, handler, **kwargs):
@@ -508,13 +546,13 @@ class TChannelServer(tornado.tcpserver.TCPServer):
             conn.remote_host_port,
             conn.remote_process_name)
 
-        # For new incoming connections, we use _get_isolated instead of get()
+        # For new incoming connections, we use get_isolated instead of get()
         # so that the new incoming peer doesn't get added to the peer heap if
         # it's not already there.  This makes the new peer unavailable as a
         # router for outgoing RPCs. Only peers that were explicitly added to
         # the peer heap elsewhere in the system will be considered as routers
         # for outgoing RPCs.
-        self.tchannel.peers._get_isolated(
+        self.tchannel.peers.get_isolated(
             "%s:%s" % (conn.remote_host,
                        conn.remote_host_port)
         ).register_incoming_conn(conn)
@@ -29,14 +29,20 @@ these zombie messages. To avoid this, we leave a tombstone behind for the
 request that timed out so that we know it is safe to ignore the zombie
 messages.
 
-Tombstones are destroyed automatically after a fixed duration.
+Tombstones are kept in a fixed-capacity ring of ``(id, expiry)`` pairs backed
+by ``array`` objects. Expired tombstones are reclaimed lazily when new
+tombstones are added or when the cemetery is consulted, so no timers are
+scheduled on the IOLoop. If the ring is full, the oldest tombstone is evicted
+to make room for the new one.
 """
 
 from __future__ import (
     absolute_import, unicode_literals, print_function, division
 )
 
-from tornado.ioloop import IOLoop
+from array import array
+
+from ..metrics import now
 
 
 # Default offset of time (in seconds) on top of the original request TTL for
@@ -47,6 +53,10 @@ DEFAULT_TTL_OFFSET_SECS = 0.5
 # active.
 DEFAULT_MAX_TTL_SECS = 5
 
+# Default maximum number of tombstones that a cemetery will hold at the same
+# time.
+DEFAULT_MAX_SIZE = 8192
+
 
 class Cemetery(object):
     """Cemetery is a collection of tombstones.
@@ -60,25 +70,103 @@ class Cemetery(object):
     :param max_ttl_secs:
         Maximum amount of time (in seconds) for which a tombstone for a
         request can exist.
+    :param max_size:
+        Maximum number of tombstones held at any time. When the limit is
+        reached, the oldest tombstone is forgotten to make room.
+    :param clock:
+        Function returning the current time in seconds. Defaults to a
+        monotonic clock so that changes to the system time don't extend or
+        cut short the life of tombstones.
     """
 
-    __slots__ = ('_tombstones', 'io_loop', 'ttl_offset_secs', 'max_ttl_secs')
+    __slots__ = (
+        '_ids',
+        '_expiries',
+        '_slots',
+        '_head',
+        '_count',
+        '_clock',
+        'ttl_offset_secs',
+        'max_ttl_secs',
+        'max_size',
+        'absorbed',
+    )
 
-    def __init__(self, ttl_offset_secs=None, max_ttl_secs=None):
+    def __init__(
+        self, ttl_offset_secs=None, max_ttl_secs=None, max_size=None,
+        clock=None,
+    ):
         if ttl_offset_secs is None:
             ttl_offset_secs = DEFAULT_TTL_OFFSET_SECS
 
         if max_ttl_secs is None:
             max_ttl_secs = DEFAULT_MAX_TTL_SECS
 
-        self._tombstones = {}
+        if max_size is None:
+            max_size = DEFAULT_MAX_SIZE
+
+        assert max_size > 0, "max_size must be positive"
+
         self.ttl_offset_secs = ttl_offset_secs
         self.max_ttl_secs = max_ttl_secs
+        self.max_size = max_size
+        self._clock = clock or now
+
+        #: Number of zombie messages that were ignored because they matched a
+        #: tombstone.
+        self.absorbed = 0
+
+        self._reset()
+
+    def _reset(self):
+        # The ring of tombstones. Live entries occupy the slots
+        # [_head, _head + _count) modulo the current length of the arrays.
+        # The arrays grow on demand until they reach max_size.
+        self._ids = array('L')
+        self._expiries = array('d')
+        self._head = 0
+        self._count = 0
+
+        # Map from request ID to its slot in the ring.
+        self._slots = {}
+
+    def __len__(self):
+        """Number of tombstones that have not been forgotten yet.
+
+        This may include tombstones which have expired but have not been
+        reclaimed yet.
+        """
+        return len(self._slots)
 
     def __contains__(self, id):
         """Check if the request with the given id is known to have timed
         out."""
-        return id in self._tombstones
+        slot = self._slots.get(id)
+        if slot is None:
+            return False
+
+        now = self._clock()
+        if self._expiries[slot] <= now:
+            self._bury(id, slot)
+            self._reclaim(now)
+            return False
+        return True
+
+    def absorb(self, id):
+        """Check if a message with the given id is a zombie.
+
+        Messages that match a tombstone are counted in ``absorbed``.
+
+        :param id:
+            ID of the received message
+        :returns:
+            True if the message is for a request that timed out recently and
+            may safely be ignored.
+        """
+        if id in self:
+            self.absorbed += 1
+            return True
+        return False
 
     def add(self, id, ttl_secs):
         """Adds a new request to the Cemetery that is known to have timed out.
@@ -91,18 +179,80 @@ class Cemetery(object):
         :param ttl_secs:
             TTL of the request (in seconds)
         """
+        now = self._clock()
         ttl_secs = min(ttl_secs + self.ttl_offset_secs, self.max_ttl_secs)
-        self._tombstones[id] = IOLoop.current().call_later(
-            ttl_secs, self.forget, id,
-        )
+        expiry = now + ttl_secs
+
+        slot = self._slots.get(id)
+        if slot is not None:
+            self._expiries[slot] = expiry
+            return
+
+        self._reclaim(now)
+
+        capacity = len(self._ids)
+        if self._count < capacity:
+            slot = (self._head + self._count) % capacity
+            self._ids[slot] = id
+            self._expiries[slot] = expiry
+            self._count += 1
+        elif capacity < self.max_size:
+            if self._head:
+                self._rotate()
+            slot = capacity
+            self._ids.append(id)
+            self._expiries.append(expiry)
+            self._count += 1
+        else:
+            # Full. Evict the oldest tombstone.
+            slot = self._head
+            self._bury(self._ids[slot], slot)
+            self._ids[slot] = id
+            self._expiries[slot] = expiry
+            self._head = (slot + 1) % capacity
+
+        self._slots[id] = slot
 
     def forget(self, id):
         """Forget about a specific request."""
-        self._tombstones.pop(id, None)
+        slot = self._slots.get(id)
+        if slot is not None:
+            self._bury(id, slot)
 
     def clear(self):
         """Forget about all requests."""
-        io_loop = IOLoop.current()
-        while self._tombstones:
-            _, req_timeout = self._tombstones.popitem()
-            io_loop.remove_timeout(req_timeout)
+        self._reset()
+
+    def _bury(self, id, slot):
+        # Marks the slot as expired. The slot itself is reclaimed once it
+        # reaches the head of the ring.
+        if self._slots.get(id) == slot:
+            del self._slots[id]
+        self._expiries[slot] = 0
+
+    def _reclaim(self, now):
+        """Release slots at the head of the ring that have expired."""
+        ids, expiries, slots = self._ids, self._expiries, self._slots
+        capacity = len(ids)
+        head = self._head
+        while self._count and expiries[head] <= now:
+            id = ids[head]
+            if slots.get(id) == head:
+                del slots[id]
+            head = (head + 1) % capacity
+            self._count -= 1
+
+        if not self._count:
+            head = 0
+        self._head = head
+
+    def _rotate(self):
+        """Move the head of the ring to the first slot."""
+        head, capacity = self._head, len(self._ids)
+        self._ids = self._ids[head:] + self._ids[:head]
+        self._expiries = self._expiries[head:] + self._expiries[:head]
+        self._head = 0
+        self._slots = dict(
+            (id, (slot - head) % capacity)
+            for id, slot in self._slots.items()
+        )
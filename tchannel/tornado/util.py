@@ -28,6 +28,9 @@ from ..errors import TChannelError
 @tornado.gen.coroutine
 def get_arg(context, index):
     """get value from arg stream in async way"""
+    if context.args is not None:
+        raise tornado.gen.Return(context.args[index])
+
     if index < len(context.argstreams):
         arg = b""
         chunk = yield context.argstreams[index].read()
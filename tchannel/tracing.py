@@ -24,6 +24,7 @@ from builtins import int
 
 import abc
 import logging
+import random
 
 import opentracing
 import opentracing_instrumentation
@@ -48,6 +49,10 @@ TRACING_KEY_PREFIX = '$tracing$'
 # operation expects either a dictionary or a tuple with the above attributes.
 ZIPKIN_SPAN_FORMAT = 'zipkin-span-format'
 
+# SAMPLED_FLAG is set in the traceflags of the Tracing field of requests that
+# belong to a sampled trace.
+SAMPLED_FLAG = 0x01
+
 
 # noinspection PyMethodMayBeStatic
 class TracingContextProvider(object):
@@ -119,9 +124,19 @@ class ServerTracer(object):
         Start tracing span from the protocol's `tracing` fields.
         This will only work if the `tracer` supports Zipkin-style span context.
 
+        Requests whose `tracing` field says they're not sampled get an
+        :py:class:`UnsampledSpan` instead.
+
         :param request: inbound request
         :type request: tchannel.tornado.request.Request
         """
+        tracing = request.tracing
+        if tracing.trace_id and not tracing.traceflags & SAMPLED_FLAG:
+            self.span = UnsampledSpan(self.tracer, tracing)
+            return
+        self._start_basic_span(request)
+
+    def _start_basic_span(self, request):
         # noinspection PyBroadException
         try:
             # Currently Java does not populate Tracing field, so do not
@@ -140,15 +155,31 @@ class ServerTracer(object):
         except:
             log.exception('Cannot extract tracing span from Trace field')
 
+    def _extracts_zipkin(self, request):
+        try:
+            self.tracer.extract(
+                format=ZIPKIN_SPAN_FORMAT, carrier=request.tracing
+            )
+        except opentracing.UnsupportedFormatException:
+            return False
+        return True
+
     def start_span(self, request, headers, peer_host, peer_port):
         """
         Start a new server-side span. If the span has already been started
         by `start_basic_span`, this method only adds baggage from the headers.
 
+        Unsampled requests keep their :py:class:`UnsampledSpan` unless the
+        headers carry baggage, which only a real span can pass on. Clients
+        whose tracer doesn't support Zipkin format send a random, unsampled
+        `tracing` field, so if ours doesn't support it either, a tracing
+        context in the headers is used instead.
+
         :param request: inbound tchannel.tornado.request.Request
         :param headers: dictionary containing parsed application headers
         :return:
         """
+        unsampled = isinstance(self.span, UnsampledSpan)
         parent_context = None
         # noinspection PyBroadException
         try:
@@ -158,16 +189,31 @@ class ServerTracer(object):
                     for k, v in headers.items()
                     if k.startswith(TRACING_KEY_PREFIX)
                 }
-                parent_context = self.tracer.extract(
-                    format=opentracing.Format.TEXT_MAP,
-                    carrier=tracing_headers
-                )
+                if tracing_headers or not unsampled:
+                    parent_context = self.tracer.extract(
+                        format=opentracing.Format.TEXT_MAP,
+                        carrier=tracing_headers
+                    )
+                if unsampled and tracing_headers and (
+                    not self._extracts_zipkin(request)
+                ):
+                    unsampled = False
+                    self.span = None
+                if unsampled:
+                    if parent_context is None or not parent_context.baggage:
+                        if parent_context is not None:
+                            self.span.set_context(parent_context)
+                        return self.span
+                    self.span = None
+                    self._start_basic_span(request)
                 if self.span and parent_context:
                     # we already started a span from Tracing fields,
                     # so only copy baggage from the headers.
                     for k, v in parent_context.baggage.items():
                         self.span.set_baggage_item(k, v)
-        except:
+            elif unsampled:
+                return self.span
+        except Exception:
             log.exception('Cannot extract tracing span from headers')
         if self.span is None:
             self.span = self.tracer.start_span(
@@ -196,20 +242,32 @@ class ClientTracer(object):
 
     def start_span(self, service, endpoint, headers=None,
                    hostport=None, encoding=None):
+        if headers is None:
+            headers = {}
         parent_span = self.channel.context_provider.get_current_span()
+        if isinstance(parent_span, UnsampledSpan):
+            # Nothing will be recorded; only pass the IDs along.
+            return parent_span.child(), headers
+        tracer = self.channel.tracer
+        if type(tracer) is opentracing.Tracer:
+            # The no-op tracer never samples anything.
+            return UnsampledSpan(tracer, common.random_tracing()), headers
         parent_ctx = parent_span.context if parent_span else None
-        span = self.channel.tracer.start_span(
+        span = tracer.start_span(
             operation_name=endpoint,
             child_of=parent_ctx
         )
+        tracing = _unsampled_tracing(span)
+        if tracing is not None:
+            unsampled_span = UnsampledSpan(tracer, tracing)
+            unsampled_span.set_context(span.context)
+            return unsampled_span, headers
         span.set_tag(tags.SPAN_KIND, tags.SPAN_KIND_RPC_CLIENT)
         span.set_tag(tags.PEER_SERVICE, service)
         set_peer_host_port(span, hostport)
         if encoding:
             span.set_tag('as', encoding)
 
-        if headers is None:
-            headers = {}
         if isinstance(headers, dict):
             # noinspection PyBroadException
             try:
@@ -224,6 +282,53 @@ class ClientTracer(object):
         return span, headers
 
 
+class UnsampledSpan(opentracing.Span):
+    """Span of a request whose trace is not sampled.
+
+    It only carries the IDs of the trace from the ``tracing`` field of
+    requests to the requests made while handling them, so no span is
+    started, tagged or injected into headers for them. Tags, logs and
+    baggage set on it are dropped.
+
+    The span context is built from the IDs by the tracer when it's first
+    asked for, so that other instrumentation can still start child spans.
+
+    :ivar tracing: ``Tracing`` field of the request.
+    """
+
+    def __init__(self, tracer, tracing):
+        super(UnsampledSpan, self).__init__(tracer, None)
+        self.tracing = tracing
+
+    @property
+    def context(self):
+        if self._context is None:
+            # noinspection PyBroadException
+            try:
+                self._context = self._tracer.extract(
+                    format=ZIPKIN_SPAN_FORMAT, carrier=self.tracing
+                )
+            except opentracing.UnsupportedFormatException:
+                pass  # tracer might not support Zipkin format
+            except:
+                log.exception('Cannot extract tracing span from Trace field')
+            if self._context is None:
+                self._context = opentracing.SpanContext()
+        return self._context
+
+    def set_context(self, context):
+        self._context = context
+
+    def child(self):
+        """Get the span of a request made on behalf of this one."""
+        return UnsampledSpan(self._tracer, Tracing(
+            span_id=random.getrandbits(64),
+            parent_id=self.tracing.span_id,
+            trace_id=self.tracing.trace_id,
+            traceflags=self.tracing.traceflags,
+        ))
+
+
 @six.add_metaclass(abc.ABCMeta)
 class TChannelOpenTracingClientInterceptor(OpenTracingInterceptor):
     """
@@ -270,6 +375,27 @@ def set_peer_host_port(span, hostport):
             pass
 
 
+def _unsampled_tracing(span):
+    """
+    Get the Trace field of a span that isn't sampled and has no baggage.
+    :param span: OpenTracing Span
+    :return: ``Tracing``, or None if the span may be recorded or propagates
+        baggage, or if the tracer doesn't support Zipkin format
+    """
+    # noinspection PyBroadException
+    try:
+        carrier = {}
+        span.tracer.inject(span, ZIPKIN_SPAN_FORMAT, carrier)
+        if carrier['traceflags'] & SAMPLED_FLAG or span.context.baggage:
+            return None
+        return Tracing(span_id=carrier['span_id'],
+                       trace_id=carrier['trace_id'],
+                       parent_id=carrier['parent_id'] or int(0),
+                       traceflags=carrier['traceflags'])
+    except Exception:
+        return None
+
+
 def span_to_tracing_field(span):
     """
     Inject the span into Trace field, if Zipkin format is supported
@@ -277,6 +403,8 @@ def span_to_tracing_field(span):
     """
     if span is None:
         return common.random_tracing()
+    if isinstance(span, UnsampledSpan):
+        return span.tracing
     # noinspection PyBroadException
     try:
         carrier = {}
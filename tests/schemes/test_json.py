@@ -27,6 +27,8 @@ import pytest
 
 from tchannel import TChannel, Response, schemes
 from tchannel.response import TransportHeaders
+from tchannel.serializer.json import JsonCodec
+from tchannel.serializer.json import get_codec
 
 
 @pytest.mark.gen_test
@@ -115,3 +117,44 @@ def test_invalid_headers():
         )
 
     assert 'headers must be a map[string]string' in str(exc_info)
+
+
+@pytest.mark.gen_test
+@pytest.mark.call
+def test_json_codec_per_channel_and_endpoint():
+    used = []
+
+    def tracking_codec(name):
+        stdlib = get_codec('json')
+
+        def dumps(obj):
+            used.append(name)
+            return stdlib.dumps(obj)
+
+        return JsonCodec(name, dumps, stdlib.loads)
+
+    server = TChannel(name='server', json_codec=tracking_codec('server'))
+
+    @server.json.register
+    def default(request):
+        return request.body
+
+    @server.json.register(json_codec=tracking_codec('endpoint'))
+    def custom(request):
+        return request.body
+
+    server.listen()
+
+    tchannel = TChannel(name='client', json_codec=tracking_codec('client'))
+
+    for endpoint in ('default', 'custom'):
+        resp = yield tchannel.json(
+            service='server',
+            endpoint=endpoint,
+            body={'a': [1, 2]},
+            hostport=server.hostport,
+        )
+        assert resp.body == {'a': [1, 2]}
+
+    assert set(used) == {'client', 'server', 'endpoint'}
+    assert used.count('server') == used.count('endpoint')
@@ -38,6 +38,7 @@ from tchannel import (
     schemes,
 )
 from tchannel.response import TransportHeaders
+from tchannel.serializer.thrift import LazyStruct
 from tchannel.errors import OneWayNotSupportedError
 from tchannel.errors import UnexpectedError
 from tchannel.errors import ValueExpectedError
@@ -481,6 +482,39 @@ def test_nest(server, service, ThriftTest, client_ttypes):
     assert resp.body == xstruct2
 
 
+@pytest.mark.gen_test
+@pytest.mark.call
+def test_nest_lazy(server, ThriftTest):
+
+    @server.thrift.register(ThriftTest)
+    def testNest(request):
+        return request.body.thing
+
+    tchannel = TChannel(name='client')
+    module = thrift.load(
+        path='tests/data/idls/ThriftTest.thrift',
+        service='server',
+        hostport=server.hostport,
+    )
+
+    xstruct2 = module.Xtruct2(
+        byte_thing=1,
+        struct_thing=module.Xtruct(string_thing='hi', i64_thing=-1),
+    )
+
+    resp = yield tchannel.thrift(
+        module.ThriftTest.testNest(thing=xstruct2), lazy=True
+    )
+
+    assert isinstance(resp.body, LazyStruct)
+    assert isinstance(resp.body.struct_thing, LazyStruct)
+    assert resp.body.struct_thing.string_thing == 'hi'
+    assert resp.body.struct_thing.i32_thing is None
+    assert resp.body.byte_thing == 1
+    assert resp.body.i32_thing is None
+    assert resp.body.materialize() == xstruct2
+
+
 @pytest.mark.gen_test
 @pytest.mark.call
 def test_map(server, service, ThriftTest):
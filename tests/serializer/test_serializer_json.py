@@ -19,38 +19,87 @@
 # THE SOFTWARE.
 
 from __future__ import absolute_import
+import json
+
+import mock
 import pytest
 
+from tchannel.serializer.json import JsonCodec
 from tchannel.serializer.json import JsonSerializer
+from tchannel.serializer.json import get_codec
+from tchannel.serializer.json import register_codec
+from tchannel.serializer.json import _codecs
+from tchannel.serializer.json import _STDLIB_CODEC
+
+
+@pytest.fixture(params=list(_codecs))
+def codec(request):
+    return request.param
 
 
 @pytest.mark.parametrize('v1', [
     ({}),
     ({'a': 'd'}),
 ])
-def test_header(v1):
-    serializer = JsonSerializer()
+def test_header(v1, codec):
+    serializer = JsonSerializer(codec)
     assert v1 == serializer.deserialize_header(
         serializer.serialize_header(v1)
     )
 
 
 @pytest.mark.parametrize('v1, v2', [
-    (True, 'true'),
-    (False, 'false'),
-    ({}, '{}'),
-    ({'a': 'd'}, '{"a": "d"}'),
-    (2, '2'),
-    (None, 'null'),
+    (True, b'true'),
+    (False, b'false'),
+    ({}, b'{}'),
+    ({'a': 'd'}, b'{"a": "d"}'),
+    (2, b'2'),
+    (None, b'null'),
 ])
 def test_body(v1, v2):
-    serializer = JsonSerializer()
+    serializer = JsonSerializer('json')
     assert v2 == serializer.serialize_body(v1)
     assert v1 == serializer.deserialize_body(v2)
 
 
-def test_exception():
-    serializer = JsonSerializer()
+@pytest.mark.parametrize('v1', [
+    True,
+    {'a': [1, 2.5, None, {'b': u'\u2603'}]},
+    [{'id': i, 'tags': ['x', 'y']} for i in range(10)],
+])
+def test_body_roundtrip(v1, codec):
+    serializer = JsonSerializer(codec)
+    v2 = serializer.serialize_body(v1)
+    assert isinstance(v2, bytes)
+    assert v1 == json.loads(v2.decode('utf8'))
+    assert v1 == serializer.deserialize_body(v2)
+
+
+def test_default_codec_is_preferred():
+    assert JsonSerializer().codec is get_codec()
+    assert get_codec('json').name == 'json'
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        JsonSerializer('yaml')
+
+
+def test_register_codec():
+    codec = JsonCodec(
+        'upper', lambda obj: b'"UPPER"', lambda s: s.decode('utf8').lower()
+    )
+    register_codec(codec)
+    try:
+        serializer = JsonSerializer('upper')
+        assert serializer.serialize_body('x') == b'"UPPER"'
+        assert serializer.deserialize_body(b'"UPPER"') == '"upper"'
+    finally:
+        del _codecs['upper']
+
+
+def test_exception(codec):
+    serializer = JsonSerializer(codec)
 
     with pytest.raises(ValueError):
         serializer.deserialize_header('{sss')
@@ -60,3 +109,36 @@ def test_exception():
 
     with pytest.raises(ValueError):
         serializer.deserialize_body('{sss')
+
+
+@pytest.mark.parametrize('v1', [
+    {'x': float('inf')},
+    {'x': [float('-inf'), float('nan')]},
+    {'n': 2 ** 70},
+    {'n': [-2 ** 70, 2 ** 64]},
+    {'n': [-2 ** 63, 2 ** 63, 2 ** 64 - 1, 1e300]},
+    {1.5: 'a', 2: 'b'},
+])
+def test_parity_with_stdlib(v1, codec):
+    serializer = JsonSerializer(codec)
+    expected = json.dumps(v1)
+
+    # NaN != NaN, so compare the JSON the stdlib makes of what came back.
+    encoded = serializer.serialize_body(v1)
+    assert expected == json.dumps(json.loads(encoded.decode('utf8')))
+
+    decoded = serializer.deserialize_body(expected.encode('utf8'))
+    assert json.dumps(json.loads(expected)) == json.dumps(decoded)
+
+
+def test_long_digits_in_strings_use_codec(codec):
+    serializer = JsonSerializer(codec)
+    body = b'{"id": "1234567890123456789012", "at": 1600000000000000000}'
+
+    with mock.patch.object(
+        _STDLIB_CODEC, 'loads', wraps=_STDLIB_CODEC.loads
+    ) as stdlib_loads:
+        decoded = serializer.deserialize_body(body)
+
+    assert decoded == json.loads(body.decode('utf8'))
+    assert stdlib_loads.called == (codec == 'json')
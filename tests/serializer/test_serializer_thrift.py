@@ -20,6 +20,15 @@
 
 from __future__ import absolute_import
 import pytest
+
+from tchannel import io
+from tchannel import rw
+from tchannel import thrift
+from tchannel.errors import ReadError
+from tchannel.serializer.thrift import HeaderCodec
+from tchannel.serializer.thrift import LazyStruct
+from tchannel.serializer.thrift import MAX_CACHED_BLOCK_SIZE
+from tchannel.serializer.thrift import ThriftRWSerializer
 from tchannel.serializer.thrift import ThriftSerializer
 from tests.data.generated.ThriftTest.ThriftTest import (
     testStruct_result,
@@ -38,9 +47,109 @@ def test_header(v1):
     )
 
 
+headers_rw = rw.headers(
+    rw.number(2),
+    rw.len_prefixed_string(rw.number(2)),
+    rw.len_prefixed_string(rw.number(2)),
+)
+
+
+@pytest.mark.parametrize('headers', [
+    {},
+    {'a': 'd'},
+    [('cn', 'caller'), ('uber-trace-id', 'abc:def:0:1'), (u'\u2603', u'\xe9')],
+])
+def test_header_codec_matches_generic_layout(headers):
+    codec = HeaderCodec()
+    expected = headers_rw.write(headers, io.BytesIO()).getvalue()
+
+    # Encode twice so that the second call is served from the cache.
+    assert codec.encode(headers) == expected
+    assert codec.encode(headers) == expected
+    assert codec.decode(expected) == dict(headers)
+    assert codec.decode(expected) == dict(headers)
+
+
+def test_header_codec_cache_is_bounded():
+    codec = HeaderCodec(max_size=2)
+    for i in range(5):
+        codec.decode(codec.encode({'k': str(i)}))
+
+    assert len(codec._encoded) == 2
+    assert len(codec._decoded) == 2
+    assert list(codec._encoded) == [(('k', '3'),), (('k', '4'),)]
+
+    # Blocks that are too large aren't cached.
+    codec.encode({'big': 'x' * MAX_CACHED_BLOCK_SIZE})
+    assert (('big', 'x' * MAX_CACHED_BLOCK_SIZE),) not in codec._encoded
+
+
+def test_header_codec_decode_returns_copy():
+    codec = HeaderCodec()
+    data = codec.encode({'a': 'b'})
+    codec.decode(data)['a'] = 'c'
+    assert codec.decode(data) == {'a': 'b'}
+
+
+@pytest.mark.parametrize('data', [
+    b'\x00',
+    b'\x00\x01\x00\x01a',
+    b'\x00\x01\x00\x01a\x00\x05bc',
+])
+def test_header_codec_truncated(data):
+    with pytest.raises(ReadError):
+        HeaderCodec().decode(data)
+
+
 def test_body():
     result = testStruct_result(Xtruct("s", 0, 1, 2))
     serializer = ThriftSerializer(testStruct_result)
     assert result == serializer.deserialize_body(
         serializer.serialize_body(result)
     )
+
+
+@pytest.fixture
+def ttypes():
+    return thrift.load('tests/data/idls/ThriftTest.thrift')
+
+
+def test_lazy_body(ttypes):
+    result_type = ttypes.ThriftTest.testInsanity._response_cls
+    insanity = ttypes.Insanity(
+        userMap={ttypes.Numberz.ONE: 1, ttypes.Numberz.TWO: 2},
+        xtructs=[ttypes.Xtruct('a', 1, 2, 3), ttypes.Xtruct('b')],
+    )
+    result = result_type(success={1: {ttypes.Numberz.FIVE: insanity}})
+    serializer = ThriftRWSerializer(ttypes, result_type)
+    data = serializer.serialize_body(result)
+
+    body = serializer.deserialize_body(data, lazy=True)
+    assert isinstance(body, LazyStruct)
+    assert body.success == result.success
+    assert body.materialize() == result
+
+    with pytest.raises(AttributeError):
+        body.failure
+
+
+def test_lazy_body_nested(ttypes):
+    xtruct2 = ttypes.Xtruct2(
+        byte_thing=1,
+        struct_thing=ttypes.Xtruct('s', 0, 1, 2),
+        i32_thing=3,
+    )
+    data = ttypes.dumps(xtruct2)
+    body = LazyStruct(ttypes.Xtruct2.type_spec, data)
+
+    assert body.i32_thing == 3
+    assert body.struct_thing.string_thing == 's'
+    assert body.struct_thing.materialize() == xtruct2.struct_thing
+
+
+def test_lazy_body_truncated(ttypes):
+    data = ttypes.dumps(ttypes.Xtruct2(struct_thing=ttypes.Xtruct('s')))
+    body = LazyStruct(ttypes.Xtruct2.type_spec, data[:-3])
+
+    with pytest.raises(ReadError):
+        body.byte_thing
@@ -0,0 +1,373 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import mock
+import pytest
+from tornado import gen
+from tornado.concurrent import Future
+
+from tchannel import TChannel
+from tchannel import thrift
+from tchannel.caching import ResponseCache
+from tchannel.caching import memoize
+from tchannel.errors import BadRequestError
+from tchannel.errors import TimeoutError
+from tchannel.event import EventHook
+from tchannel.request import Request
+from tchannel.request import TransportHeaders
+from tchannel.tracing import TRACING_KEY_PREFIX
+
+
+@pytest.mark.gen_test
+def test_fetch_coalesces_and_caches():
+    cache = ResponseCache()
+    pending = Future()
+    call = mock.Mock(return_value=pending)
+
+    first = cache.fetch(b'k', call)
+    second = cache.fetch(b'k', call)
+    pending.set_result('value')
+
+    assert (yield first) == 'value'
+    assert (yield second) == 'value'
+    assert (yield cache.fetch(b'k', call)) == 'value'
+    assert call.call_count == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+@pytest.mark.gen_test
+def test_fetch_does_not_cache_errors():
+    cache = ResponseCache()
+    pending = Future()
+    call = mock.Mock(return_value=pending)
+
+    first = cache.fetch(b'k', call)
+    second = cache.fetch(b'k', call)
+    pending.set_exception(ValueError('great sadness'))
+
+    for future in (first, second):
+        with pytest.raises(ValueError):
+            yield future
+
+    call.return_value = gen.maybe_future('value')
+    assert (yield cache.fetch(b'k', call)) == 'value'
+    assert call.call_count == 2
+
+
+@pytest.mark.gen_test
+def test_fetch_respects_timeouts():
+    cache = ResponseCache()
+    first, second = Future(), Future()
+    call = mock.Mock(side_effect=[first, second])
+
+    short = cache.fetch(b'k', call, timeout=1)
+    shorter = cache.fetch(b'k', call, timeout=0.01)
+    with pytest.raises(gen.TimeoutError):
+        yield shorter
+
+    # May wait longer than the call in flight, so it makes its own.
+    longer = cache.fetch(b'k', call, timeout=2)
+    assert call.call_count == 2
+
+    second.set_result('second')
+    first.set_result('first')
+    assert (yield short) == 'first'
+    assert (yield longer) == 'second'
+
+
+@pytest.mark.gen_test
+def test_fetch_respects_sizeof():
+    cache = ResponseCache()
+
+    yield cache.fetch(b'k', lambda: gen.maybe_future('v'), lambda v: None)
+    assert len(cache) == 0
+
+    yield cache.fetch(b'k', lambda: gen.maybe_future('v'), len)
+    assert len(cache) == 1
+    assert cache.nbytes == 1
+
+
+def test_ttl():
+    cache = ResponseCache(ttl=10)
+
+    with mock.patch('time.time', return_value=100):
+        cache.put(b'k', 'v', 1)
+    with mock.patch('time.time', return_value=109):
+        assert cache.get(b'k') == 'v'
+    with mock.patch('time.time', return_value=110):
+        assert cache.get(b'k') is None
+
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+
+    cache.put(b'a', 'a', 4)
+    cache.put(b'b', 'b', 4)
+    cache.get(b'a')
+    cache.put(b'c', 'c', 4)
+    assert list(cache._entries) == [b'a', b'c']
+
+    cache.put(b'd', 'd', 8)
+    assert list(cache._entries) == [b'd']
+    assert cache.nbytes == 8
+
+    cache.put(b'e', 'e', 11)
+    assert cache.get(b'e') is None
+    assert cache.nbytes == 8
+
+
+def test_key_ignores_tracing_headers():
+    key = ResponseCache.key('svc', 'endpoint', {'a': 'b'}, b'body')
+
+    assert key == ResponseCache.key(
+        'svc', 'endpoint', {'a': 'b', TRACING_KEY_PREFIX + 'id': '1'}, b'body'
+    )
+    assert key != ResponseCache.key('svc', 'endpoint', {'a': 'c'}, b'body')
+    assert key != ResponseCache.key('svc', 'endpoint', {'a': 'b'}, b'other')
+    assert key != ResponseCache.key('svc', 'other', {'a': 'b'}, b'body')
+
+
+@pytest.fixture
+def server(io_loop):  # need io_loop fixture for listen() to work
+    server = TChannel(name='server')
+    server.listen()
+    return server
+
+
+@pytest.mark.gen_test
+def test_call_with_cache(server):
+    calls = []
+
+    @server.raw.register('echo')
+    def echo(request):
+        calls.append(request.body)
+        return request.body
+
+    @server.raw.register('fail')
+    def fail(request):
+        calls.append(request.body)
+        raise BadRequestError('great sadness')
+
+    events = []
+
+    class Hook(EventHook):
+        def on_cache_hit(self, service, endpoint):
+            events.append(('hit', endpoint))
+
+        def on_cache_miss(self, service, endpoint):
+            events.append(('miss', endpoint))
+
+    client = TChannel('client')
+    client.hooks.register(Hook())
+    cache = ResponseCache()
+
+    responses = yield [
+        client.raw('server', 'echo', body=body, hostport=server.hostport,
+                   cache=cache)
+        for body in ('a', 'a', 'b')
+    ]
+    response = yield client.raw(
+        'server', 'echo', body='a', hostport=server.hostport, cache=cache
+    )
+
+    assert [r.body for r in responses] == [b'a', b'a', b'b']
+    assert response.body == b'a'
+    assert calls == [b'a', b'b']
+    assert sorted(events) == [
+        ('hit', 'echo'), ('hit', 'echo'), ('miss', 'echo'), ('miss', 'echo'),
+    ]
+
+    for _ in range(2):
+        with pytest.raises(BadRequestError):
+            yield client.raw(
+                'server', 'fail', hostport=server.hostport, cache=cache
+            )
+    assert len(calls) == 4
+
+
+@pytest.mark.gen_test
+def test_call_with_cache_times_out_on_its_own(server):
+    release = Future()
+
+    @server.json.register
+    @gen.coroutine
+    def slow(request):
+        yield release
+        raise gen.Return(request.body)
+
+    client = TChannel('client')
+    cache = ResponseCache()
+    first = client.json(
+        'server', 'slow', body='x', hostport=server.hostport, cache=cache,
+        timeout=30,
+    )
+
+    with pytest.raises(TimeoutError):
+        yield client.json(
+            'server', 'slow', body='x', hostport=server.hostport,
+            cache=cache, timeout=0.05,
+        )
+
+    release.set_result(None)
+    assert (yield first).body == 'x'
+
+
+@pytest.mark.gen_test
+def test_json_and_thrift_with_cache(server):
+    module = thrift.load(
+        'tests/data/idls/ThriftTest.thrift',
+        service='server',
+        hostport=server.hostport,
+    )
+    calls = []
+
+    @server.thrift.register(module.ThriftTest)
+    def testString(request):
+        calls.append(request.body.thing)
+        return request.body.thing.upper()
+
+    @server.json.register
+    def upper(request):
+        calls.append(request.body)
+        return request.body.upper()
+
+    client = TChannel('client')
+    cache = ResponseCache()
+
+    for _ in range(2):
+        response = yield client.thrift(
+            module.ThriftTest.testString('thrift'), cache=cache
+        )
+        assert response.body == 'THRIFT'
+
+        response = yield client.json(
+            'server', 'upper', body='json', hostport=server.hostport,
+            cache=cache,
+        )
+        assert response.body == 'JSON'
+
+    assert calls == ['thrift', 'json']
+
+    yield client.json(
+        'server', 'upper', body='json', headers={'a': 'b'},
+        hostport=server.hostport, cache=cache,
+    )
+    assert calls == ['thrift', 'json', 'json']
+
+
+@pytest.mark.gen_test
+def test_memoize(server):
+    calls = []
+
+    @server.json.register
+    @memoize(ttl=10)
+    def upper(request):
+        calls.append(request.body)
+        return request.body.upper()
+
+    client = TChannel('client')
+    for body in ('a', 'a', 'b', 'a'):
+        response = yield client.json(
+            'server', 'upper', body=body, hostport=server.hostport,
+        )
+        assert response.body == body.upper()
+
+    assert calls == ['a', 'b']
+    assert len(upper.cache) == 2
+
+
+@pytest.mark.gen_test
+def test_memoize_canonicalizes_bodies(server):
+    module = thrift.load(
+        'tests/data/idls/ThriftTest.thrift',
+        service='server',
+        hostport=server.hostport,
+    )
+    calls = []
+
+    @server.json.register
+    @memoize()
+    def keys(request):
+        calls.append(request.body)
+        return sorted(request.body)
+
+    @server.raw.register
+    @memoize()
+    def echo(request):
+        calls.append(request.body)
+        return request.body
+
+    @server.thrift.register(module.ThriftTest)
+    @memoize()
+    def testStruct(request):
+        calls.append(request.body.thing)
+        return request.body.thing
+
+    client = TChannel('client')
+    for body in ({'a': 1, 'b': 2}, {'b': 2, 'a': 1}):
+        response = yield client.json(
+            'server', 'keys', body=body, hostport=server.hostport,
+        )
+        assert response.body == ['a', 'b']
+
+    for _ in range(2):
+        response = yield client.raw(
+            'server', 'echo', body=b'raw', hostport=server.hostport,
+        )
+        assert response.body == b'raw'
+
+        thing = module.Xtruct(string_thing='x', i32_thing=1)
+        response = yield client.thrift(module.ThriftTest.testStruct(thing))
+        assert response.body.string_thing == 'x'
+
+    assert len(calls) == 3
+
+
+@pytest.mark.gen_test
+def test_memoize_with_key(server):
+    calls = []
+
+    @server.json.register
+    @memoize(key=lambda request: request.body['id'])
+    def get(request):
+        calls.append(request.body)
+        return request.body['id']
+
+    client = TChannel('client')
+    for body in ({'id': 'a', 'n': 1}, {'id': 'a', 'n': 2}, {'id': 'b'}):
+        yield client.json(
+            'server', 'get', body=body, hostport=server.hostport,
+        )
+
+    assert [body['id'] for body in calls] == ['a', 'b']
+
+
+def test_memoize_unknown_body():
+    handler = memoize()(lambda request: None)
+
+    with pytest.raises(TypeError):
+        handler(Request(body=object(), transport=TransportHeaders()))
@@ -0,0 +1,194 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import
+
+import pytest
+from tornado import gen
+
+from tchannel import TChannel
+from tchannel.capture import CLOSED
+from tchannel.capture import Capture
+from tchannel.capture import INCOMING
+from tchannel.capture import OUTGOING_CONNECTION
+from tchannel.capture import RECEIVED
+from tchannel.capture import SENT
+from tchannel.capture import read
+from tchannel.capture import replay
+from tchannel.io import BytesIO
+from tchannel.messages.types import Types
+
+
+def message_types(records, kind):
+    return [
+        bytearray(record.data)[2] for record in records if record.kind == kind
+    ]
+
+
+def make_server(capture=None):
+    server = TChannel('server', capture=capture)
+
+    @server.raw.register
+    @gen.coroutine
+    def echo(request):
+        if request.body == b'slow':
+            yield gen.sleep(1)
+        raise gen.Return(request.body)
+
+    server.listen()
+    return server
+
+
+@pytest.fixture
+def capture_file():
+    return BytesIO()
+
+
+@pytest.mark.gen_test
+def test_capture_server(io_loop, capture_file):
+    capture = Capture(capture_file)
+    server = make_server(capture)
+    client = TChannel('client')
+
+    yield client.raw('server', 'echo', b'a', hostport=server.hostport)
+    yield client.raw(
+        'server', 'echo', b'x' * 100000, hostport=server.hostport,
+    )
+    client.close()
+    yield gen.sleep(0.01)
+    capture.close()
+    server.close()
+
+    records = list(read(BytesIO(capture_file.getvalue())))
+    assert records[0].kind == INCOMING
+    assert records[-1].kind == CLOSED
+    assert {record.connection for record in records} == {1}
+    times = [record.time for record in records]
+    assert times == sorted(times)
+
+    assert message_types(records, RECEIVED) == [
+        Types.INIT_REQ, Types.CALL_REQ, Types.CALL_REQ,
+        Types.CALL_REQ_CONTINUE,
+    ]
+    assert message_types(records, SENT) == [
+        Types.INIT_RES, Types.CALL_RES, Types.CALL_RES,
+        Types.CALL_RES_CONTINUE,
+    ]
+
+
+@pytest.mark.gen_test
+def test_capture_is_not_written_after_close(io_loop, capture_file):
+    capture = Capture(capture_file)
+    capture.close()
+    server = make_server(capture)
+    client = TChannel('client')
+
+    yield client.raw('server', 'echo', b'a', hostport=server.hostport)
+
+    assert list(read(BytesIO(capture_file.getvalue()))) == []
+    server.close()
+
+
+def test_read_rejects_other_files():
+    with pytest.raises(ValueError):
+        list(read(BytesIO(b'not a capture')))
+
+
+@pytest.mark.gen_test
+def test_read_stops_at_truncated_record(io_loop, capture_file):
+    capture = Capture(capture_file)
+    server = make_server(capture)
+    client = TChannel('client')
+    yield client.raw('server', 'echo', b'a', hostport=server.hostport)
+    capture.close()
+    server.close()
+
+    data = capture_file.getvalue()
+    records = list(read(BytesIO(data)))
+    assert list(read(BytesIO(data[:-1]))) == records[:-1]
+
+
+@pytest.mark.gen_test
+@pytest.mark.parametrize('side', ['server', 'client'])
+def test_replay(io_loop, capture_file, side):
+    capture = Capture(capture_file)
+    server = make_server(capture if side == 'server' else None)
+    client = TChannel(
+        'client', capture=capture if side == 'client' else None,
+    )
+    for body in (b'a', b'x' * 100000, b'b'):
+        yield client.raw('server', 'echo', body, hostport=server.hostport)
+        yield gen.sleep(0.1)
+    client.close()
+    capture.close()
+    server.close()
+
+    records = list(read(BytesIO(capture_file.getvalue())))
+    assert records[0].kind == (
+        INCOMING if side == 'server' else OUTGOING_CONNECTION
+    )
+
+    target = make_server()
+    result = yield replay(
+        BytesIO(capture_file.getvalue()), target.hostport, speed=4,
+    )
+
+    assert result.sent == 3
+    assert result.errors == {}
+    assert result.latency.count == 3
+    # The calls were 100ms apart when captured.
+    assert 0.05 <= result.elapsed < 0.3
+    target.close()
+
+
+@pytest.mark.gen_test
+def test_replay_counts_errors(io_loop, capture_file):
+    capture = Capture(capture_file)
+    server = make_server(capture)
+    client = TChannel('client')
+    yield client.raw('server', 'echo', b'a', hostport=server.hostport)
+    future = client.raw('server', 'echo', b'slow', hostport=server.hostport)
+    yield gen.sleep(0.01)
+    capture.close()
+
+    target = TChannel('server')
+    target.listen()
+    result = yield replay(
+        BytesIO(capture_file.getvalue()), target.hostport, timeout=0.1,
+    )
+    assert result.sent == 2
+    assert result.errors == {'BadRequestError': 2}
+
+    result = yield replay(
+        BytesIO(capture_file.getvalue()), server.hostport, timeout=0.1,
+    )
+    assert result.sent == 2
+    assert result.errors == {'TimeoutError': 1}
+    assert result.latency.count == 1
+
+    yield future
+    server.close()
+    target.close()
+
+
+@pytest.mark.gen_test
+def test_replay_rejects_bad_speed(capture_file):
+    with pytest.raises(ValueError):
+        yield replay(capture_file, 'localhost:0', speed=0)
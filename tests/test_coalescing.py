@@ -0,0 +1,153 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import pytest
+from tornado import gen
+from tornado.concurrent import Future
+
+from tchannel import TChannel
+from tchannel import thrift
+from tchannel.errors import TimeoutError
+
+
+@pytest.fixture
+def server(io_loop):  # need io_loop fixture for listen() to work
+    server = TChannel(name='server')
+    server.listen()
+    return server
+
+
+@pytest.fixture
+def blocked(server):
+    calls = []
+    release = Future()
+
+    @server.raw.register('echo')
+    @gen.coroutine
+    def echo(request):
+        calls.append(request.body)
+        yield release
+        raise gen.Return(request.body)
+
+    return calls, release
+
+
+@pytest.mark.gen_test
+def test_identical_calls_share_a_request(server, blocked):
+    calls, release = blocked
+    client = TChannel('client', coalesce=True)
+
+    futures = [
+        client.raw('server', 'echo', body=body, hostport=server.hostport)
+        for body in ('a', 'a', 'b', 'a')
+    ]
+    yield gen.sleep(0.05)
+    release.set_result(None)
+    responses = yield futures
+
+    assert [r.body for r in responses] == [b'a', b'a', b'b', b'a']
+    assert len(set(map(id, responses))) == 4
+    assert sorted(calls) == [b'a', b'b']
+    assert client._flights == {}
+
+
+@pytest.mark.gen_test
+def test_coalesce_per_call(server, blocked):
+    calls, release = blocked
+    client = TChannel('client')
+
+    futures = [
+        client.raw('server', 'echo', body='a', hostport=server.hostport,
+                   coalesce=coalesce)
+        for coalesce in (True, True, None)
+    ]
+    yield gen.sleep(0.05)
+    release.set_result(None)
+    yield futures
+
+    assert calls == [b'a', b'a']
+
+
+@pytest.mark.gen_test
+def test_joiner_keeps_its_own_timeout(server, blocked):
+    calls, release = blocked
+    client = TChannel('client', coalesce=True)
+
+    first = client.raw('server', 'echo', body='a', hostport=server.hostport)
+    with pytest.raises(TimeoutError):
+        yield client.raw(
+            'server', 'echo', body='a', hostport=server.hostport,
+            timeout=0.05,
+        )
+    release.set_result(None)
+
+    assert (yield first).body == b'a'
+    assert calls == [b'a']
+
+
+@pytest.mark.gen_test
+def test_longer_deadline_sends_its_own_request(server, blocked):
+    calls, release = blocked
+    client = TChannel('client', coalesce=True)
+
+    futures = [
+        client.raw('server', 'echo', body='a', hostport=server.hostport,
+                   timeout=timeout)
+        for timeout in (1, 5, 1)
+    ]
+    yield gen.sleep(0.05)
+    release.set_result(None)
+    yield futures
+
+    assert calls == [b'a', b'a']
+
+
+@pytest.mark.gen_test
+def test_thrift_ignores_tracing_headers(server):
+    module = thrift.load(
+        'tests/data/idls/ThriftTest.thrift',
+        service='server',
+        hostport=server.hostport,
+    )
+    calls = []
+    release = Future()
+
+    @server.thrift.register(module.ThriftTest)
+    @gen.coroutine
+    def testString(request):
+        calls.append(request.body.thing)
+        yield release
+        raise gen.Return(request.body.thing.upper())
+
+    client = TChannel('client', coalesce=True)
+    futures = [
+        client.thrift(module.ThriftTest.testString('thrift'))
+        for _ in range(3)
+    ]
+    yield gen.sleep(0.05)
+    release.set_result(None)
+    responses = yield futures
+
+    assert [r.body for r in responses] == ['THRIFT'] * 3
+    assert calls == ['thrift']
@@ -23,6 +23,7 @@ from __future__ import absolute_import
 import mock
 import pytest
 from mock import MagicMock
+from tornado.concurrent import Future
 from tornado.gen import maybe_future
 
 from tchannel import TChannel
@@ -88,3 +89,52 @@ def test_after_send_error_event_called():
         mock_fire.assert_any_call(
             mock.ANY, EventType.after_send_error, mock.ANY,
         )
+
+
+def test_fire_without_hooks_is_resolved():
+    event_emitter = EventEmitter()
+    future = event_emitter.fire(EventType.before_send_request, None)
+    assert future.done()
+    assert future is event_emitter.fire(EventType.after_send_request)
+
+
+def test_fire_calls_synchronous_hooks_inline():
+    event_emitter = EventEmitter()
+    calls = []
+
+    def fail(request):
+        calls.append('fail')
+        raise ValueError('great sadness')
+
+    event_emitter.register_hook(fail, EventType.before_send_request)
+    event_emitter.register_hook(calls.append, EventType.before_send_request)
+    event_emitter.register_hook(
+        lambda request: maybe_future(calls.append('future')),
+        EventType.before_send_request,
+    )
+
+    future = event_emitter.fire(EventType.before_send_request, 'request')
+    assert future.done()
+    assert calls == ['fail', 'request', 'future']
+
+
+@pytest.mark.gen_test
+def test_fire_waits_for_asynchronous_hooks():
+    event_emitter = EventEmitter()
+    pending = Future()
+    calls = []
+
+    event_emitter.register_hook(
+        lambda: pending, EventType.before_send_request
+    )
+    event_emitter.register_hook(
+        lambda: calls.append('after'), EventType.before_send_request
+    )
+
+    future = event_emitter.fire(EventType.before_send_request)
+    assert not future.done()
+    assert calls == []
+
+    pending.set_result(None)
+    yield future
+    assert calls == ['after']
@@ -0,0 +1,103 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import
+
+import pytest
+from tornado import gen
+
+from tchannel import loadgen
+from tchannel.errors import TimeoutError
+
+
+@pytest.mark.gen_test
+def test_generate_sends_at_rate():
+    sent = []
+
+    def send():
+        sent.append(None)
+        return gen.maybe_future(None)
+
+    result = yield loadgen.generate(send, rate=200, duration=0.1)
+
+    assert len(sent) == result.sent == result.succeeded == 20
+    assert result.latency.count == 20
+    assert result.elapsed == pytest.approx(0.1, abs=0.05)
+
+
+@pytest.mark.gen_test
+def test_generate_counts_waiting_for_concurrency():
+    inflight = []
+
+    @gen.coroutine
+    def send():
+        inflight.append(None)
+        assert len(inflight) == 1
+        yield gen.sleep(0.02)
+        inflight.pop()
+
+    result = yield loadgen.generate(
+        send, rate=200, duration=0.05, concurrency=1,
+    )
+
+    # Calls are due every 5ms but each takes 20ms, so later calls wait
+    # longer and longer and their latency includes the wait.
+    assert result.sent == 10
+    assert result.queued == 9
+    assert result.latency.percentile(50) < result.latency.max
+    assert result.latency.max >= 0.15
+
+
+@pytest.mark.gen_test
+def test_generate_counts_errors():
+    calls = []
+
+    def send():
+        calls.append(None)
+        if len(calls) % 2:
+            raise TimeoutError('too slow')
+        return gen.maybe_future(None)
+
+    result = yield loadgen.generate(send, rate=100, duration=0.1)
+
+    assert result.sent == 10
+    assert result.errors == {'TimeoutError': 5}
+    assert result.succeeded == 5
+    assert result.latency.count == 5
+
+
+def test_merge_and_report(capsys):
+    first, second = loadgen.LoadResult(), loadgen.LoadResult()
+    first.sent, second.sent = 2, 1
+    first.latency.record(0.001)
+    first.latency.record(0.002)
+    second.errors['TimeoutError'] = 1
+    first.elapsed, second.elapsed = 1.0, 1.5
+
+    first.merge(second)
+    loadgen.print_report(first)
+
+    assert first.sent == 3
+    assert first.succeeded == 2
+    assert first.elapsed == 1.5
+    out, err = capsys.readouterr()
+    assert '3 calls in 1.50s: 2 succeeded (1.3/s), 1 failed' in out
+    assert '100%  2.000ms' in out
+    assert 'TimeoutError: 1' in out
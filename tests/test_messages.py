@@ -24,6 +24,7 @@ import struct
 import mock
 
 import pytest
+import six
 
 from tchannel import messages, TChannel
 from tchannel.io import BytesIO
@@ -289,6 +290,21 @@ def test_message_fragment(arg2, arg3, connection):
     assert body == origin_msg.args[2]
 
 
+@pytest.mark.skipif(six.PY2, reason='Python 2 slices copy')
+def test_message_fragment_shares_large_args():
+    arg3 = big_arg()
+    msg = CallRequestMessage(args=[b"", b"", arg3])
+    fragments = list(MessageFactory(mock.Mock()).fragment(msg))
+
+    assert len(fragments) > 2
+    # Each frame's slice of arg3 refers back to the original buffer.
+    for fragment in fragments[1:]:
+        assert fragment.args[0].obj is arg3
+    assert b''.join(
+        bytes(f.args[-1]) for f in fragments
+    ) == arg3
+
+
 def verify_init_header(message):
     # will be called twice for both init_req and init_res
     headers = message.headers
@@ -0,0 +1,280 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import
+
+import mock
+import pytest
+
+from tchannel import TChannel
+from tchannel.errors import BadRequestError
+from tchannel.metrics import Histogram
+from tchannel.metrics import MetricsRegistry
+from tchannel.metrics import Timings
+from tchannel.statsd import StatsdSink
+
+
+def test_histogram_percentiles():
+    histogram = Histogram('latency')
+    for micros in range(1, 10001):
+        histogram.record(micros / 1000000.0)
+
+    assert histogram.count == 10000
+    assert histogram.mean == pytest.approx(0.0050005)
+    for q in (1, 50, 90, 99, 100):
+        expected = q * 100 / 1000000.0
+        assert histogram.percentile(q) == pytest.approx(expected, rel=0.035)
+
+
+def test_histogram_clamps_values():
+    histogram = Histogram('latency')
+    histogram.record(-1)
+    histogram.record(10 ** 6)
+
+    assert histogram.min == 0
+    assert histogram.percentile(0) == 0
+    assert histogram.percentile(100) == pytest.approx(2 ** 34 / 1000000.0)
+
+
+def test_histogram_reset():
+    histogram = Histogram('latency')
+    assert histogram.percentile(50) is None
+
+    histogram.record(0.5)
+    histogram.reset()
+
+    assert histogram.count == 0
+    assert histogram.percentile(50) is None
+    assert not any(histogram.counts)
+
+
+def test_histogram_merge():
+    first, second = Histogram('latency'), Histogram('latency')
+    for micros in range(1, 101):
+        first.record(micros / 1000000.0)
+    second.record(1.0)
+
+    first.merge(second)
+
+    assert first.count == 101
+    assert first.max == 1000000
+    assert first.min == 1
+    assert first.percentile(100) == 1.0
+    assert first.percentile(50) == pytest.approx(0.000051, rel=0.035)
+
+
+def test_registry_shares_metrics():
+    registry = MetricsRegistry()
+    outbound = registry.outbound('caller', 'service', 'endpoint')
+
+    assert registry.outbound('caller', 'service', b'endpoint') is outbound
+    assert registry.outbound('caller', 'service', 'other') is not outbound
+    assert registry.inbound('caller', 'service', 'endpoint') is not outbound
+    assert registry.counter(
+        'outbound.calls.sent', ('caller', 'service', 'endpoint')
+    ) is outbound.calls
+
+
+def test_flush_reports_and_resets():
+    sink = mock.Mock()
+    registry = MetricsRegistry(sinks=[sink])
+    calls = registry.outbound('caller', 'service', 'endpoint')
+    calls.calls.inc()
+    calls.latency.record(0.1)
+
+    registry.flush()
+
+    sink.report.assert_called_once_with([calls.calls], [calls.latency], [])
+    assert calls.calls.value == 0
+    assert calls.latency.count == 0
+
+    registry.flush()
+    sink.report.assert_called_with([], [], [])
+
+
+def test_gauges_and_collectors():
+    sink = mock.Mock()
+    registry = MetricsRegistry(sinks=[sink])
+    depth = registry.gauge('queue.depth')
+    registry.gauge('unset')
+
+    def collect(registry):
+        gauge = registry.gauge('queue.depth')
+        gauge.set(gauge.value + 1)
+
+    depth.set(3)
+    registry.add_collector(collect)
+    registry.flush()
+    sink.report.assert_called_once_with([], [], [depth])
+    assert depth.value == 4
+
+    registry.remove_collector(collect)
+    registry.flush()
+    sink.report.assert_called_with([], [], [depth])
+    assert depth.value == 4
+
+
+def test_broken_collector():
+    sink = mock.Mock()
+    registry = MetricsRegistry(sinks=[sink])
+    registry.add_collector(mock.Mock(side_effect=Exception('great sadness')))
+    registry.counter('foo').inc()
+
+    registry.flush()
+
+    sink.report.assert_called_once_with([registry.counter('foo')], [], [])
+
+
+def test_flush_survives_broken_sink():
+    broken, sink = mock.Mock(), mock.Mock()
+    broken.report.side_effect = Exception('great sadness')
+    registry = MetricsRegistry(sinks=[broken, sink])
+    registry.counter('foo').inc()
+
+    registry.flush()
+
+    assert sink.report.called
+    assert registry.counter('foo').value == 0
+
+
+def test_statsd_sink():
+    statsd = mock.Mock()
+    registry = MetricsRegistry(sinks=[StatsdSink(statsd, percentiles=(99,))])
+    calls = registry.outbound('caller', 'service', b'endpoint/1')
+    calls.calls.inc(2)
+    calls.latency.record(0.25)
+    registry.counter('connection.errors').inc()
+    registry.gauge('connection.count').set(3)
+
+    registry.flush()
+
+    statsd.count.assert_any_call(
+        'tchannel.outbound.calls.sent.caller.service.endpoint-1', 2
+    )
+    statsd.count.assert_any_call('tchannel.connection.errors', 1)
+    statsd.gauge.assert_called_once_with('tchannel.connection.count', 3)
+    statsd.timing.assert_called_once_with(
+        'tchannel.outbound.calls.latency.caller.service.endpoint-1.p99',
+        pytest.approx(250, rel=0.035),
+    )
+
+
+@pytest.mark.gen_test
+def test_call_metrics():
+    server_metrics = MetricsRegistry()
+    server = TChannel('server', metrics=server_metrics)
+
+    @server.json.register('ok')
+    def handle_ok(request):
+        return request.body
+
+    @server.json.register('fail')
+    def handle_fail(request):
+        raise BadRequestError('nope')
+
+    server.listen()
+
+    metrics = MetricsRegistry()
+    client = TChannel('client', metrics=metrics)
+
+    yield client.json('server', 'ok', {}, hostport=server.hostport)
+    with pytest.raises(BadRequestError):
+        yield client.json('server', 'fail', {}, hostport=server.hostport)
+
+    ok = metrics.outbound('client', 'server', 'ok')
+    assert ok.calls.value == 1
+    assert ok.successes.value == 1
+    assert ok.latency.count == 1
+    assert ok.attempt_latency.count == 1
+    assert ok.serialization_latency.count == 1
+    fail = metrics.outbound('client', 'server', 'fail')
+    assert fail.calls.value == 1
+    assert fail.system_errors.value == 1
+    assert fail.latency.count == 1
+    assert metrics.queue_wait.count >= 2
+
+    ok = server_metrics.inbound('client', 'server', 'ok')
+    assert ok.calls.value == 1
+    assert ok.successes.value == 1
+    assert ok.latency.count == 1
+    fail = server_metrics.inbound('client', 'server', 'fail')
+    assert fail.system_errors.value == 1
+    assert server_metrics.queue_wait.count >= 2
+
+
+def test_timings():
+    registry = MetricsRegistry()
+    calls = registry.outbound('caller', 'service', 'endpoint')
+    timings = Timings(calls)
+    with mock.patch('tchannel.metrics.now', side_effect=[1.5, 2.0]):
+        timings.mark('written')
+        timings.mark('received')
+
+    assert [phase for phase, _ in timings.marks] == ['written', 'received']
+    assert timings.durations()[1] == ('received', 0.5)
+    assert calls.phase('written').count == 1
+    assert calls.phase('received').percentile(50) == pytest.approx(0.5)
+    assert 'received=500.000ms' in repr(timings)
+
+
+@pytest.mark.gen_test
+def test_call_timings():
+    server_metrics = MetricsRegistry()
+    server = TChannel('server', metrics=server_metrics, timings=True)
+
+    @server.json.register('echo')
+    def handle_echo(request):
+        return request.body
+
+    @server.raw.register('raw-echo')
+    def handle_raw_echo(request):
+        return request.body
+
+    server.listen()
+
+    client = TChannel('client', timings=True)
+    response = yield client.json(
+        'server', 'echo', {'a': 1}, hostport=server.hostport
+    )
+
+    assert [phase for phase, _ in response.timings.marks] == [
+        'serialized', 'connected', 'written', 'received', 'decoded',
+    ]
+    echo = server_metrics.inbound('client', 'server', 'echo')
+    assert sorted(echo.phases) == ['handled', 'read', 'responded', 'routed']
+
+    response = yield client.raw(
+        'server', 'raw-echo', hostport=server.hostport
+    )
+    assert [phase for phase, _ in response.timings.marks] == [
+        'connected', 'written', 'received',
+    ]
+
+
+@pytest.mark.gen_test
+def test_timings_disabled():
+    server = TChannel('server')
+    server.json.register('echo')(lambda request: request.body)
+    server.listen()
+
+    response = yield TChannel('client').json(
+        'server', 'echo', {}, hostport=server.hostport
+    )
+    assert response.timings is None
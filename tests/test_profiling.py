@@ -0,0 +1,147 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import
+
+import time
+
+import pytest
+from tornado import gen
+
+from tchannel import TChannel
+from tchannel.errors import BadRequestError
+from tchannel.profiling import FALLBACK_ENDPOINT
+from tchannel.profiling import HandlerTimes
+from tchannel.profiling import StackSampler
+from tchannel.profiling import profile
+from tchannel.tornado.dispatch import RequestDispatcher
+
+
+def busy_loop(seconds):
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        pass
+
+
+def test_stack_sampler():
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    busy_loop(0.05)
+    sampler.stop()
+
+    assert sampler.samples > 0
+    lines = sampler.collapsed().splitlines()
+    assert len(lines) == len(sampler.stacks)
+    assert any('busy_loop (' in line for line in lines)
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) == max(sampler.stacks.values())
+
+
+def test_handler_times():
+    times = HandlerTimes()
+    times.record('foo', 0.1)
+    times.record('foo', 0.3)
+
+    summary = times.summary()['foo']
+    assert summary['calls'] == 2
+    assert summary['total'] == pytest.approx(0.4)
+    assert summary['mean'] == pytest.approx(0.2)
+    assert summary['max'] == pytest.approx(0.3)
+
+
+@pytest.mark.gen_test
+def test_profile_rejects_bad_arguments():
+    dispatcher = RequestDispatcher()
+    with pytest.raises(ValueError):
+        yield profile(dispatcher, 0.01, mode='nope')
+
+    future = profile(dispatcher, 0.01)
+    with pytest.raises(ValueError):
+        yield profile(dispatcher, 0.01)
+    yield future
+    assert dispatcher.handler_times is None
+
+
+@pytest.fixture
+def server(io_loop):  # need io_loop fixture for listen() to work
+    server = TChannel('server', debug_endpoints=True)
+    server.listen()
+
+    @server.json.register
+    def busy(request):
+        busy_loop(0.01)
+        return 'done'
+
+    @server.register(TChannel.FALLBACK)
+    def fallback(request):
+        return 'fallback'
+
+    return server
+
+
+@gen.coroutine
+def call_busy(client, server, until):
+    while time.time() < until:
+        yield client.json('server', 'busy', hostport=server.hostport)
+    yield client.raw('server', 'missing', hostport=server.hostport)
+
+
+@pytest.mark.gen_test
+@pytest.mark.parametrize('mode', ['collapsed', 'pstats'])
+def test_profile_endpoint(server, mode):
+    client = TChannel('client')
+    profiled = client.json(
+        'server', 'tchannel::profile', hostport=server.hostport,
+        body={'seconds': 0.2, 'mode': mode, 'interval': 0.001},
+    )
+    yield call_busy(client, server, time.time() + 0.1)
+
+    result = (yield profiled).body
+    assert result['seconds'] == 0.2
+    assert result['mode'] == mode
+    if mode == 'collapsed':
+        assert result['samples'] > 0
+        assert 'busy_loop (' in result['stacks']
+    else:
+        assert 'busy_loop' in result['stats']
+
+    busy = result['endpoints']['busy']
+    assert busy['calls'] > 0
+    assert busy['mean'] >= 0.01
+    assert result['endpoints'][FALLBACK_ENDPOINT]['calls'] == 1
+    assert server._dep_tchannel._handler.handler_times is None
+
+
+@pytest.mark.gen_test
+@pytest.mark.parametrize('body', [
+    {'seconds': 0},
+    {'seconds': 61},
+    {'seconds': 'ten'},
+    {'interval': -1},
+    {'mode': 'nope'},
+    [],
+])
+def test_profile_endpoint_rejects_bad_options(server, body):
+    client = TChannel('client')
+    with pytest.raises(BadRequestError):
+        yield client.json(
+            'server', 'tchannel::profile', hostport=server.hostport,
+            body=body,
+        )
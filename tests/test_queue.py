@@ -87,6 +87,28 @@ def test_get_then_put(items):
     assert got == items
 
 
+@pytest.mark.gen_test
+def test_len(items):
+    queue = Queue()
+    assert len(queue) == 0
+
+    for item in items:
+        yield queue.put(item)
+    assert len(queue) == len(items)
+
+    queue.get_nowait()
+    yield queue.get()
+    assert len(queue) == len(items) - 2
+
+    while len(queue):
+        queue.get_nowait()
+
+    future = queue.get()
+    yield queue.put(42)
+    yield future
+    assert len(queue) == 0
+
+
 @pytest.mark.gen_test
 @pytest.mark.concurrency_test
 def test_concurrent_producers_single_consumer():
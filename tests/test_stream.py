@@ -21,14 +21,19 @@
 from __future__ import absolute_import
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 
+import mock
 import pytest
 
 from tchannel.errors import UnexpectedError
 from tchannel.errors import TChannelError
 from tchannel.tornado import Response
+from tchannel.tornado.stream import FileSink
+from tchannel.tornado.stream import FileStream
 from tchannel.tornado.stream import InMemStream
 from tchannel.tornado.stream import PipeStream
+from tchannel.tornado.stream import read_full
 
 
 @pytest.mark.gen_test
@@ -51,6 +56,87 @@ def test_InMemStream():
         yield stream.write("4")
 
 
+@pytest.mark.gen_test
+def test_InMemStream_backpressure():
+    stream = InMemStream(max_buffer_size=2)
+    yield stream.write(b"1")
+
+    write_future = stream.write(b"23")
+    assert not write_future.done()
+
+    buf = yield stream.read()
+    assert buf == b"123"
+    yield write_future
+
+    # Closing the stream releases blocked writers.
+    write_future = stream.write(b"456")
+    assert not write_future.done()
+    stream.close()
+    yield write_future
+
+
+@pytest.mark.gen_test
+def test_FileStream(tmpdir):
+    path = tmpdir.join('data')
+    path.write_binary(b'0123456789')
+
+    stream = FileStream(str(path), offset=1, length=8, chunk_size=3)
+    assert len(stream) == 8
+
+    chunk = yield stream.read()
+    assert isinstance(chunk, memoryview)
+    assert chunk.tobytes() == b'123'
+
+    # Clones share the file but keep their own position.
+    clone = stream.clone()
+    rest = yield read_full(stream)
+    assert rest == b'45678'
+    rest = yield read_full(clone)
+    assert rest == b'45678'
+
+    with pytest.raises(UnexpectedError):
+        stream.write(b'nope')
+
+
+@pytest.mark.gen_test
+def test_FileStream_empty_file(tmpdir):
+    path = tmpdir.join('empty')
+    path.write_binary(b'')
+
+    chunk = yield FileStream(str(path)).read()
+    assert chunk == b''
+
+
+@pytest.mark.gen_test
+def test_FileSink(tmpdir):
+    path = tmpdir.join('sink')
+    sink = FileSink(str(path))
+    yield sink.write(b'abc')
+    yield sink.write(memoryview(b'def'))
+    sink.close()
+
+    assert sink.bytes_written == 6
+    assert path.read_binary() == b'abcdef'
+    with pytest.raises(UnexpectedError):
+        sink.write(b'ghi')
+
+
+@pytest.mark.gen_test
+def test_FileSink_writes_on_executor(tmpdir):
+    path = tmpdir.join('sink')
+    executor = ThreadPoolExecutor(max_workers=2)
+    sink = FileSink(str(path), executor=executor)
+
+    with mock.patch.object(executor, 'submit', wraps=executor.submit):
+        writes = [sink.write(str(i).encode('ascii')) for i in range(10)]
+        sink.close()
+        yield writes
+        assert executor.submit.call_count == 10
+
+    executor.shutdown()
+    assert path.read_binary() == b'0123456789'
+
+
 @pytest.mark.gen_test
 def test_PipeStream():
     r, w = os.pipe()
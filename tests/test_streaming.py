@@ -0,0 +1,148 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import os
+
+import pytest
+from tornado import gen
+
+from tchannel import TChannel
+from tchannel import schemes
+from tchannel.status import FAILED
+from tchannel.streaming import FileSink
+from tchannel.streaming import FileStream
+
+
+@pytest.fixture
+def server(io_loop):  # need io_loop fixture for listen() to work
+    server = TChannel(name='server')
+    server.listen()
+    return server
+
+
+@pytest.mark.gen_test
+def test_streaming_echo(server):
+
+    @server.raw.register(streaming=True)
+    @gen.coroutine
+    def echo(request, response):
+        headers = yield request.headers.read_all()
+        yield response.write_header(headers)
+
+        chunk = yield request.body.read()
+        while chunk:
+            yield response.write_body(chunk)
+            chunk = yield request.body.read()
+
+    body = b'x' * (1024 * 1024)
+    client = TChannel(name='client')
+    resp = yield client.raw(
+        service='server',
+        endpoint='echo',
+        headers=b'headers',
+        body=body,
+        hostport=server.hostport,
+    )
+
+    assert resp.headers == b'headers'
+    assert resp.body == body
+
+
+@pytest.mark.gen_test
+def test_streaming_response_writes_wait_for_connection(server):
+    pending = []
+
+    @server.raw.register(streaming=True)
+    @gen.coroutine
+    def download(request, response):
+        response.status = FAILED
+        for _ in range(64):
+            write_future = response.write_body(b'y' * 65536)
+            pending.append(not write_future.done())
+            yield write_future
+
+    client = TChannel(name='client')
+    resp = yield client.raw(
+        service='server',
+        endpoint='download',
+        hostport=server.hostport,
+    )
+
+    assert resp.status == FAILED
+    assert len(resp.body) == 64 * 65536
+    assert any(pending)
+
+
+@pytest.mark.gen_test
+def test_streaming_request_cancel_token(server):
+    tokens = []
+
+    @server.raw.register(streaming=True)
+    def endpoint(request, response):
+        tokens.append(request.cancel_token)
+        response.write_body(request.transport.caller_name)
+
+    client = TChannel(name='client')
+    resp = yield client.raw(
+        service='server',
+        endpoint='endpoint',
+        hostport=server.hostport,
+    )
+
+    assert resp.body == b'client'
+    assert not tokens[0].cancelled
+
+
+@pytest.mark.gen_test
+def test_file_upload(server, tmpdir):
+    source = tmpdir.join('source')
+    source.write_binary(os.urandom(3 * 1024 * 1024 + 1))
+    target = tmpdir.join('target')
+
+    @server.raw.register(streaming=True)
+    @gen.coroutine
+    def upload(request, response):
+        size = yield request.body.read_into(FileSink(str(target)))
+        response.write_body(str(size))
+
+    client = TChannel(name='client')
+    resp = yield client.raw(
+        service='server',
+        endpoint='upload',
+        body=FileStream(str(source)),
+        hostport=server.hostport,
+    )
+
+    assert resp.body == str(3 * 1024 * 1024 + 1).encode('ascii')
+    assert target.read_binary() == source.read_binary()
+
+
+def test_streaming_requires_raw(server):
+    with pytest.raises(AssertionError):
+        server.register(
+            scheme=schemes.JSON,
+            endpoint='endpoint',
+            handler=lambda request, response: None,
+            streaming=True,
+        )
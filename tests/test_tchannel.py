@@ -152,6 +152,118 @@ def test_timeout_should_raise_timeout_error():
     )
 
 
+@pytest.mark.gen_test
+@pytest.mark.call
+def test_timeout_cancels_request_on_server():
+
+    server = TChannel(name='server')
+    cancellations = []
+
+    @server.register(scheme=schemes.RAW)
+    @gen.coroutine
+    def endpoint(request):
+        reason = yield request.cancel_token.wait()
+        cancellations.append(reason)
+        raise gen.Return('too late')
+
+    server.listen()
+
+    tchannel = TChannel(name='client')
+    tombstones = []
+
+    with pytest.raises(TimeoutError):
+        yield tchannel.call(
+            scheme=schemes.RAW,
+            service='server',
+            arg1='endpoint',
+            hostport=server.hostport,
+            timeout=0.02,
+            retry_on='n',
+        )
+
+    yield gen.sleep(0.05)
+    assert cancellations == ['timeout']
+
+    # The handler returned but no response was written.
+    for peer in tchannel._dep_tchannel.peers.peers:
+        for conn in peer.connections:
+            tombstones.append(conn._request_tombstones.absorbed)
+    assert tombstones == [0]
+
+
+@pytest.mark.gen_test
+@pytest.mark.call
+def test_speculative_request_is_claimed_by_one_server():
+
+    servers = [TChannel(name='server'), TChannel(name='server')]
+    tokens = {}
+
+    for server in servers:
+        server.listen()
+
+        @gen.coroutine
+        def endpoint(request, hostport=server.hostport):
+            tokens[hostport] = request.cancel_token
+            yield gen.sleep(0.05)
+            raise gen.Return(hostport)
+
+        server.register(scheme=schemes.RAW, endpoint='endpoint',
+                        handler=endpoint)
+
+    tchannel = TChannel(
+        name='client', known_peers=[s.hostport for s in servers]
+    )
+    response = yield tchannel.call(
+        scheme=schemes.RAW,
+        service='server',
+        arg1='endpoint',
+        speculative=2,
+    )
+
+    # Only the winner finished its work; the other server either abandoned
+    # the request when it was claimed or dropped it on arrival.
+    winner = response.body.decode('utf8')
+    assert not tokens.pop(winner).cancelled
+    for token in tokens.values():
+        assert token.reason == 'claimed by %s' % winner
+
+
+@pytest.mark.gen_test
+@pytest.mark.call
+def test_speculative_request_fails_with_claimant_error():
+
+    servers = [TChannel(name='server') for _ in range(3)]
+
+    for server in servers:
+        server.listen()
+
+        @gen.coroutine
+        def endpoint(request):
+            yield gen.sleep(0.05)
+            raise Exception('failed')
+
+        server.register(scheme=schemes.RAW, endpoint='endpoint',
+                        handler=endpoint)
+
+    tchannel = TChannel(
+        name='client', known_peers=[s.hostport for s in servers]
+    )
+
+    # The copies claimed by the failing server are declined instead of
+    # being left to time out.
+    with pytest.raises(errors.UnexpectedError):
+        yield tchannel.call(
+            scheme=schemes.RAW,
+            service='server',
+            arg1='endpoint',
+            speculative=3,
+            timeout=5,
+        )
+
+    for peer in tchannel._dep_tchannel.peers.peers:
+        assert peer.total_outbound_pendings == 0
+
+
 def test_uninitialized_tchannel_is_fork_safe():
     """TChannel('foo') should not schedule any work on the io loop."""
 
@@ -74,6 +74,20 @@ service = thrift.load('tests/data/idls/ThriftTest.thrift')
             body='{"req": "body"',
         ),
     ),
+    (
+        [
+            '-s', 'larry',
+            '--endpoint', 'foo',
+            '--rate', '5000',
+            '--concurrency', '200',
+        ],
+        dict(
+            rate=5000.0,
+            duration=10.0,
+            concurrency=200,
+            processes=1,
+        ),
+    ),
 ])
 def test_parse_valid_args(input, expectations):
     args = parse_args(input)
@@ -145,6 +159,26 @@ def test_parse_valid_args(input, expectations):
         ],
         "can't use --thrift and --raw together",
     ),
+    (
+        ['--service', 'larry', '--rate', '0'],
+        "--rate must be positive",
+    ),
+    (
+        ['--service', 'larry', '--rate', '10', '--duration', '0'],
+        "--duration must be positive",
+    ),
+    (
+        ['--service', 'larry', '--rate', '10', '--concurrency', '0'],
+        "--concurrency must be at least 1",
+    ),
+    (
+        ['--service', 'larry', '--rate', '10', '--processes', '0'],
+        "--processes must be at least 1",
+    ),
+    (
+        ['--service', 'larry', '--body-file', 'missing.json'],
+        'No such file or directory',
+    ),
 ])
 def test_parse_invalid_args(input, message, capsys):
     with pytest.raises(SystemExit) as e:
@@ -215,6 +249,54 @@ def test_tcurl_json():
     assert response.body == {"thing": "foo"}
 
 
+def test_parse_body_files(tmpdir):
+    body = tmpdir.join('body.json')
+    body.write('{"thing": "foo"}')
+    headers = tmpdir.join('headers.json')
+    headers.write('{"req": "header"}')
+
+    args = parse_args([
+        '-s', 'larry',
+        '--body-file', str(body),
+        '--headers-file', str(headers),
+    ])
+    assert args.body == {"thing": "foo"}
+    assert args.headers == {"req": "header"}
+
+    args = parse_args(['-s', 'larry', '--body-file', str(body), '--raw'])
+    assert args.body == b'{"thing": "foo"}'
+
+
+@pytest.mark.gen_test
+@pytest.mark.parametrize('processes', [1, 2])
+def test_tcurl_load(processes, capsys):
+    server = TChannel(name='server')
+
+    @server.json.register
+    def test(request):
+        return request.body
+
+    server.listen()
+
+    result = yield main([
+        '-s', 'server',
+        '--host', server.hostport,
+        '--body', '{"thing": "foo"}',
+        '--endpoint', 'test',
+        '--rate', '100',
+        '--duration', '0.2',
+        '--processes', str(processes),
+    ])
+
+    assert result.sent == 20
+    assert result.succeeded == 20
+    assert result.latency.count == 20
+
+    out, err = capsys.readouterr()
+    assert '20 calls in' in out
+    assert '99%' in out
+
+
 @pytest.mark.gen_test
 def test_catch_errors(capsys):
 
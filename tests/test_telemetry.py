@@ -0,0 +1,124 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import
+
+import time
+
+import pytest
+from tornado import gen
+
+from tchannel import TChannel
+from tchannel.metrics import Histogram
+from tchannel.metrics import MetricsRegistry
+from tchannel.telemetry import LoopMonitor
+
+
+@pytest.mark.gen_test
+def test_loop_monitor_measures_blocking():
+    histogram = Histogram('loop.lag')
+    monitor = LoopMonitor(interval=0.01, histogram=histogram)
+    monitor.start()
+    assert monitor.running
+
+    yield gen.sleep(0.005)
+    time.sleep(0.05)  # block the IOLoop
+    yield gen.sleep(0.03)
+    monitor.stop()
+
+    assert not monitor.running
+    assert monitor.max_lag >= 0.03
+    assert monitor.samples == histogram.count > 1
+    assert monitor.snapshot() == {
+        'interval': 0.01,
+        'lag': monitor.lag,
+        'max_lag': monitor.max_lag,
+        'samples': monitor.samples,
+    }
+
+
+@pytest.mark.gen_test
+def test_snapshot_and_debug_endpoint():
+    server = TChannel('server', loop_monitor=0.01, debug_endpoints=True)
+    server.listen()
+    client = TChannel('client')
+
+    response = yield client.json(
+        'server', 'tchannel::debug', hostport=server.hostport
+    )
+    snapshot = response.body
+
+    assert snapshot['name'] == 'server'
+    assert snapshot['hostport'] == server.hostport
+    assert set(snapshot['loop']) == {'interval', 'lag', 'max_lag', 'samples'}
+    [connection] = snapshot['connections']
+    assert connection['direction'] == 'in'
+    assert connection['closed'] is False
+    assert connection['inbound_calls'] == 1  # the debug call itself
+
+    [connection] = client.snapshot()['connections']
+    assert connection['direction'] == 'out'
+    assert connection['hostport'] == server.hostport
+    assert connection['writer_queue'] == 0
+    assert connection['inbound_backlog'] == 0
+    assert connection['outbound_pending'] == 0
+    assert connection['tombstones'] == 0
+    assert client.snapshot()['loop'] is None
+
+    server.close()
+    assert not server.loop_monitor.running
+
+
+@pytest.mark.gen_test
+def test_debug_endpoint_is_opt_in():
+    server = TChannel('server')
+    server.listen()
+    client = TChannel('client')
+
+    with pytest.raises(Exception):
+        yield client.json(
+            'server', 'tchannel::debug', hostport=server.hostport
+        )
+
+
+@pytest.mark.gen_test
+def test_connection_gauges():
+    metrics = MetricsRegistry()
+    server = TChannel('server', metrics=metrics, loop_monitor=0.01)
+    server.listen()
+
+    @server.raw.register('echo')
+    def echo(request):
+        return request.body
+
+    client = TChannel('client')
+    yield client.raw('server', 'echo', 'hi', hostport=server.hostport)
+    yield gen.sleep(0.02)
+
+    metrics.collect()
+    assert metrics.gauge('connection.count').value == 1
+    assert metrics.gauge('connection.writer-queue').value == 0
+    assert metrics.gauge('connection.inbound-calls').value == 0
+    assert metrics.histogram('loop.lag').count > 0
+
+    server.close()
+    metrics.gauge('connection.count').set(None)
+    metrics.collect()
+    assert metrics.gauge('connection.count').value is None
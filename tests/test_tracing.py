@@ -36,6 +36,7 @@ import tornado.web
 from jaeger_client import Tracer, ConstSampler
 from jaeger_client.reporter import InMemoryReporter
 from opentracing import Format
+from opentracing.mocktracer import MockTracer
 from opentracing_instrumentation.client_hooks.tornado_http import (
     install_patches,
     reset_patchers
@@ -48,6 +49,7 @@ from opentracing_instrumentation.request_context import (
 from tchannel import Response, thrift, TChannel, schemes
 from tchannel.errors import BadRequestError
 from tchannel.event import EventHook
+from tchannel.messages import common
 from tornado import netutil
 from tornado.httpclient import HTTPRequest
 from tchannel import tracing
@@ -522,3 +524,107 @@ def test_tracing_field_in_error_message():
     assert hook.error_trace
     assert hook.request_trace
     assert hook.error_trace == hook.request_trace
+
+
+@pytest.yield_fixture
+def unsampled_tracer():
+    tracer = Tracer(
+        service_name='test-tracer',
+        sampler=ConstSampler(False),
+        reporter=InMemoryReporter(),
+        scope_manager=TornadoScopeManager()
+    )
+    opentracing.set_global_tracer(tracer)
+    try:
+        yield tracer
+    finally:
+        opentracing._reset_global_tracer()
+        tracer.close()
+
+
+@pytest.mark.gen_test
+@pytest.mark.parametrize('baggage', [None, 'is great'])
+def test_unsampled_requests_skip_spans(unsampled_tracer, baggage):
+    server_tracer = mock.Mock(wraps=unsampled_tracer)
+    backend = TChannel('backend', tracer=server_tracer)
+    server = TChannel('server', tracer=server_tracer)
+
+    @backend.raw.register('trace')
+    def trace(request):
+        span = backend.context_provider.get_current_span()
+        return str(span.tracing.trace_id)
+
+    @server.json.register('call')
+    @tornado.gen.coroutine
+    def call(request):
+        span = server.context_provider.get_current_span()
+        assert isinstance(span, tracing.UnsampledSpan) == (baggage is None)
+        response = yield server.raw(
+            'backend', 'trace', hostport=backend.hostport
+        )
+        raise tornado.gen.Return(response.body)
+
+    backend.listen()
+    server.listen()
+
+    client = TChannel('client', tracer=unsampled_tracer)
+    span = unsampled_tracer.start_span('root')
+    if baggage:
+        span.set_baggage_item('bender', baggage)
+    with span:
+        with client.context_provider.span_in_context(span):
+            response = client.json(
+                'server', 'call', {}, hostport=server.hostport
+            )
+        response = yield response
+
+    assert int(response.body) == span.trace_id
+    if baggage is None:
+        assert not server_tracer.start_span.called
+        assert not server_tracer.inject.called
+    else:
+        assert server_tracer.start_span.called
+
+
+def test_unsampled_trace_field_without_zipkin_support():
+    # Clients whose tracer doesn't support Zipkin format send a random,
+    # unsampled Trace field and the real context in the headers.
+    tracer = MockTracer()
+    parent = tracer.start_span('parent')
+    carrier = {}
+    tracer.inject(parent.context, Format.TEXT_MAP, carrier)
+    headers = {
+        tracing.TRACING_KEY_PREFIX + k: v for k, v in carrier.items()
+    }
+    request = mock.Mock(
+        endpoint='endpoint', headers={}, tracing=common.random_tracing(),
+    )
+
+    server_tracer = tracing.ServerTracer(tracer, 'endpoint')
+    server_tracer.start_basic_span(request)
+    span = server_tracer.start_span(request, headers, None, None)
+
+    assert span.parent_id == parent.context.span_id
+    assert span.context.trace_id == parent.context.trace_id
+
+
+def test_noop_tracer_client_span():
+    channel = mock.Mock(tracer=opentracing.Tracer())
+    channel.context_provider.get_current_span.return_value = None
+
+    span, headers = tracing.ClientTracer(channel).start_span(
+        service='service', endpoint='endpoint', headers={'foo': 'bar'},
+    )
+
+    assert isinstance(span, tracing.UnsampledSpan)
+    assert headers == {'foo': 'bar'}
+    assert tracing.span_to_tracing_field(span) is span.tracing
+
+    child, _ = tracing.ClientTracer(mock.Mock(
+        tracer=opentracing.Tracer(),
+        context_provider=mock.Mock(
+            get_current_span=mock.Mock(return_value=span)
+        ),
+    )).start_span(service='service', endpoint='endpoint')
+    assert child.tracing.trace_id == span.tracing.trace_id
+    assert child.tracing.parent_id == span.tracing.span_id
@@ -23,6 +23,8 @@ from __future__ import absolute_import
 import pytest
 from mock import Mock
 
+from tchannel.testing.vcr import binary
+from tchannel.testing.vcr import proxy
 from tchannel.testing.vcr.cassette import Cassette
 from tchannel.testing.vcr.exceptions import (
     VCRError,
@@ -34,8 +36,13 @@ from tchannel.testing.vcr.record_modes import RecordMode
 from .strategies import requests, responses
 
 
+@pytest.fixture(params=['data.yaml', 'data.vcr'])
+def path(tmpdir, request):
+    return tmpdir.join(request.param)
+
+
 @pytest.fixture
-def path(tmpdir):
+def yaml_path(tmpdir):
     return tmpdir.join('data.yaml')
 
 
@@ -145,8 +152,8 @@ def test_does_not_forget_on_new_interactions(path):
         assert res2 == cass.replay(req2)
 
 
-def test_unsupported_version(path):
-    path.write(
+def test_unsupported_version(yaml_path):
+    yaml_path.write(
         '\n'.join([
             'interactions:',
             '- request:',
@@ -162,6 +169,14 @@ def test_unsupported_version(path):
         ])
     )
 
+    with pytest.raises(UnsupportedVersionError):
+        Cassette(str(yaml_path))
+
+
+def test_unsupported_binary_version(tmpdir):
+    path = tmpdir.join('data.vcr')
+    path.write_binary(binary.MAGIC + b'\x02')
+
     with pytest.raises(UnsupportedVersionError):
         Cassette(str(path))
 
@@ -202,7 +217,8 @@ def test_record_mode_all(path):
         assert res2 == cass.replay(req)
 
 
-def test_interactions_cache(path):
+def test_interactions_cache(yaml_path):
+    path = yaml_path
     Cassette._cache = {}
     path.write(
         '\n'.join([
@@ -229,3 +245,76 @@ def test_interactions_cache(path):
         assert not mock_serializer.load.called
         assert len(Cassette._cache) == 1
         assert len(cass._available) == 1
+
+
+def test_binary_interactions_are_decoded_lazily(tmpdir):
+    path = str(tmpdir.join('data.vcr'))
+    request, response = requests.example(), responses.example()
+    with Cassette(path) as cass:
+        cass.record(request, response)
+        cass.record(requests.example(), responses.example())
+
+    with Cassette(path) as cass:
+        interactions = cass._loaded.interactions
+        assert all(i._request is None for i in interactions)
+
+        assert cass.replay(request) == response
+        assert interactions[0]._response is not None
+        assert interactions[1]._response is None
+
+
+def test_replay_by_index(path):
+    requests_ = [
+        proxy.Request(
+            serviceName='service', endpoint='endpoint', body=b'body',
+            headers=headers,
+        )
+        for headers in (b'1', b'2', b'1')
+    ]
+    responses_ = [
+        proxy.Response(code=0, body=body) for body in (b'a', b'b', b'c')
+    ]
+
+    with Cassette(str(path)) as cass:
+        for request, response in zip(requests_, responses_):
+            cass.record(request, response)
+        cass.record(
+            proxy.Request(serviceName='service', endpoint='other', body=b''),
+            proxy.Response(code=0, body=b'd'),
+        )
+
+    with Cassette(str(path)) as cass:
+        assert len(cass._index) == 2
+        assert cass.replay(requests_[1]).body == b'b'
+        assert cass.replay(requests_[0]).body == b'a'
+        assert cass.replay(requests_[0]).body == b'c'
+        assert not cass.can_replay(requests_[0])
+        assert [i.response.body for i in cass._available] == [b'd']
+
+
+def test_cached_interactions_are_shared(path):
+    request, response = requests.example(), responses.example()
+    with Cassette(str(path)) as cass:
+        cass.record(request, response)
+
+    with Cassette(str(path)) as first:
+        with Cassette(str(path)) as second:
+            assert first._loaded is second._loaded
+            assert first.replay(request) == response
+            assert second.can_replay(request)
+            assert second.replay(request) == response
+            assert len(first._loaded.interactions) == 1
+
+
+def test_matchers_without_indexed_fields(path):
+    request = proxy.Request(
+        serviceName='service', endpoint='endpoint', body=b'1', headers=b'h',
+    )
+    with Cassette(str(path)) as cass:
+        cass.record(request, proxy.Response(code=0, body=b'a'))
+
+    other = proxy.Request(
+        serviceName='other', endpoint='other', body=b'2', headers=b'h',
+    )
+    with Cassette(str(path), matchers=('headers',)) as cass:
+        assert cass.replay(other).body == b'a'
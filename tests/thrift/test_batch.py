@@ -0,0 +1,188 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import pytest
+
+from tchannel import TChannel
+from tchannel import thrift
+from tchannel.errors import BadRequestError
+from tchannel.errors import ReadError
+from tchannel.errors import UnexpectedError
+from tchannel.event import EventHook
+from tchannel.thrift import batch as thrift_batch
+
+
+@pytest.fixture
+def server(io_loop):  # need io_loop fixture for listen() to work
+    server = TChannel(name='server')
+    server.listen()
+    return server
+
+
+@pytest.fixture
+def module(server):
+    return thrift.load(
+        'tests/data/idls/ThriftTest.thrift',
+        service='server',
+        hostport=server.hostport,
+    )
+
+
+@pytest.fixture
+def received(server, module):
+    """Endpoints of the requests received by the server."""
+    endpoints = []
+
+    class Hook(EventHook):
+        def before_receive_request(self, request):
+            endpoints.append(request.endpoint)
+
+    server.hooks.register(Hook())
+
+    @server.thrift.register(module.ThriftTest)
+    def testString(request):
+        return request.body.thing.upper() + request.headers.get('suffix', '')
+
+    @server.thrift.register(module.ThriftTest)
+    def testException(request):
+        if request.body.arg == 'Xception':
+            raise module.Xception(errorCode=1001, message='oops')
+        if request.body.arg == 'TException':
+            raise ValueError('great sadness')
+
+    return endpoints
+
+
+@pytest.mark.gen_test
+def test_batch(server, module, received):
+    client = TChannel('client')
+
+    with client.thrift.batch() as batch:
+        futures = [
+            batch(module.ThriftTest.testString(key))
+            for key in ('a', 'b', 'c')
+        ]
+        futures.append(batch(
+            module.ThriftTest.testString('d'), headers={'suffix': '!'}
+        ))
+        assert not any(future.done() for future in futures)
+
+    responses = yield futures
+    assert [r.body for r in responses] == ['A', 'B', 'C', 'D!']
+    assert received == ['ThriftTest::testString'] * 4
+
+
+@pytest.mark.gen_test
+def test_batch_window(server, module, received):
+    client = TChannel('client')
+    batch = client.thrift.batch(window=0.01)
+
+    futures = [batch(module.ThriftTest.testString(k)) for k in ('a', 'b')]
+    assert len(batch) == 2
+
+    responses = yield futures
+    assert [r.body for r in responses] == ['A', 'B']
+    assert len(batch) == 0
+
+
+@pytest.mark.gen_test
+def test_batch_envelope(server, module, received):
+    server.thrift.register_batch_endpoint()
+    client = TChannel('client')
+
+    with client.thrift.batch(envelope=True) as batch:
+        strings = [
+            batch(module.ThriftTest.testString('a')),
+            batch(
+                module.ThriftTest.testString('b'), headers={'suffix': '!'}
+            ),
+        ]
+        ok = batch(module.ThriftTest.testException('ok'))
+        failed = batch(module.ThriftTest.testException('Xception'))
+        unexpected = batch(module.ThriftTest.testException('TException'))
+
+    responses = yield strings
+    assert [r.body for r in responses] == ['A', 'B!']
+
+    response = yield ok
+    assert response.body is None
+
+    with pytest.raises(module.Xception) as exc_info:
+        yield failed
+    assert exc_info.value.errorCode == 1001
+
+    with pytest.raises(UnexpectedError) as exc_info:
+        yield unexpected
+    assert 'great sadness' in str(exc_info.value)
+
+    # One envelope per endpoint.
+    assert received == [thrift_batch.BATCH_ENDPOINT] * 2
+
+
+@pytest.mark.gen_test
+def test_batch_envelope_not_supported(server, module, received):
+    client = TChannel('client')
+
+    with client.thrift.batch(envelope=True) as batch:
+        futures = [batch(module.ThriftTest.testString(k)) for k in 'ab']
+
+    for future in futures:
+        with pytest.raises(BadRequestError):
+            yield future
+
+
+@pytest.mark.gen_test
+def test_batch_envelope_unknown_endpoint(server, module):
+    server.thrift.register_batch_endpoint()
+    client = TChannel('client')
+
+    with client.thrift.batch(envelope=True) as batch:
+        futures = [batch(module.ThriftTest.testI32(i)) for i in range(2)]
+
+    for future in futures:
+        with pytest.raises(BadRequestError) as exc_info:
+            yield future
+        assert "can't be batched" in str(exc_info.value)
+
+
+def test_batch_discarded_on_error(module):
+    client = TChannel('client')
+
+    with pytest.raises(ValueError):
+        with client.thrift.batch() as batch:
+            batch(module.ThriftTest.testString('a'))
+            raise ValueError()
+
+    assert len(batch) == 0
+
+
+def test_envelope_roundtrip():
+    calls = [(b'\x00\x00', b'body'), (b'\x00\x01\x00\x01a\x00\x00', b'')]
+    data = thrift_batch.encode_request('Service::method', calls)
+    assert thrift_batch.decode_request(data) == ('Service::method', calls)
+
+    results = [(0, b'\x00\x00', b'x'), (1, b'\x00\x00', b'')]
+    data = thrift_batch.encode_response(results)
+    assert thrift_batch.decode_response(data) == results
+
+    with pytest.raises(ReadError):
+        thrift_batch.decode_response(data[:-1])
@@ -0,0 +1,149 @@
+# Copyright (c) 2016 Uber Technologies, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+from six.moves import cPickle as pickle
+
+from tchannel import thrift
+from tchannel.thrift.cache import ModuleCache
+from tchannel.thrift import cache
+
+
+def test_load_same_content_returns_same_module(tmpdir):
+    path = str(tmpdir.join('service.thrift'))
+    tmpdir.join('service.thrift').write('struct Foo { 1: optional string a }')
+
+    modules = ModuleCache()
+    assert modules.load(path) is modules.load(path)
+    assert modules.load(path, 'other') is not modules.load(path)
+    assert modules.load(path, 'other').__name__ == 'other'
+
+
+def test_load_changed_content(tmpdir):
+    thrift_file = tmpdir.join('service.thrift')
+    thrift_file.write('struct Foo { 1: optional string a }')
+    modules = ModuleCache()
+    foo = modules.load(str(thrift_file)).Foo
+
+    thrift_file.write('struct Foo { 1: optional string b }')
+    bar = modules.load(str(thrift_file)).Foo
+
+    assert foo is not bar
+    assert bar(b='x').b == 'x'
+
+
+def test_disk_cache_skips_parsing(tmpdir):
+    cache_dir = tmpdir.join('cache')
+    tmpdir.join('shared.thrift').write('struct Foo { 1: required i32 a }')
+    tmpdir.join('service.thrift').write(
+        'include "./shared.thrift"\n'
+        'service Service { shared.Foo get() }'
+    )
+    path = str(tmpdir.join('service.thrift'))
+
+    modules = ModuleCache(str(cache_dir))
+    modules.load(path)
+    assert len(cache_dir.listdir()) == 2
+
+    # A different process with the same cache directory.
+    modules = ModuleCache(str(cache_dir))
+    module = modules.load(path)
+    assert modules.programs._parser is None
+    assert module.shared.Foo(a=1).a == 1
+    assert module.Service.get
+
+
+def test_disk_cache_ignores_bad_entries(tmpdir):
+    cache_dir = tmpdir.join('cache')
+    tmpdir.join('service.thrift').write('struct Foo { 1: optional i32 a }')
+    path = str(tmpdir.join('service.thrift'))
+
+    ModuleCache(str(cache_dir)).load(path)
+    (entry,) = cache_dir.listdir()
+    entry.write('not a pickle')
+
+    assert ModuleCache(str(cache_dir)).load(path).Foo(a=1).a == 1
+
+
+def test_disk_cache_ignores_unpicklable_programs(tmpdir, monkeypatch):
+    cache_dir = tmpdir.join('cache')
+    tmpdir.join('service.thrift').write('struct Foo { 1: optional i32 a }')
+    path = str(tmpdir.join('service.thrift'))
+
+    def dump(program, f, protocol):
+        f.write(b'partial')
+        raise pickle.PicklingError('unpicklable')
+
+    monkeypatch.setattr(cache.pickle, 'dump', dump)
+
+    assert ModuleCache(str(cache_dir)).load(path).Foo(a=1).a == 1
+    assert cache_dir.listdir() == []
+
+
+def test_set_cache_dir(tmpdir):
+    cache_dir = tmpdir.join('cache')
+    thrift_file = tmpdir.join('service.thrift')
+    # Unique contents so the file isn't already cached in memory.
+    thrift_file.write('# %s\nservice Service { void ping() }' % tmpdir)
+
+    original = cache._cache.programs.directory
+    thrift.set_cache_dir(str(cache_dir))
+    try:
+        module = thrift.load(str(thrift_file), service='service')
+        assert module.Service.ping
+        assert len(cache_dir.listdir()) == 1
+    finally:
+        thrift.set_cache_dir(original)
+
+
+def test_load_changed_include(tmpdir):
+    shared = tmpdir.join('shared.thrift')
+    shared.write('struct S { 1: optional string a }')
+    tmpdir.join('main.thrift').write(
+        'include "./shared.thrift"\n'
+        'service Service { shared.S get() }'
+    )
+    path = str(tmpdir.join('main.thrift'))
+    modules = ModuleCache()
+    before = modules.load(path)
+    assert modules.load(path) is before
+
+    shared.write(
+        'struct S { 1: optional string a\n 2: optional string b }'
+    )
+    after = modules.load(path)
+
+    assert after is not before
+    assert after.shared.S(a='x', b='y').b == 'y'
+    # The shared module itself isn't stale either.
+    assert modules.load(str(shared)).S(b='z').b == 'z'
+
+
+def test_compiler_without_known_slots(monkeypatch):
+    monkeypatch.setattr(cache, '_COMPILER_SLOTS', frozenset())
+    parser = cache.ProgramCache()
+
+    compiler = cache._compiler(parser)
+
+    assert type(compiler) is cache.Compiler
+    assert compiler.parser is parser
+    module = compiler.compile('service', 'struct Foo {}').link().surface
+    assert module.Foo
@@ -29,7 +29,7 @@ from tornado.iostream import IOStream, StreamClosedError
 
 from tchannel import TChannel
 from tchannel import messages
-from tchannel.errors import TimeoutError, ReadError
+from tchannel.errors import CanceledError, TimeoutError, ReadError
 from tchannel.tornado import connection
 from tchannel.tornado.message_factory import MessageFactory
 from tchannel.tornado.peer import Peer
@@ -300,6 +300,23 @@ def test_writer_write_error():
         yield writer.put(messages.PingResponseMessage())
 
 
+@pytest.mark.gen_test
+def test_writer_coalesces_queued_frames():
+    server, client = socket.socketpair()
+    reader = connection.Reader(IOStream(server))
+    writer = connection.Writer(IOStream(client))
+
+    with mock.patch.object(
+        writer.io_stream, 'write', wraps=writer.io_stream.write
+    ) as write:
+        yield [writer.put(messages.PingRequestMessage()) for _ in range(10)]
+
+    assert write.call_count == 1
+    for _ in range(10):
+        ping = yield reader.get()
+        assert isinstance(ping, messages.PingRequestMessage)
+
+
 @pytest.mark.gen_test
 def test_reader_read_error():
     server, client = socket.socketpair()
@@ -470,3 +487,45 @@ def test_timeout_not_pending(tornado_pair):
 
     with pytest.raises(TimeoutError):
         yield response_future
+
+    # the server was told to stop working on the request
+    cancel = yield server._await()
+    assert cancel.message_type == messages.Types.CANCEL
+    assert cancel.id == id
+    assert cancel.why == 'timeout'
+
+
+@pytest.mark.gen_test
+def test_cancel_request(tornado_pair):
+    server, client = tornado_pair
+    headers = dummy_headers()
+
+    server.tchannel = mock.MagicMock()
+    client.tchannel = mock.MagicMock()
+
+    handshake_future = client.initiate_handshake(headers=headers)
+    yield server.expect_handshake(headers=headers)
+    yield handshake_future
+
+    request = Request(
+        id=client.writer.next_message_id(),
+        service='server',
+        endpoint='bar',
+        headers={'cn': 'client'},
+        ttl=1,
+    )
+    response_future = client.send_request(request)
+    call_req = yield server._await()
+    assert call_req.message_type == messages.Types.CALL_REQ
+
+    assert client.cancel_request(request, why='lost the race')
+    assert not client.cancel_request(request)
+    assert request.id in client._request_tombstones
+
+    with pytest.raises(CanceledError):
+        yield response_future
+
+    cancel = yield server._await()
+    assert cancel.message_type == messages.Types.CANCEL
+    assert cancel.id == request.id
+    assert cancel.why == 'lost the race'
@@ -26,6 +26,8 @@ import tornado.concurrent
 import tornado.gen
 
 from tchannel.event import EventType
+from tchannel.messages import ClaimMessage
+from tchannel.messages import Tracing
 from tchannel.messages.error import ErrorCode
 from tchannel.tornado.dispatch import RequestDispatcher
 
@@ -41,6 +43,7 @@ def req():
     request = mock.MagicMock(
         endpoint='foo',
         headers={'as': 'raw'},
+        args=[b'foo', b'', b''],
     )
     endpoint_future = tornado.concurrent.Future()
     endpoint_future.set_result(None)
@@ -101,3 +104,147 @@ def test_uncaught_exceptions_fire_event_hook(dispatcher, req, connection):
         req,
         mock.ANY,
     )
+
+
+@pytest.fixture
+def speculative_req(req):
+    req.headers = {'as': 'raw', 'cas': '10.0.0.2:2'}
+    req.tracing = Tracing(span_id=1, parent_id=0, trace_id=2, traceflags=0)
+    return req
+
+
+def claim_from(connection, hostport, trace_id=2):
+    host, port = hostport.split(':')
+    connection.remote_host = host
+    connection.remote_host_port = int(port)
+    return ClaimMessage(
+        ttl=1000,
+        tracing=Tracing(
+            span_id=1 if trace_id else 0, parent_id=0, trace_id=trace_id,
+            traceflags=0,
+        ),
+    )
+
+
+@pytest.mark.gen_test
+def test_claim_before_call_drops_request(
+    dispatcher, speculative_req, connection
+):
+    handler = mock.Mock()
+    dispatcher.register('foo', handler)
+    dispatcher.handle_claim(claim_from(connection, '10.0.0.2:2'), connection)
+
+    yield dispatcher.handle_call(speculative_req, connection)
+
+    assert not handler.called
+    assert speculative_req.cancel_token.reason == 'claimed by 10.0.0.2:2'
+    assert connection.send_error.call_args[0][0].code == ErrorCode.declined
+
+
+@pytest.mark.gen_test
+@pytest.mark.parametrize('own_hostport, cancelled', [
+    ('10.0.0.1:1', False),
+    ('10.0.0.3:3', True),
+])
+def test_claim_while_processing(
+    dispatcher, speculative_req, connection, own_hostport, cancelled
+):
+    connection.tchannel.hostport = own_hostport
+    processing = tornado.concurrent.Future()
+    claimed = tornado.concurrent.Future()
+
+    @tornado.gen.coroutine
+    def handler(req, response):
+        processing.set_result(None)
+        yield claimed
+
+    dispatcher.register('foo', handler)
+    future = dispatcher.handle_call(speculative_req, connection)
+    yield processing
+
+    # Both peers claimed the request; the lower host-port keeps it.
+    dispatcher.handle_claim(claim_from(connection, '10.0.0.2:2'), connection)
+    claimed.set_result(None)
+    yield future
+
+    assert speculative_req.cancel_token.cancelled == cancelled
+    assert dispatcher._speculative_calls == {}
+    assert connection.send_error.called == cancelled
+
+
+@pytest.mark.gen_test
+def test_speculative_call_without_trace_id(
+    dispatcher, speculative_req, connection
+):
+    # Clients that don't fill in the tracing field send all zeroes, so
+    # their calls can't be told apart from each other.
+    speculative_req.tracing = Tracing(0, 0, 0, 0)
+    processing = tornado.concurrent.Future()
+    finish = tornado.concurrent.Future()
+
+    @tornado.gen.coroutine
+    def handler(req, response):
+        processing.set_result(None)
+        yield finish
+
+    dispatcher.register('foo', handler)
+    dispatcher.handle_claim(
+        claim_from(connection, '10.0.0.2:2', trace_id=0), connection
+    )
+    future = dispatcher.handle_call(speculative_req, connection)
+    yield processing
+
+    assert dispatcher._speculative_calls == {}
+    assert not connection.tchannel.peers.get_isolated.called
+    dispatcher.handle_claim(
+        claim_from(connection, '10.0.0.2:2', trace_id=0), connection
+    )
+    finish.set_result(None)
+    yield future
+
+    assert not speculative_req.cancel_token.cancelled
+
+
+@pytest.mark.gen_test
+def test_unknown_endpoint_rejected_before_processing(
+    dispatcher, req, connection
+):
+    with mock.patch(
+        'tchannel.tornado.dispatch.DeprecatedResponse'
+    ) as response, mock.patch(
+        'tchannel.tornado.dispatch.tracing.ServerTracer'
+    ) as tracer:
+        yield dispatcher.handle_call(req, connection)
+
+    assert not response.called
+    assert not tracer.called
+    error = connection.send_error.call_args[0][0]
+    assert error.code == ErrorCode.bad_request
+    assert error.description == "Endpoint 'foo' is not defined"
+    assert error.id == req.id
+
+
+@pytest.mark.gen_test
+def test_arg_scheme_mismatch(dispatcher, req, connection):
+    handler = mock.Mock()
+    json = mock.Mock()
+    json.name = 'json'
+    dispatcher.register('foo', handler, req_serializer=json)
+
+    yield dispatcher.handle_call(req, connection)
+
+    assert not handler.called
+    error = connection.send_error.call_args[0][0]
+    assert error.description == "Server expected a 'json' but request is 'raw'"
+
+
+def test_register_replaces_route(dispatcher):
+    json = mock.Mock()
+    json.name = 'json'
+    dispatcher.register('foo', mock.Mock(), req_serializer=json)
+    dispatcher.register(u'foo', mock.Mock())
+
+    assert set(dispatcher._routes) == {(b'foo', 'raw')}
+    handler, endpoint = dispatcher._routes[(b'foo', 'raw')]
+    assert handler is dispatcher.handlers['foo']
+    assert endpoint == 'foo'
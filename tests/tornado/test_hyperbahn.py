@@ -154,10 +154,9 @@ def test_advertise(echobahn):
 
     response = yield hyperbahn.advertise(channel, 'test', [echobahn.hostport])
     result = yield response.get_body()
-    assert (
-        result == b'{"services": [{"serviceName": "test", "cost": 0}]}' or
-        result == b'{"services": [{"cost": 0, "serviceName": "test"}]}'
-    )
+    assert json.loads(result.decode('utf8')) == {
+        'services': [{'serviceName': 'test', 'cost': 0}]
+    }
 
 
 @pytest.mark.gen_test
@@ -28,6 +28,7 @@ from tornado import gen
 
 from tchannel import TChannel
 from tchannel.errors import NoAvailablePeerError
+from tchannel.event import EventHook
 from tchannel.tornado import peer as tpeer
 from tchannel.tornado.connection import TornadoConnection
 from tchannel.tornado.peer import Peer
@@ -411,3 +412,52 @@ def test_multi_get_and_choose_peer(hostports):
         assert gotten_peer is expected_chosen_peer
         assert chosen_peer is expected_gotten_peer
         assert chosen_peer is expected_chosen_peer
+
+
+@pytest.mark.gen_test
+@pytest.mark.parametrize('body, buffered', [
+    (b'hello', True),
+    (u'hello', True),
+    (closed_stream(b'hello'), False),
+])
+def test_in_memory_args_skip_streams(io_loop, body, buffered):
+    server = TChannel('server')
+    server.listen()
+
+    @server.raw.register('echo')
+    def echo(request):
+        return request.body
+
+    sent = []
+    received = []
+
+    class Hook(EventHook):
+        def before_send_request(self, request):
+            sent.append(request)
+
+        def after_receive_response(self, request, response):
+            received.append(response)
+
+    client = TChannel('client')
+    client.hooks.register(Hook())
+    response = yield client._dep_tchannel.request(
+        hostport=server.hostport
+    ).send('echo', None, body)
+
+    assert (yield response.get_body()) == b'hello'
+    assert (sent[0].args is not None) == buffered
+    assert (sent[0]._argstreams is None) == buffered
+    assert received[0].args == [b'', b'', b'hello']
+    assert received[0]._argstreams is None
+
+
+@pytest.mark.gen_test
+def test_buffered_request_rewinds_without_copies():
+    request = tpeer.Request(args=[b'endpoint', b'', b'body'])
+    assert not request.is_streaming_request
+    assert request._copy_argstreams is None
+
+    assert (yield read_full(request.argstreams[2])) == b'body'
+    request.rewind(2)
+    assert (yield request.get_body()) == b'body'
+    assert (yield read_full(request.argstreams[2])) == b'body'
@@ -20,9 +20,14 @@
 
 from __future__ import absolute_import
 
+import pytest
+
 from tchannel.messages.common import FlagsType
 from tchannel.tornado.request import Request
 from tchannel.tornado.request import TransportMetadata
+from tchannel.tornado.stream import FileStream
+from tchannel.tornado.stream import InMemStream
+from tchannel.tornado.stream import read_full
 
 
 def test_transport_metadata_creation():
@@ -40,3 +45,42 @@ def test_transport_metadata_creation():
     assert 100 == meta.ttl
     assert 'some_service' == meta.service
     assert {'cn': 'another_service', 'as': 'thrift'} == meta.headers
+
+
+@pytest.mark.gen_test
+def test_file_request_is_rewindable(tmpdir):
+    path = tmpdir.join('body')
+    path.write_binary(b'hello world')
+
+    request = Request(argstreams=[
+        InMemStream(b'endpoint'), InMemStream(), FileStream(str(path)),
+    ])
+    assert not request.is_streaming_request
+
+    body = yield read_full(request.argstreams[2])
+    assert body == b'hello world'
+
+    request.rewind(2)
+    body = yield read_full(request.argstreams[2])
+    assert body == b'hello world'
+
+
+@pytest.mark.gen_test
+def test_rewind_shares_arg_buffers():
+    body = b'x' * 1024
+    request = Request(argstreams=[
+        InMemStream(b'endpoint'), InMemStream(b''), InMemStream(body),
+    ])
+
+    for _ in range(2):
+        chunk = yield request.argstreams[2].read()
+        assert chunk is body
+        request.rewind(2)
+
+
+def test_non_rewindable_request_keeps_no_copies():
+    request = Request(rewindable=False, argstreams=[
+        InMemStream(b'endpoint'), InMemStream(b''), InMemStream(b'body'),
+    ])
+    assert not request.is_streaming_request
+    assert request._copy_argstreams is None
@@ -23,6 +23,7 @@ from __future__ import (
 )
 
 import pytest
+import mock
 from tornado import gen
 
 from tchannel.tornado.tombstone import Cemetery
@@ -78,3 +79,86 @@ def test_clear():
 
     assert 1 not in cem
     assert 2 not in cem
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_max_size_evicts_oldest():
+    cem = Cemetery(max_size=3, clock=FakeClock())
+    for id in (1, 2, 3, 4):
+        cem.add(id, 1)
+
+    assert 1 not in cem
+    assert 2 in cem
+    assert 3 in cem
+    assert 4 in cem
+    assert len(cem) == 3
+    assert len(cem._ids) == 3
+
+
+def test_expired_slots_are_reused():
+    clock = FakeClock()
+    cem = Cemetery(ttl_offset_secs=0, max_size=4, clock=clock)
+
+    for id in range(1, 100):
+        cem.add(id, 1)
+        clock.now += 0.5
+
+    # Only the tombstones of the last second are alive and the ring never
+    # grew past what was needed to hold them.
+    assert len(cem._ids) <= 3
+    assert 99 in cem
+    assert 98 not in cem
+
+
+def test_lazy_expiry_on_lookup():
+    clock = FakeClock()
+    cem = Cemetery(ttl_offset_secs=0, clock=clock)
+    cem.add(1, 5)
+    cem.add(2, 1)
+
+    clock.now += 2
+
+    assert 2 not in cem
+    assert 1 in cem
+    assert len(cem) == 1
+
+
+def test_grow_after_wraparound():
+    clock = FakeClock()
+    cem = Cemetery(ttl_offset_secs=0, max_size=8, clock=clock)
+    cem.add(1, 1)
+    cem.add(2, 1)
+    clock.now += 2
+    cem.add(3, 5)
+    cem.add(4, 5)
+    cem.add(5, 5)
+
+    assert [id for id in range(1, 6) if id in cem] == [3, 4, 5]
+
+
+def test_absorb_counts_zombies():
+    cem = Cemetery(clock=FakeClock())
+    cem.add(1, 1)
+
+    assert cem.absorb(1)
+    assert cem.absorb(1)
+    assert not cem.absorb(2)
+    assert cem.absorbed == 2
+
+
+def test_ignores_wall_clock_changes():
+    with mock.patch('time.time') as wall_clock:
+        wall_clock.return_value = 0
+        cem = Cemetery(ttl_offset_secs=0)
+        cem.add(1, 1)
+
+        wall_clock.return_value = 3600
+        assert 1 in cem